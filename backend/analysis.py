@@ -0,0 +1,329 @@
+"""
+Request-level analysis entry points.
+
+Each function takes a validated request model, runs the solver and returns
+the response model. They are plain module-level functions so they can be
+shipped to a worker thread or process by the execution backend.
+"""
+import numpy as np
+from typing import Any, Callable, List, Dict, Optional, Tuple
+from pydantic import BaseModel
+from models import (
+    CalculationRequest, CalculationResponse, SpanResult, NodeResult,
+    FrameRequest, FrameResponse, FrameMemberResult, FrameCaseResult, FrameSessionResponse,
+    InfluenceLineRequest, InfluenceLineResponse, InfluenceSection,
+    MovingLoadRequest, MovingLoadResponse, MovingLoadEnvelope,
+    PatternLoadRequest, PatternLoadResponse, PatternLoadEnvelope
+)
+from solver import SlopeDeflectionSolver, unit_load_positions, DIAGRAM_POINTS
+from moving_load import MovingLoadAnalysis, position_counts
+from pattern_load import PatternLoadAnalysis
+from batch_solver import BatchSlopeDeflectionSolver, beam_layout
+from frame_solver import FrameSolver
+
+
+def beam_dof_count(request: CalculationRequest) -> int:
+    """Size of the slope-deflection system (one rotation per node)."""
+    return len(request.spans) + 1
+
+
+def frame_dof_count(request: FrameRequest) -> int:
+    """Size of the frame stiffness system (three DOFs per node)."""
+    return 3 * len(request.nodes)
+
+
+# Largest number of unit load positions of one influence line request
+INFLUENCE_MAX_POSITIONS = 200000
+
+
+def influence_position_count(request: InfluenceLineRequest) -> int:
+    """Number of unit load positions an influence line request asks for (approximately)."""
+    if request.step is None:
+        return DIAGRAM_POINTS * len(request.spans)
+    return int(sum(span.length for span in request.spans) / request.step) + 2
+
+
+def influence_dof_count(request: InfluenceLineRequest) -> int:
+    """Size of the work of an influence line request: one beam system per position."""
+    return (len(request.spans) + 1) * influence_position_count(request)
+
+
+def analyze_beam(request: CalculationRequest) -> CalculationResponse:
+    """Run the Slope Deflection analysis of a continuous beam."""
+    solver = SlopeDeflectionSolver(
+        spans=request.spans,
+        supports=request.supports
+    )
+    return _beam_response(solver.solve(include_steps=request.include_steps, diagram_format=request.diagram_format))
+
+
+def analyze_influence_lines(request: InfluenceLineRequest) -> InfluenceLineResponse:
+    """Influence lines of a continuous beam for a unit downward load."""
+    if influence_position_count(request) > INFLUENCE_MAX_POSITIONS:
+        raise ValueError(f"An influence line may have at most {INFLUENCE_MAX_POSITIONS} load positions")
+
+    solver = SlopeDeflectionSolver(spans=request.spans, supports=request.supports)
+    sections = None
+    if request.sections is not None:
+        sections = [(section.span_index, section.x) for section in request.sections]
+    lines = solver.influence_lines(
+        positions=unit_load_positions([span.length for span in request.spans], request.step),
+        sections=sections
+    )
+
+    return InfluenceLineResponse(
+        success=True,
+        positions=lines["positions"].tolist(),
+        rotations=lines["rotations"].tolist(),
+        reactions=lines["reactions"].tolist(),
+        nodeMoments=lines["node_moments"].tolist(),
+        sections=[
+            InfluenceSection(spanIndex=int(span), x=float(x))
+            for span, x in zip(lines["section_span"], lines["section_x"])
+        ],
+        sectionMoments=lines["section_moments"].tolist(),
+        sectionShears=lines["section_shears"].tolist()
+    )
+
+
+def moving_load_dof_count(request: MovingLoadRequest) -> int:
+    """Size of the work of a moving load request: one beam system per influence line position."""
+    _, num_influence = position_counts(
+        sum(span.length for span in request.spans), request.axle_spacings, request.step
+    )
+    return (len(request.spans) + 1) * num_influence
+
+
+def analyze_moving_load(request: MovingLoadRequest) -> MovingLoadResponse:
+    """Moving-load envelopes of a vehicle axle train crossing a continuous beam."""
+    solver = SlopeDeflectionSolver(spans=request.spans, supports=request.supports)
+    analysis = MovingLoadAnalysis(solver, request.axle_loads, request.axle_spacings, request.step)
+    envelopes = analysis.envelopes(request.stations_per_span)
+
+    def envelope(values: Dict[str, np.ndarray]) -> MovingLoadEnvelope:
+        return MovingLoadEnvelope(
+            max=values["max"].tolist(),
+            maxPosition=values["max_position"].tolist(),
+            min=values["min"].tolist(),
+            minPosition=values["min_position"].tolist()
+        )
+
+    return MovingLoadResponse(
+        success=True,
+        step=analysis.step,
+        stations=envelopes["stations"].tolist(),
+        stationSpans=envelopes["station_span"].tolist(),
+        moment=envelope(envelopes["moment"]),
+        shear=envelope(envelopes["shear"]),
+        reactions=envelope(envelopes["reactions"])
+    )
+
+
+def pattern_load_dof_count(request: PatternLoadRequest) -> int:
+    """Size of the work of a pattern load request: one beam system per span plus the permanent case."""
+    return (len(request.spans) + 1) ** 2
+
+
+def analyze_pattern_load(request: PatternLoadRequest) -> PatternLoadResponse:
+    """Envelopes of a continuous beam under every (or every given) live-load pattern."""
+    analysis = PatternLoadAnalysis(request.spans, request.supports, request.live_loads, request.patterns)
+    envelopes = analysis.envelopes()
+
+    # Governing patterns are reported once and referenced by index
+    patterns: Dict[Tuple[int, ...], int] = {}
+
+    def pattern_indices(masks: np.ndarray) -> List[int]:
+        return [
+            patterns.setdefault(tuple(np.flatnonzero(mask).tolist()), len(patterns))
+            for mask in masks
+        ]
+
+    def envelope(values: Dict[str, np.ndarray]) -> PatternLoadEnvelope:
+        return PatternLoadEnvelope(
+            max=values["max"].tolist(),
+            maxPattern=pattern_indices(values["max_pattern"]),
+            min=values["min"].tolist(),
+            minPattern=pattern_indices(values["min_pattern"])
+        )
+
+    moment = envelope(envelopes["moment"])
+    shear = envelope(envelopes["shear"])
+    reactions = envelope(envelopes["reactions"])
+    return PatternLoadResponse(
+        success=True,
+        patterns=[list(pattern) for pattern in patterns],
+        stations=envelopes["stations"].tolist(),
+        stationSpans=envelopes["station_span"].tolist(),
+        moment=moment,
+        shear=shear,
+        reactions=reactions
+    )
+
+
+def _beam_response(results: Dict) -> CalculationResponse:
+    """Convert SlopeDeflectionSolver results to the response model."""
+    return CalculationResponse(
+        success=True,
+        span_results=[SpanResult(**r) for r in results["span_results"]],
+        node_results=[NodeResult(**r) for r in results["node_results"]],
+        solution_steps=results["solution_steps"]
+    )
+
+
+def analyze_frame(request: FrameRequest) -> FrameResponse:
+    """Run the Direct Stiffness Method analysis of a 2D frame."""
+    solver = FrameSolver()
+    results = solver.solve(request)
+    return FrameResponse(**_frame_response_fields(results))
+
+
+def frame_session_response(session_id: str, results: Dict) -> FrameSessionResponse:
+    """Response of a frame session from the results of its latest analysis (see FrameSession)."""
+    return FrameSessionResponse(
+        **_frame_response_fields(results),
+        sessionId=session_id,
+        sessionReport=results["session_report"]
+    )
+
+
+def _frame_response_fields(results: Dict) -> Dict:
+    """FrameResponse fields (by alias) of FrameSolver results."""
+    return dict(
+        success=True,
+        displacements=results["displacements"],
+        reactions=results["reactions"],
+        memberResults=_frame_member_results(results["member_results"]),
+        caseResults=_frame_case_results(results["case_results"]),
+        combinationResults=_frame_case_results(results["combination_results"]),
+        envelope=results["envelope"],
+        solverReport=results["solver_report"]
+    )
+
+
+def beam_error_response(message: str) -> CalculationResponse:
+    """Failed beam analysis response."""
+    return CalculationResponse(
+        success=False,
+        span_results=[],
+        node_results=[],
+        error_message=message
+    )
+
+
+def frame_error_response(message: str) -> FrameResponse:
+    """Failed frame analysis response."""
+    return FrameResponse(
+        success=False,
+        displacements=[],
+        reactions=[],
+        memberResults=[],
+        errorMessage=message
+    )
+
+
+def frame_session_error_response(message: str, session_id: Optional[str] = None) -> FrameSessionResponse:
+    """Failed frame session response."""
+    return FrameSessionResponse(
+        success=False,
+        displacements=[],
+        reactions=[],
+        memberResults=[],
+        sessionId=session_id,
+        errorMessage=message
+    )
+
+
+def serialize_response(response: BaseModel) -> bytes:
+    """JSON body of a response model, as sent to the client."""
+    return response.model_dump_json(by_alias=True).encode()
+
+
+def analyze_many(analyze: Callable[[Any], BaseModel], error_response: Callable[[str], BaseModel],
+                 requests: List[Any]) -> List[Tuple[bool, bytes]]:
+    """
+    Solve one chunk of a batch and serialize each response.
+
+    A failing model yields its error response instead of aborting the chunk.
+
+    Returns:
+        (success, JSON body) per request, in order
+    """
+    bodies = []
+    for request in requests:
+        try:
+            response = analyze(request)
+        except Exception as e:
+            response = error_response(f"Calculation failed: {str(e)}")
+        bodies.append((response.success, serialize_response(response)))
+    return bodies
+
+
+def analyze_beams(requests: List[CalculationRequest]) -> List[Tuple[bool, bytes]]:
+    """
+    Solve one chunk of a beam batch, vectorizing over beams that share a layout.
+
+    Beams without solution steps and with sampled diagrams are grouped by
+    beam_layout and each group is solved in one BatchSlopeDeflectionSolver
+    pass. Other beams, and any group the batch solver rejects, go through
+    analyze_many one by one.
+
+    Returns:
+        (success, JSON body) per request, in order, as analyze_many
+    """
+    bodies: List[Tuple[bool, bytes]] = [None] * len(requests)
+    groups: Dict[Tuple, List[int]] = {}
+    for i, request in enumerate(requests):
+        batchable = not request.include_steps and request.diagram_format == "sampled"
+        key = beam_layout(request) if batchable else ("single", i)
+        groups.setdefault(key, []).append(i)
+
+    for indices in groups.values():
+        group = [requests[i] for i in indices]
+        group_bodies = None
+        if len(group) > 1:
+            try:
+                results = BatchSlopeDeflectionSolver.from_requests(group).results()
+                group_bodies = [(True, serialize_response(_beam_response(r))) for r in results]
+            except Exception:
+                # e.g. a singular beam: isolate the failure by solving one at a time
+                pass
+        if group_bodies is None:
+            group_bodies = analyze_many(analyze_beam, beam_error_response, group)
+        for i, body in zip(indices, group_bodies):
+            bodies[i] = body
+    return bodies
+
+
+def _frame_member_results(raw_results: List[Dict]) -> List[FrameMemberResult]:
+    """Convert member results dicts from FrameSolver to Pydantic models."""
+    return [
+        FrameMemberResult(
+            memberId=r["member_id"],
+            axialStart=r["axial_start"],
+            shearStart=r["shear_start"],
+            momentStart=r["moment_start"],
+            axialEnd=r["axial_end"],
+            shearEnd=r["shear_end"],
+            momentEnd=r["moment_end"],
+            stations=r.get("stations"),
+            nDiagram=r.get("n_diagram"),
+            vDiagram=r.get("v_diagram"),
+            mDiagram=r.get("m_diagram"),
+            fmdDiagram=r.get("fmd_diagram"),
+            emdDiagram=r.get("emd_diagram")
+        )
+        for r in raw_results
+    ]
+
+
+def _frame_case_results(raw_cases: List[Dict]) -> List[FrameCaseResult]:
+    """Convert named load case / combination results to Pydantic models."""
+    return [
+        FrameCaseResult(
+            name=case["name"],
+            displacements=case["displacements"],
+            reactions=case["reactions"],
+            memberResults=_frame_member_results(case["member_results"])
+        )
+        for case in raw_cases
+    ]
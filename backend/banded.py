@@ -0,0 +1,159 @@
+"""
+Tridiagonal storage and O(n) solver for continuous-beam stiffness systems.
+
+In the Slope Deflection Method only node i and its neighbours i±1 couple,
+so the beam stiffness matrix is tridiagonal. Storing the three diagonals and
+solving with the Thomas algorithm keeps memory and time linear in the
+number of spans.
+"""
+import numpy as np
+from typing import List
+
+
+class TridiagonalMatrix:
+    """
+    Symmetric-pattern tridiagonal matrix stored as three diagonals.
+
+    Arrays may carry leading batch dimensions: diag has shape (..., n) and
+    lower/upper have shape (..., n - 1), so many systems of the same size
+    are stored and solved together.
+    """
+
+    def __init__(self, lower: np.ndarray, diag: np.ndarray, upper: np.ndarray):
+        self.lower = np.asarray(lower, dtype=float)
+        self.diag = np.asarray(diag, dtype=float)
+        self.upper = np.asarray(upper, dtype=float)
+
+    @classmethod
+    def zeros(cls, n: int, batch_shape: tuple = ()) -> "TridiagonalMatrix":
+        off = max(n - 1, 0)
+        return cls(
+            np.zeros(batch_shape + (off,)),
+            np.zeros(batch_shape + (n,)),
+            np.zeros(batch_shape + (off,))
+        )
+
+    @property
+    def size(self) -> int:
+        return self.diag.shape[-1]
+
+    def reduce(self, keep: List[int]) -> "TridiagonalMatrix":
+        """
+        Submatrix of the kept rows/columns (indices in increasing order).
+
+        Removing a row/column of a tridiagonal matrix leaves it tridiagonal:
+        two kept indices stay coupled only if they were neighbours.
+        """
+        keep = np.asarray(keep, dtype=np.int64)
+        diag = self.diag[..., keep]
+        if len(keep) < 2:
+            return TridiagonalMatrix(self.lower[..., :0], diag, self.upper[..., :0])
+
+        first = keep[:-1]
+        adjacent = (keep[1:] - first) == 1
+        upper = np.where(adjacent, self.upper[..., first], 0.0)
+        lower = np.where(adjacent, self.lower[..., first], 0.0)
+        return TridiagonalMatrix(lower, diag, upper)
+
+    def to_dense(self) -> np.ndarray:
+        """Dense copy (single system only), for display and debugging."""
+        return np.diag(self.diag) + np.diag(self.upper, 1) + np.diag(self.lower, -1)
+
+    def matvec(self, x: np.ndarray) -> np.ndarray:
+        """Product K @ x along the last axis."""
+        y = self.diag * x
+        y[..., :-1] += self.upper * x[..., 1:]
+        y[..., 1:] += self.lower * x[..., :-1]
+        return y
+
+    def factorize(self) -> "TridiagonalFactor":
+        """Thomas-algorithm elimination of K, reusable for any number of right-hand sides."""
+        return TridiagonalFactor(self.lower, self.diag, self.upper)
+
+    def solve(self, rhs: np.ndarray) -> np.ndarray:
+        """Solve K x = rhs with the Thomas algorithm (no pivoting)."""
+        return solve_tridiagonal(self.lower, self.diag, self.upper, rhs)
+
+
+class TridiagonalFactor:
+    """
+    Forward elimination of a tridiagonal matrix (the LU factors of the Thomas algorithm).
+
+    Factoring costs O(n) once; each solve is then an O(n) forward and back
+    substitution. Right-hand sides may carry extra leading dimensions, so
+    one factor solves a whole matrix of load vectors (e.g. one per unit-load
+    position) in a single pass.
+
+    Raises:
+        np.linalg.LinAlgError: If a zero pivot is met (singular matrix)
+    """
+
+    def __init__(self, lower: np.ndarray, diag: np.ndarray, upper: np.ndarray):
+        diag = np.asarray(diag, dtype=float)
+        self.lower = np.asarray(lower, dtype=float)
+        n = diag.shape[-1]
+        self.c_prime = np.empty(diag.shape[:-1] + (max(n - 1, 0),))
+        self.pivots = np.empty(diag.shape)
+        if n == 0:
+            return
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.pivots[..., 0] = diag[..., 0]
+            for i in range(1, n):
+                self.c_prime[..., i - 1] = upper[..., i - 1] / self.pivots[..., i - 1]
+                self.pivots[..., i] = diag[..., i] - self.lower[..., i - 1] * self.c_prime[..., i - 1]
+
+        if np.any(self.pivots == 0) or not np.all(np.isfinite(self.pivots)):
+            raise np.linalg.LinAlgError("Singular matrix")
+
+    def solve(self, rhs: np.ndarray) -> np.ndarray:
+        """
+        Solve K x = rhs.
+
+        Args:
+            rhs: Right-hand side(s), shape (..., n), broadcast against the factor
+
+        Returns:
+            Solution x with the broadcast shape
+        """
+        rhs = np.asarray(rhs, dtype=float)
+        n = self.pivots.shape[-1]
+        x = np.array(np.broadcast_to(rhs, np.broadcast_shapes(self.pivots.shape, rhs.shape)))
+        if n == 0:
+            return x
+
+        x[..., 0] /= self.pivots[..., 0]
+        for i in range(1, n):
+            x[..., i] = (x[..., i] - self.lower[..., i - 1] * x[..., i - 1]) / self.pivots[..., i]
+        for i in range(n - 2, -1, -1):
+            x[..., i] -= self.c_prime[..., i] * x[..., i + 1]
+
+        if not np.all(np.isfinite(x)):
+            raise np.linalg.LinAlgError("Singular matrix")
+        return x
+
+
+def solve_tridiagonal(lower: np.ndarray, diag: np.ndarray, upper: np.ndarray,
+                      rhs: np.ndarray) -> np.ndarray:
+    """
+    Thomas algorithm for tridiagonal systems in O(n).
+
+    Forward elimination removes the sub-diagonal, then back substitution
+    recovers the unknowns. All arguments may carry the same leading batch
+    dimensions; the loop runs over the n unknowns only, every step is
+    vectorized across the batch. No pivoting is done, which is safe for the
+    diagonally dominant beam stiffness matrices this is used for.
+
+    Args:
+        lower: Sub-diagonal, shape (..., n - 1)
+        diag: Main diagonal, shape (..., n)
+        upper: Super-diagonal, shape (..., n - 1)
+        rhs: Right-hand side, shape (..., n)
+
+    Returns:
+        Solution x with the shape of rhs
+
+    Raises:
+        np.linalg.LinAlgError: If a zero pivot is met (singular system)
+    """
+    return TridiagonalFactor(lower, diag, upper).solve(rhs)
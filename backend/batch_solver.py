@@ -0,0 +1,242 @@
+"""
+Vectorized Slope Deflection analysis of many continuous beams at once.
+
+Parameter sweeps and batch jobs solve the same beam layout over and over with
+different lengths, stiffnesses or load magnitudes. Beams that share a layout
+(span count, support types, load types per span) are stacked into
+(beams, nodes) arrays: FEMs, the tridiagonal systems, end actions and the
+(beams, spans, stations) diagrams are all computed in single NumPy passes
+instead of one Python-level solve per beam.
+"""
+import numpy as np
+from typing import List, Dict, Tuple
+from models import Span, Support, CalculationRequest, DiagramData
+from solver import flatten_span_loads, span_load_actions, span_diagram_grid, DIAGRAM_POINTS
+from banded import TridiagonalMatrix
+
+
+def support_types(supports: List[Support], num_nodes: int) -> Tuple[str, ...]:
+    """Effective support type of every node (unsupported nodes act as rollers)."""
+    support_map = {support.node_index: support.support_type for support in supports}
+    return tuple(support_map.get(node_idx, "ROLLER") for node_idx in range(num_nodes))
+
+
+def beam_layout(request: CalculationRequest) -> Tuple:
+    """
+    Key of the beam layout: requests with equal keys can be solved as one batch.
+
+    Covers the support type of every node and the load types on every span;
+    lengths, section properties, magnitudes and positions may differ.
+    """
+    return (
+        support_types(request.supports, len(request.spans) + 1),
+        tuple(tuple(load.load_type for load in span.loads) for span in request.spans)
+    )
+
+
+class BatchSlopeDeflectionSolver:
+    """
+    Slope Deflection solver for N continuous beams sharing one layout.
+
+    All beams have the same number of spans, the same support types and the
+    same load types in the same order on each span; they differ only in
+    lengths, section properties and load magnitudes/positions.
+    """
+
+    def __init__(self, lengths: np.ndarray, EI: np.ndarray, loads: Dict[str, np.ndarray],
+                 support_types: Tuple[str, ...], moment_span: np.ndarray = None,
+                 moment_magnitude: np.ndarray = None):
+        """
+        Args:
+            lengths: Span lengths, shape (beams, spans)
+            EI: Flexural stiffness of the spans, shape (beams, spans)
+            loads: Flattened loads (see flatten_span_loads) with "magnitude"
+                and "position" of shape (beams, loads)
+            support_types: Support type of every node
+            moment_span: Span index of each applied moment, shape (moments,)
+            moment_magnitude: Applied moments, shape (beams, moments)
+        """
+        self.lengths = np.asarray(lengths, dtype=float)
+        self.EI = np.asarray(EI, dtype=float)
+        self.num_beams, self.num_spans = self.lengths.shape
+        self.num_nodes = self.num_spans + 1
+        self.support_types = tuple(support_types)
+        if len(self.support_types) != self.num_nodes:
+            raise ValueError("Every node needs a support type")
+
+        self.loads = {
+            "span": loads["span"],
+            "shape": loads["shape"],
+            "magnitude": np.broadcast_to(loads["magnitude"], (self.num_beams, len(loads["span"]))),
+            "position": np.broadcast_to(loads["position"], (self.num_beams, len(loads["span"])))
+        }
+        if np.isnan(self.loads["position"]).any():
+            raise ValueError("Point loads need a position")
+
+        # Applied moments only enter the fixed end moments (at the left end)
+        self.moment_span = np.zeros(0, dtype=np.int64) if moment_span is None else np.asarray(moment_span)
+        self.moment_magnitude = np.broadcast_to(
+            np.zeros(0) if moment_magnitude is None else moment_magnitude,
+            (self.num_beams, len(self.moment_span))
+        )
+
+    @classmethod
+    def from_spans(cls, span_sets: List[List[Span]], supports: List[Support]) -> "BatchSlopeDeflectionSolver":
+        """Batch solver for beams given as span lists, all on the same supports."""
+        if not span_sets:
+            raise ValueError("At least one beam is required")
+
+        layout = [tuple(load.load_type for load in span.loads) for span in span_sets[0]]
+        for spans in span_sets:
+            if [tuple(load.load_type for load in span.loads) for span in spans] != layout:
+                raise ValueError("All beams in a batch must have the same spans and load types")
+
+        flat = [flatten_span_loads(spans) for spans in span_sets]
+        moment_span = [i for i, span in enumerate(span_sets[0])
+                       for load in span.loads if load.load_type == "MOMENT"]
+        return cls(
+            lengths=[[span.length for span in spans] for spans in span_sets],
+            EI=[[span.elastic_modulus * span.moment_of_inertia for span in spans] for spans in span_sets],
+            loads={
+                "span": flat[0]["span"],
+                "shape": flat[0]["shape"],
+                "magnitude": np.stack([f["magnitude"] for f in flat]),
+                "position": np.stack([f["position"] for f in flat])
+            },
+            support_types=support_types(supports, len(layout) + 1),
+            moment_span=np.array(moment_span, dtype=np.int64),
+            moment_magnitude=np.array(
+                [[load.magnitude for span in spans for load in span.loads if load.load_type == "MOMENT"]
+                 for spans in span_sets],
+                dtype=float
+            ).reshape(len(span_sets), len(moment_span))
+        )
+
+    @classmethod
+    def from_requests(cls, requests: List[CalculationRequest]) -> "BatchSlopeDeflectionSolver":
+        """Batch solver for requests with the same beam_layout."""
+        if len({beam_layout(request) for request in requests}) > 1:
+            raise ValueError("All beams in a batch must have the same layout")
+        return cls.from_spans([request.spans for request in requests], requests[0].supports)
+
+    def solve(self) -> Dict[str, np.ndarray]:
+        """
+        Analyze all beams.
+
+        Returns:
+            Dict of arrays:
+                "rotations", "reactions", "moment_reactions" (beams, nodes);
+                moment reactions are NaN at nodes that are not fixed
+                "moment_left", "moment_right", "shear_left", "shear_right",
+                "max_moment", "max_moment_location" (beams, spans)
+                "x", "sfd", "fmd", "emd", "bmd" (beams, spans, stations)
+        """
+        actions = span_load_actions(self.lengths, self.loads)
+        fem_left = actions["fem_left"]
+        fem_right = actions["fem_right"]
+        if len(self.moment_span):
+            np.add.at(fem_left.T, self.moment_span, self.moment_magnitude.T)
+
+        # Tridiagonal systems of all beams, (beams, nodes)
+        k = (2 * self.EI) / self.lengths
+        K = TridiagonalMatrix.zeros(self.num_nodes, (self.num_beams,))
+        F = np.zeros((self.num_beams, self.num_nodes))
+        K.diag[:, :-1] += 2 * k
+        K.upper += k
+        F[:, :-1] -= fem_left
+        K.diag[:, 1:] += 2 * k
+        K.lower += k
+        F[:, 1:] -= fem_right
+
+        # Fixed supports have zero rotation; pinned and roller rotations are unknown
+        free_dofs = [i for i, kind in enumerate(self.support_types) if kind in ["PINNED", "ROLLER"]]
+        rotations = np.zeros((self.num_beams, self.num_nodes))
+        if free_dofs:
+            rotations[:, free_dofs] = K.reduce(free_dofs).solve(F[:, free_dofs])
+
+        theta_a = rotations[:, :-1]
+        theta_b = rotations[:, 1:]
+        M_ab = k * (2 * theta_a + theta_b) + fem_left
+        M_ba = k * (2 * theta_b + theta_a) + fem_right
+        R_left = (-M_ab - M_ba + actions["moment_about_right"]) / self.lengths
+        R_right = actions["total_load"] - R_left
+
+        x = np.linspace(0, self.lengths, DIAGRAM_POINTS, axis=-1)
+        diagrams = span_diagram_grid(
+            x, self.lengths, self.loads,
+            R_left=R_left, R_left_ss=actions["moment_about_right"] / self.lengths,
+            M_ab=M_ab, M_ba=M_ba
+        )
+
+        bmd = diagrams["bmd"]
+        max_idx = np.argmax(np.abs(bmd), axis=-1)[..., None]
+
+        # Node reactions: right reaction of the span on the left plus left reaction of the span on the right
+        reactions = np.zeros((self.num_beams, self.num_nodes))
+        reactions[:, 1:] += R_right
+        reactions[:, :-1] += R_left
+
+        moment_reactions = np.full((self.num_beams, self.num_nodes), np.nan)
+        for node_idx, kind in enumerate(self.support_types):
+            if kind == "FIXED":
+                moment_reactions[:, node_idx] = M_ba[:, node_idx - 1] if node_idx > 0 else M_ab[:, 0]
+
+        return {
+            "rotations": rotations,
+            "reactions": reactions,
+            "moment_reactions": moment_reactions,
+            "moment_left": M_ab,
+            "moment_right": M_ba,
+            "shear_left": R_left,
+            "shear_right": -R_right,
+            "max_moment": np.take_along_axis(bmd, max_idx, axis=-1)[..., 0],
+            "max_moment_location": np.take_along_axis(x, max_idx, axis=-1)[..., 0],
+            "x": x,
+            **diagrams
+        }
+
+    def results(self, arrays: Dict[str, np.ndarray] = None) -> List[Dict]:
+        """
+        Per-beam results in the format of SlopeDeflectionSolver.solve (without solution steps).
+
+        Args:
+            arrays: Output of solve(); solved here if not given
+        """
+        arrays = arrays if arrays is not None else self.solve()
+        scalars = {
+            name: arrays[name].tolist()
+            for name in ("rotations", "reactions", "moment_left", "moment_right", "shear_left",
+                         "shear_right", "max_moment", "max_moment_location")
+        }
+        moment_reactions = arrays["moment_reactions"].tolist()
+
+        results = []
+        for b in range(self.num_beams):
+            span_results = []
+            for i in range(self.num_spans):
+                x_coords = arrays["x"][b, i].tolist()
+                span_results.append({
+                    "span_index": i,
+                    **{name: scalars[name][b][i] for name in ("moment_left", "moment_right", "shear_left",
+                                                             "shear_right", "max_moment", "max_moment_location")},
+                    **{
+                        f"{name}_data": DiagramData(x_coords=x_coords, values=arrays[name][b, i].tolist())
+                        for name in ("sfd", "fmd", "emd", "bmd")
+                    }
+                })
+
+            node_results = [
+                {
+                    "node_index": node_idx,
+                    "rotation": scalars["rotations"][b][node_idx],
+                    "reaction": scalars["reactions"][b][node_idx],
+                    "moment_reaction": moment_reactions[b][node_idx] if kind == "FIXED" else None
+                }
+                for node_idx, kind in enumerate(self.support_types)
+            ]
+            results.append({
+                "span_results": span_results,
+                "node_results": node_results,
+                "solution_steps": None
+            })
+        return results
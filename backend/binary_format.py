@@ -0,0 +1,174 @@
+"""
+Compact binary encoding of analysis responses.
+
+Diagram-heavy responses are mostly long float lists, and formatting and
+parsing them as JSON text costs more than the solve on large models. Clients
+that send ``Accept: application/vnd.structsolve.arrays`` get the same
+response as a small JSON manifest plus packed little-endian arrays:
+
+    offset  size  content
+    0       4     magic b"SSBF"
+    4       2     format version (uint16)
+    6       2     reserved (zero)
+    8       4     manifest length in bytes (uint32)
+    12      n     manifest: the JSON response in which every number list
+                  (or list of equal-length number lists) is replaced by
+                  {"$array": i}, plus an "$arrays" table of {"dtype",
+                  "offset", "shape"} entries
+    ...           array data, from the first 8-byte boundary after the
+                  manifest; offsets are from the start of the data and
+                  8-byte aligned, so clients can view the arrays in place
+
+Lists of objects with the same fields (span results, member results, ...)
+are sent column-wise as {"$rows": n, "$columns": {field: column}}, so a
+diagram of every member becomes one (members, stations) array. Float lists
+are sent as float64, or float32 with the media type parameter
+``dtype=float32``; integer lists as int32/int64. Identical arrays (such as
+the x-coordinates shared by the diagrams of a span) are sent once.
+"""
+import hashlib
+import json
+import numpy as np
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel
+
+
+MEDIA_TYPE = "application/vnd.structsolve.arrays"
+MAGIC = b"SSBF"
+VERSION = 1
+HEADER_SIZE = 12
+ALIGNMENT = 8
+FLOAT_DTYPES = {"float64": "<f8", "float32": "<f4"}
+
+
+def negotiate_binary(accept: Optional[str]) -> Optional[str]:
+    """
+    Float dtype of the binary format if the Accept header asks for it.
+
+    Args:
+        accept: Value of the Accept header
+
+    Returns:
+        "float64" or "float32", or None for JSON
+    """
+    for media_range in (accept or "").split(","):
+        media_type, *params = [part.strip() for part in media_range.split(";")]
+        if media_type.lower() != MEDIA_TYPE:
+            continue
+        options = dict(param.split("=", 1) for param in params if "=" in param)
+        if options.get("q", "1").strip() in ("0", "0.0", "0.00", "0.000"):
+            return None
+        dtype = options.get("dtype", "float64").strip().lower()
+        if dtype not in FLOAT_DTYPES:
+            raise ValueError(f"Unsupported binary dtype: {dtype}")
+        return dtype
+    return None
+
+
+def _number_array(values: List, float_dtype: str) -> Optional[np.ndarray]:
+    """values as a packed little-endian array, or None if it is not a 1-D or 2-D number list."""
+    if not values:
+        return None
+    try:
+        array = np.asarray(values)
+    except (ValueError, OverflowError):
+        # Ragged nested lists or integers beyond int64
+        return None
+    if array.ndim not in (1, 2) or array.size == 0:
+        return None
+    if array.dtype.kind == "f":
+        return array.astype(float_dtype, copy=False)
+    if array.dtype.kind == "i":
+        if array.min() >= np.iinfo(np.int32).min and array.max() <= np.iinfo(np.int32).max:
+            return array.astype("<i4")
+        return array.astype("<i8", copy=False)
+    return None
+
+
+def encode_response(response: BaseModel, dtype: str = "float64") -> bytes:
+    """
+    Binary body of a response model (see the module docstring).
+
+    Args:
+        response: Response model; dumped by alias like the JSON body
+        dtype: "float64" or "float32" for float lists
+    """
+    float_dtype = FLOAT_DTYPES[dtype]
+    entries: List[Dict] = []
+    chunks: List[memoryview] = []
+    offset = 0
+    # (dtype, digest of the data) -> array number, to send identical arrays once
+    index: Dict[Any, int] = {}
+
+    def pack(value):
+        nonlocal offset
+        if isinstance(value, dict):
+            return {key: pack(item) for key, item in value.items()}
+        if not isinstance(value, list) or not value:
+            return value
+        if isinstance(value[0], dict) and all(isinstance(row, dict) and row.keys() == value[0].keys()
+                                              for row in value):
+            return {
+                "$rows": len(value),
+                "$columns": {key: pack([row[key] for row in value]) for key in value[0]}
+            }
+        array = _number_array(value, float_dtype)
+        if array is None:
+            return [pack(item) for item in value]
+        raw = memoryview(array.reshape(-1).view(np.uint8))
+        key = (array.dtype.str, array.shape, hashlib.blake2b(raw, digest_size=16).digest())
+        if key not in index:
+            index[key] = len(entries)
+            entries.append({"dtype": array.dtype.str, "offset": offset, "shape": list(array.shape)})
+            chunks.append(raw)
+            offset += -(-len(raw) // ALIGNMENT) * ALIGNMENT
+        return {"$array": index[key]}
+
+    manifest = pack(response.model_dump(by_alias=True))
+    manifest["$arrays"] = entries
+    manifest_bytes = json.dumps(manifest, separators=(",", ":")).encode()
+
+    header = (MAGIC + VERSION.to_bytes(2, "little") + bytes(2)
+              + len(manifest_bytes).to_bytes(4, "little"))
+    parts = [header, manifest_bytes, bytes(-(HEADER_SIZE + len(manifest_bytes)) % ALIGNMENT)]
+    for chunk in chunks:
+        parts.append(chunk)
+        parts.append(bytes(-len(chunk) % ALIGNMENT))
+    return b"".join(parts)
+
+
+def decode_response(body: bytes) -> Dict:
+    """
+    Response dict of a binary body, with arrays as NumPy views into body.
+
+    The inverse of encode_response, for Python clients and tests.
+    """
+    if body[:4] != MAGIC:
+        raise ValueError("Not a binary analysis response")
+    version = int.from_bytes(body[4:6], "little")
+    if version != VERSION:
+        raise ValueError(f"Unsupported binary format version: {version}")
+    manifest_size = int.from_bytes(body[8:12], "little")
+    manifest = json.loads(body[HEADER_SIZE:HEADER_SIZE + manifest_size])
+    data_start = -(-(HEADER_SIZE + manifest_size) // ALIGNMENT) * ALIGNMENT
+
+    arrays = [
+        np.frombuffer(body, dtype=entry["dtype"], count=int(np.prod(entry["shape"])),
+                      offset=data_start + entry["offset"]).reshape(entry["shape"])
+        for entry in manifest.pop("$arrays")
+    ]
+
+    def unpack(value):
+        if isinstance(value, dict):
+            if set(value) == {"$array"}:
+                array = arrays[value["$array"]]
+                return list(array) if array.ndim > 1 else array
+            if set(value) == {"$rows", "$columns"}:
+                columns = {key: unpack(column) for key, column in value["$columns"].items()}
+                return [{key: column[i] for key, column in columns.items()} for i in range(value["$rows"])]
+            return {key: unpack(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [unpack(item) for item in value]
+        return value
+
+    return unpack(manifest)
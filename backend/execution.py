@@ -0,0 +1,117 @@
+"""
+Execution backends for CPU-bound analyses.
+
+The solvers are synchronous NumPy code, so running them directly inside an
+``async def`` endpoint blocks the event loop: one large frame would stall
+every other request on the worker, including /api/health. Small models are
+still solved inline (handing them to a pool costs more than the solve);
+larger ones run on a thread pool or a pre-warmed process pool.
+
+Configured with environment variables:
+    SOLVER_BACKEND         "inline", "thread" (default) or "process"
+    SOLVER_WORKERS         Pool size (default: number of CPUs)
+    SOLVER_INLINE_MAX_DOF  Models up to this many DOFs run inline (default 300)
+"""
+import asyncio
+import functools
+import os
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Callable, Optional
+
+
+BACKENDS = ("inline", "thread", "process")
+
+
+def _warm_up() -> int:
+    """Import the solvers and run a tiny analysis so the first real request is not slowed."""
+    from models import FrameRequest, FrameNode, FrameMember
+    from frame_solver import FrameSolver
+
+    FrameSolver().solve(FrameRequest(
+        nodes=[
+            FrameNode(id="a", x=0, y=0, fix_x=True, fix_y=True, fix_r=True),
+            FrameNode(id="b", x=1, y=0)
+        ],
+        members=[FrameMember(
+            id="m", start_node_id="a", end_node_id="b",
+            elastic_modulus=1.0, moment_of_inertia=1.0, cross_section_area=1.0
+        )]
+    ))
+    return os.getpid()
+
+
+class SolverExecutor:
+    """Runs analyses inline or on a worker pool depending on model size."""
+
+    def __init__(self, backend: str = "thread", workers: Optional[int] = None,
+                 inline_max_dof: int = 300):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown solver backend: {backend}")
+        self.backend = backend
+        self.workers = workers or os.cpu_count() or 1
+        self.inline_max_dof = inline_max_dof
+        self._pool: Optional[Executor] = None
+
+    @classmethod
+    def from_env(cls) -> "SolverExecutor":
+        workers = os.environ.get("SOLVER_WORKERS")
+        return cls(
+            backend=os.environ.get("SOLVER_BACKEND", "thread"),
+            workers=int(workers) if workers else None,
+            inline_max_dof=int(os.environ.get("SOLVER_INLINE_MAX_DOF", "300"))
+        )
+
+    @property
+    def pool(self) -> Optional[Executor]:
+        return self._pool
+
+    def start(self):
+        """Create the worker pool; process workers are warmed up before serving."""
+        if self._pool is not None or self.backend == "inline":
+            return
+
+        if self.backend == "thread":
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="solver")
+        else:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            # Each submission occupies one worker, so this starts and warms all of them
+            for future in [self._pool.submit(_warm_up) for _ in range(self.workers)]:
+                future.result()
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    async def run(self, func: Callable, *args, dof_count: int = 0):
+        """
+        Run func(*args), off the event loop if the model is large enough.
+
+        Args:
+            func: Module-level (picklable) analysis function
+            dof_count: Model size used to choose between inline and pool execution
+        """
+        if self._pool is None or dof_count <= self.inline_max_dof:
+            return func(*args)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, functools.partial(func, *args))
+
+    async def run_local(self, func: Callable, *args, dof_count: int = 0):
+        """
+        Like run, but never on a process pool.
+
+        For work on objects that live in the API process (frame sessions):
+        with the "process" backend it runs on the event loop's default
+        thread pool instead.
+        """
+        if self.backend == "inline" or dof_count <= self.inline_max_dof:
+            return func(*args)
+
+        loop = asyncio.get_running_loop()
+        pool = self._pool if self.backend == "thread" else None
+        return await loop.run_in_executor(pool, functools.partial(func, *args))
+
+
+# Shared executor of the API process
+executor = SolverExecutor.from_env()
@@ -0,0 +1,386 @@
+"""
+Frame models kept on the server for incremental re-analysis.
+
+In the frame editor a designer changes one member's section or releases and
+analyzes again, which reassembles and refactorizes K_ff for an edit that
+touches six DOFs. A FrameSession keeps the factor of K_ff (K0) and applies
+member edits as a low-rank correction instead (Sherman-Morrison-Woodbury).
+With Δ the stiffness change of the edited members on the set S of their
+free DOFs,
+
+    K = K0 + E_S Δ E_S^T
+    K^-1 F = X - W (I + Δ W_S)^-1 Δ X_S,    X = K0^-1 F,  W = K0^-1 E_S
+
+so an update costs one back-substitution per DOF newly added to S plus
+O(n |S|) work, instead of a factorization. The correction accumulates over
+updates; after refactor_after of them, or once S grows past a small share of
+the free DOFs (where the dense n x |S| correction costs more than a
+factorization), K_ff is factorized from scratch. It is also refactorized
+when the correction is numerically unreliable (near-singular capacitance
+matrix I + Δ W_S, or a residual above what a direct solve leaves), so
+mechanisms are still found and located by the factorization.
+
+Sessions hold NumPy factors and live in the API process, so they are never
+run on a process pool.
+
+Configured with environment variables:
+    FRAME_SESSION_MAX_ENTRIES  Maximum number of open sessions (default 64, least recently used evicted)
+    FRAME_SESSION_TTL          Seconds a session is kept after its last use (default 1800, 0 = forever)
+"""
+import os
+import threading
+import time
+import uuid
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from models import FrameRequest, FrameMemberUpdate
+from frame_solver import FrameSolver, FrameModelIndex
+
+try:
+    import scipy.linalg as sla
+except ImportError:  # SciPy is optional: the capacitance matrix is inverted with NumPy
+    sla = None
+
+
+# Capacitance matrices I + Δ W_S worse conditioned than this are not trusted
+# (the edit may have created a mechanism); K_ff is factorized instead
+MAX_CAPACITANCE_CONDITION = 1e8
+# S may hold at most this many DOFs, and this share of the free DOFs (but always
+# one member's six), before K_ff is factorized instead of corrected
+MAX_CORRECTION_DOF = 96
+MAX_CORRECTION_FRACTION = 0.05
+# A low-rank solution is accepted if ||K u - F|| <= RESIDUAL_FACTOR * sqrt(n) eps ||K|| ||u||
+# (infinity norms), i.e. if it is about as accurate as a direct solve
+RESIDUAL_FACTOR = 100.0
+
+
+class FrameSession:
+    """
+    A frame model with a kept factorization of K_ff, updated by member edits.
+
+    Nodes, supports and loads are fixed for the life of the session; member
+    section properties and releases are edited with update().
+    """
+
+    def __init__(self, request: FrameRequest, refactor_after: int = 20, assembly: str = "auto"):
+        """
+        Analyze the frame and keep the factor of K_ff.
+
+        Args:
+            request: Frame model (copied)
+            refactor_after: Updates applied as low-rank corrections before refactorizing
+            assembly: Assembly mode of the FrameSolver
+
+        Raises:
+            ValueError: For the PCG solver or mixed precision, or an unstable structure
+        """
+        if request.solver == "pcg":
+            raise ValueError("Frame sessions need a factorization: use the direct, banded or skyline solver")
+        if request.precision == "mixed":
+            raise ValueError("Frame sessions factorize K_ff in double precision")
+
+        self.request = request.model_copy(deep=True)
+        self.refactor_after = refactor_after
+        # Serializes updates of the session
+        self._lock = threading.Lock()
+
+        self._solver = FrameSolver(assembly)
+        self._index = FrameModelIndex(self.request)
+        self._dof_map, self._free_dofs, self._restrained_dofs = self._solver.dof_layout(self.request)
+        self._total_dof = 3 * len(self.request.nodes)
+        self._member_dofs = self._index.member_dofs()
+        # Position of every DOF in K_ff (-1 if restrained)
+        self._position = np.full(self._total_dof, -1, dtype=np.int64)
+        self._position[self._free_dofs] = np.arange(len(self._free_dofs))
+
+        self._plan = self._solver.factorization_plan(
+            self._index, len(self._free_dofs), self.request.solver, factorization_only=True
+        )
+        self._method = self._plan[0]
+
+        self._k_local, self._T, self._k_global = self._solver.member_stiffness(
+            self.request.members, self._index
+        )
+        self._factorize(self._k_global)
+        self.results = self._analyze(self.request, self._k_local, self._T, self._k_global, None)
+
+    def _factorize(self, k_global: np.ndarray):
+        """Factorize K_ff of a member stiffness stack and make it the base of later corrections."""
+        factor = None
+        if self._free_dofs:
+            factor = self._solver.factorize_free_stiffness(
+                self.request, self._index, k_global, self._free_dofs, self._plan
+            )
+
+        self._factor = factor
+        self._k_base = k_global.copy()
+        # Member rows edited since the factorization
+        self._edited = np.zeros(0, dtype=np.int64)
+        self._updates = 0
+        # K0^-1 e_j by K_ff position j, and K0^-1 F_ff of the last load matrix
+        self._columns: Dict[int, np.ndarray] = {}
+        self._base_solution: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    def update(self, edits: List[FrameMemberUpdate]) -> Dict:
+        """
+        Apply member edits and re-analyze.
+
+        The edits are applied as one update. If the analysis fails (e.g. the
+        edits create a mechanism), the session keeps its previous model.
+
+        Returns:
+            FrameSolver results, with a "session_report"
+
+        Raises:
+            ValueError: For an unknown member or an unstable structure
+        """
+        with self._lock:
+            return self._update(edits)
+
+    def _update(self, edits: List[FrameMemberUpdate]) -> Dict:
+        members = list(self.request.members)
+        rows = []
+        for edit in edits:
+            row = self._index.member_row.get(edit.id)
+            if row is None:
+                raise ValueError(f"Unknown member: {edit.id}")
+            members[row] = members[row].model_copy(update=edit.model_dump(exclude={"id"}, exclude_none=True))
+            rows.append(row)
+        rows = np.unique(rows)
+        request = self.request.model_copy(update={"members": members})
+
+        k_local, T, k_global = self._k_local.copy(), self._T.copy(), self._k_global.copy()
+        k_local[rows], T[rows], k_global[rows] = self._solver.member_stiffness(
+            [members[row] for row in rows], self._index, rows
+        )
+
+        edited = np.union1d(self._edited, rows)
+        results = None
+        if self._updates < self.refactor_after and len(self._correction_dofs(edited)) <= self._max_rank():
+            results = self._analyze(request, k_local, T, k_global, edited)
+        if results is None:
+            # Raises (leaving the session unchanged) if the edited frame is unstable
+            self._factorize(k_global)
+            results = self._analyze(request, k_local, T, k_global, None)
+        else:
+            self._edited = edited
+            self._updates += 1
+
+        self.request = request
+        self._index.request = request
+        self._k_local, self._T, self._k_global = k_local, T, k_global
+        self.results = results
+        return results
+
+    def _analyze(self, request: FrameRequest, k_local: np.ndarray, T: np.ndarray, k_global: np.ndarray,
+                 edited: Optional[np.ndarray]) -> Optional[Dict]:
+        """
+        FrameSolver results of the session's frame with the given member stiffness.
+
+        Args:
+            edited: Member rows edited since the factorization, to solve by a
+                low-rank correction; None to solve with the current factor alone
+
+        Returns:
+            The results, or None if the low-rank correction is not reliable
+        """
+        load_sets, F_global, member_fixed_actions = self._solver.assemble_loads(
+            request, self._index, self._dof_map, T, self._total_dof
+        )
+        u_total = np.zeros((self._total_dof, len(load_sets)))
+        rank = 0
+        if self._free_dofs:
+            F_ff = F_global[self._free_dofs]
+            if edited is None:
+                u_total[self._free_dofs] = self._factor.solve(F_ff)
+            else:
+                u_ff, rank = self._low_rank_solve(k_global, edited, F_ff)
+                if u_ff is None:
+                    return None
+                u_total[self._free_dofs] = u_ff
+
+        # Reactions, and the residual K u - F at the free DOFs
+        residual = self._stiffness_product(k_global, u_total) - F_global
+        if edited is not None and not self._accurate(k_global, residual[self._free_dofs], u_total):
+            return None
+        reactions = residual if self._restrained_dofs else np.zeros_like(residual)
+
+        results = self._solver.collect_results(
+            request, self._index, self._dof_map, load_sets, member_fixed_actions,
+            u_total, reactions, k_local, T, {"method": self._method}
+        )
+        results["session_report"] = {
+            "update": "factorization" if edited is None else "low_rank",
+            "rank": rank,
+            "updates_since_factorization": self._updates + (edited is not None)
+        }
+        return results
+
+    def _low_rank_solve(self, k_global: np.ndarray, edited: np.ndarray, F_ff: np.ndarray):
+        """
+        Solve K_ff u = F_ff with the base factor and a Sherman-Morrison-Woodbury correction.
+
+        Returns:
+            (u_ff or None if the capacitance matrix is near-singular, size of S)
+        """
+        positions = self._position[self._member_dofs[edited]]
+        S = self._correction_dofs(edited)
+        X = self._solve_base(F_ff)
+        if not len(S):
+            return X, 0
+
+        # Δ on S, summed over the edited members
+        free = positions >= 0
+        pairs = free[:, :, None] & free[:, None, :]
+        local = np.searchsorted(S, positions)
+        delta = np.zeros((len(S), len(S)))
+        np.add.at(
+            delta,
+            (np.broadcast_to(local[:, :, None], pairs.shape)[pairs],
+             np.broadcast_to(local[:, None, :], pairs.shape)[pairs]),
+            (k_global[edited] - self._k_base[edited])[pairs]
+        )
+
+        W = self._solve_columns(S)
+        solve_capacitance = _conditioned_solver(np.eye(len(S)) + delta @ W[S])
+        if solve_capacitance is None:
+            return None, len(S)
+        return X - W @ solve_capacitance(delta @ X[S]), len(S)
+
+    def _correction_dofs(self, edited: np.ndarray) -> np.ndarray:
+        """S: the K_ff positions of the free DOFs of the edited members."""
+        positions = self._position[self._member_dofs[edited]]
+        return np.unique(positions[positions >= 0])
+
+    def _max_rank(self) -> int:
+        """Largest S corrected at low rank rather than refactorized."""
+        return max(6, min(MAX_CORRECTION_DOF, int(MAX_CORRECTION_FRACTION * len(self._free_dofs))))
+
+    def _solve_base(self, F_ff: np.ndarray) -> np.ndarray:
+        """K0^-1 F_ff, reused while the loads are unchanged (they change only with FEA releases)."""
+        if self._base_solution is None or not np.array_equal(self._base_solution[0], F_ff):
+            self._base_solution = (F_ff, self._factor.solve(F_ff))
+        return self._base_solution[1]
+
+    def _solve_columns(self, S: np.ndarray) -> np.ndarray:
+        """W = K0^-1 E_S, solving only for the positions not seen since the factorization."""
+        missing = [j for j in S.tolist() if j not in self._columns]
+        if missing:
+            E = np.zeros((len(self._free_dofs), len(missing)))
+            E[missing, np.arange(len(missing))] = 1.0
+            for j, column in zip(missing, self._factor.solve(E).T):
+                self._columns[j] = column
+        return np.column_stack([self._columns[j] for j in S.tolist()])
+
+    def _stiffness_product(self, k_global: np.ndarray, u: np.ndarray) -> np.ndarray:
+        """[K] u from the member stiffness stack (the session keeps no assembled K)."""
+        forces = k_global @ u[self._member_dofs]
+        dofs = self._member_dofs.ravel()
+        return np.column_stack([
+            np.bincount(dofs, forces[:, :, col].ravel(), minlength=self._total_dof)
+            for col in range(u.shape[1])
+        ])
+
+    def _accurate(self, k_global: np.ndarray, residual: np.ndarray, u: np.ndarray) -> bool:
+        """Whether every column's residual is at the level of a backward-stable direct solve."""
+        if not np.all(np.isfinite(u)):
+            return False
+        # Largest absolute row sum of K (an upper bound: members are summed separately)
+        norm = np.bincount(
+            self._member_dofs.ravel(), np.abs(k_global).sum(axis=2).ravel(), minlength=self._total_dof
+        ).max(initial=0.0)
+        threshold = RESIDUAL_FACTOR * np.sqrt(len(self._free_dofs)) * np.finfo(float).eps * norm
+        return bool(np.all(np.abs(residual).max(axis=0) <= threshold * np.abs(u).max(axis=0)))
+
+
+def _conditioned_solver(A: np.ndarray):
+    """
+    Solver of A x = b, or None if A is worse conditioned than MAX_CAPACITANCE_CONDITION.
+
+    The 1-norm condition number is estimated from the LU factors (LAPACK
+    gecon) rather than computed by an SVD; without SciPy A is small enough
+    (see MAX_CORRECTION_DOF) to invert explicitly.
+    """
+    norm = np.abs(A).sum(axis=0).max()
+    if sla is not None:
+        lu, piv = sla.lu_factor(A, check_finite=False)
+        rcond, info = sla.lapack.dgecon(lu, norm, norm="1")
+        if info != 0 or not rcond * MAX_CAPACITANCE_CONDITION >= 1.0:
+            return None
+        return lambda b: sla.lu_solve((lu, piv), b, check_finite=False)
+
+    try:
+        inverse = np.linalg.inv(A)
+    except np.linalg.LinAlgError:
+        return None
+    if not norm * np.abs(inverse).sum(axis=0).max() <= MAX_CAPACITANCE_CONDITION:
+        return None
+    return lambda b: inverse @ b
+
+
+class FrameSessionStore:
+    """Thread-safe store of open frame sessions with an entry limit (LRU) and an idle TTL."""
+
+    def __init__(self, max_entries: int = 64, ttl: Optional[float] = 1800):
+        self.max_entries = max_entries
+        self.ttl = ttl or None
+        # session id -> (last used, session), least recently used first
+        self._sessions: "OrderedDict[str, Tuple[float, FrameSession]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    @classmethod
+    def from_env(cls) -> "FrameSessionStore":
+        return cls(
+            max_entries=int(os.environ.get("FRAME_SESSION_MAX_ENTRIES", "64")),
+            ttl=float(os.environ.get("FRAME_SESSION_TTL", "1800"))
+        )
+
+    def add(self, session: FrameSession) -> str:
+        """Store a session and return its new id."""
+        if self.max_entries <= 0:
+            raise ValueError("Frame sessions are disabled")
+
+        session_id = uuid.uuid4().hex
+        with self._lock:
+            self._sessions[session_id] = (time.monotonic(), session)
+            while len(self._sessions) > self.max_entries:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+        return session_id
+
+    def get(self, session_id: str) -> Optional[FrameSession]:
+        """The session with this id, or None if it does not exist or has expired."""
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            now = time.monotonic()
+            if self.ttl is not None and now - entry[0] > self.ttl:
+                del self._sessions[session_id]
+                self.expirations += 1
+                return None
+            self._sessions[session_id] = (now, entry[1])
+            self._sessions.move_to_end(session_id)
+            return entry[1]
+
+    def remove(self, session_id: str) -> bool:
+        """Close a session; False if it did not exist."""
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
+
+
+# Sessions of the API process
+frame_sessions = FrameSessionStore.from_env()
@@ -1,88 +1,233 @@
-
 import numpy as np
 import math
-from typing import List, Dict, Tuple
-from models import FrameRequest, FrameNode, FrameMember, FramePointLoad, FrameUniformLoad, DiagramData
+from typing import List, Dict, Optional, Tuple
+from models import FrameRequest, FramePCGSettings, FrameNode, FrameMember, FramePointLoad, FrameUniformLoad, DiagramData
+from stiffness_solvers import (
+    factorize_stiffness, BandedCholeskyFactor, SkylineLDLFactor, RefinedFactor, TripletMatrix,
+    StructureUnstableError, RefinementNotConvergedError
+)
+from iterative_solvers import ConjugateGradientSolver
+from reordering import reverse_cuthill_mckee, dof_permutation, envelope_size
+from load_combinations import LoadCombinationEvaluator
 
+try:
+    import scipy.sparse as sp
+except ImportError:  # SciPy is optional: without it every model is assembled densely
+    sp = None
+
+
+# Models with at least this many DOFs are assembled sparsely in "auto" mode
+SPARSE_ASSEMBLY_MIN_DOF = 300
+# With SciPy, the "auto" solver factorizes models with at least this many free DOFs banded
+# (LAPACK, after RCM) ...
+BANDED_MIN_DOF = 150
+# ... unless the renumbered half-bandwidth exceeds this fraction of the DOFs
+BANDED_MAX_BANDWIDTH_RATIO = 0.2
+# Without SciPy, it uses the NumPy skyline LDL^T from this many free DOFs ...
+SKYLINE_MIN_DOF = 1000
+# ... if the renumbered profile is at most this fraction of the full upper triangle
+SKYLINE_MAX_PROFILE_RATIO = 0.1
+# From this many free DOFs "auto" solves by preconditioned conjugate gradients,
+# whose memory grows linearly with the model instead of with the factor's fill-in
+PCG_MIN_DOF = 100000
+
+class FrameLoadSet:
+    """Loads of one load case grouped by target node / member id."""
+    
+    def __init__(self, request: FrameRequest, point_loads: List[FramePointLoad],
+                 uniform_loads: List[FrameUniformLoad]):
+        # Loads on unknown ids are ignored, as before
+        self.node_loads: Dict[str, List[FramePointLoad]] = {node.id: [] for node in request.nodes}
+        self.member_point_loads: Dict[str, List[FramePointLoad]] = {m.id: [] for m in request.members}
+        self.member_uniform_loads: Dict[str, List[FrameUniformLoad]] = {m.id: [] for m in request.members}
+        
+        for pl in point_loads:
+            if pl.type == "NODE_LOAD":
+                if pl.target_id in self.node_loads:
+                    self.node_loads[pl.target_id].append(pl)
+            elif pl.target_id in self.member_point_loads:
+                self.member_point_loads[pl.target_id].append(pl)
+        
+        for ul in uniform_loads:
+            if ul.member_id in self.member_uniform_loads:
+                self.member_uniform_loads[ul.member_id].append(ul)
+    
+    def member_loads(self, member_id: str) -> List:
+        """All span loads of a member (point loads first, then UDLs)."""
+        return self.member_point_loads[member_id] + self.member_uniform_loads[member_id]
+
+
+class FrameModelIndex:
+    """
+    Lookup tables for a FrameRequest, built once per solve.
+    
+    Maps node id -> row, member id -> row and member id -> loads (per load
+    case) so that geometry and load gathering are O(1) per member instead
+    of rescanning the node and load lists.
+    """
+    
+    def __init__(self, request: FrameRequest):
+        self.request = request
+        self.node_row: Dict[str, int] = {node.id: i for i, node in enumerate(request.nodes)}
+        self.member_row: Dict[str, int] = {member.id: i for i, member in enumerate(request.members)}
+        self.node_coords = np.array([(n.x, n.y) for n in request.nodes], dtype=float).reshape(-1, 2)
+        
+        # (start row, end row) of every member
+        self.member_nodes = np.array(
+            [(self.node_row[m.start_node_id], self.node_row[m.end_node_id]) for m in request.members],
+            dtype=np.int64
+        ).reshape(-1, 2)
+        
+        # Loads of the base request and of each named load case, grouped by target
+        self.loads = FrameLoadSet(request, request.point_loads, request.uniform_loads)
+        self.case_loads = [
+            FrameLoadSet(request, case.point_loads, case.uniform_loads) for case in request.load_cases
+        ]
+    
+    def member_dofs(self) -> np.ndarray:
+        """Global DOF indices of every member as an (n_members, 6) array."""
+        return (3 * self.member_nodes[:, :, None] + np.arange(3)).reshape(-1, 6)
 
-import numpy as np
-import math
-from typing import List, Dict, Tuple
-from models import FrameRequest, FrameNode, FrameMember, FramePointLoad, FrameUniformLoad, DiagramData
 
 class FrameSolver:
+    def __init__(self, assembly: str = "auto"):
+        """
+        Args:
+            assembly: "dense", "sparse" (CSR, requires SciPy) or "auto", which
+                picks sparse for models with SPARSE_ASSEMBLY_MIN_DOF or more DOFs
+        """
+        if assembly not in ("dense", "sparse", "auto"):
+            raise ValueError(f"Unknown assembly mode: {assembly}")
+        if assembly == "sparse" and sp is None:
+            raise ValueError("Sparse assembly requires SciPy to be installed")
+        self.assembly = assembly
+
     def solve(self, request: FrameRequest):
-        # 1. Setup degrees of freedom (DOF)
+        # 1. Setup degrees of freedom (DOF) and lookup indexes
+        index = FrameModelIndex(request)
         node_dof_map = self._map_dofs(request.nodes)
         total_dof = 3 * len(request.nodes)
         
         # 2. Assemble Global Stiffness Matrix [K]
-        K_global = np.zeros((total_dof, total_dof))
+        # Local stiffness, transformation and T^T k T for every member as (n_members, 6, 6) stacks
+        k_local, T_members, k_global = self._calculate_member_stiffness_batch(request.members, index)
         
-        for member in request.members:
-            k_global_member = self._calculate_member_global_stiffness(member, request.nodes)
-            
-            # Add to system matrix (Scatter)
-            start_dofs = node_dof_map[member.start_node_id]
-            end_dofs = node_dof_map[member.end_node_id]
-            member_dofs = start_dofs + end_dofs 
-            
-            for i in range(6):
-                for j in range(6):
-                    row = member_dofs[i]
-                    col = member_dofs[j]
-                    K_global[row, col] += k_global_member[i, j]
+        # The factorization is chosen up front: band and profile factors read K
+        # from triplets, so without SciPy no dense K is needed for them
+        if request.precision == "mixed" and request.solver == "pcg":
+            raise ValueError("Mixed precision applies to the direct, banded and skyline solvers")
+        num_free = sum((not n.fix_x) + (not n.fix_y) + (not n.fix_r) for n in request.nodes)
+        method, node_order = self._choose_factorization(
+            index, num_free, request.solver, factorization_only=request.precision == "mixed"
+        )
+        storage = self._storage(total_dof, method)
+        K_global = self._assemble_global_stiffness(index, total_dof, k_global, storage)
                     
-        # 3. Assemble Load Vector {F}
-        F_global = np.zeros(total_dof)
+        # 3. Assemble Load Vectors {F}, one column per load case
+        load_sets, F_global, member_fixed_actions = self.assemble_loads(
+            request, index, node_dof_map, T_members, total_dof
+        )
         
-        # 3a. Apply Nodal Loads directly
-        for pl in request.point_loads:
-            if pl.type == "NODE_LOAD":
-                if pl.target_id in node_dof_map:
-                    dofs = node_dof_map[pl.target_id]
-                    F_global[dofs[0]] += pl.magnitude_x
-                    F_global[dofs[1]] += pl.magnitude_y
-                    F_global[dofs[2]] += pl.moment
+        # 4. Apply Boundary Conditions
+        free_dofs, restrained_dofs = self._split_dofs(request, node_dof_map)
+            
+        # 5. Solve for Displacements
+        # K_ff is factorized once and every load case is back-substituted as one RHS matrix
+        # (or iterated as one block by PCG). The factorization pivots double as the
+        # stability check (mechanism detection).
+        u_total = np.zeros((total_dof, len(load_sets)))
+        solver_report = {"method": method}
         
-        # 3b. Handle Member Loads (Equivalent Nodal Loads)
-        # We calculate Fixed End Actions (FEA) and SUBTRACT them from F_global (Action -> Reaction)
-        # Note: F_global = F_nodal - R_fixed_end
+        if free_dofs:
+            K_ff = self._free_stiffness(K_global, free_dofs, storage)
+            
+            try:
+                if method == "pcg":
+                    initial = self._initial_displacements(request, free_dofs, len(load_sets))
+                    pcg = self._pcg_solver(K_ff, free_dofs, node_order, request.pcg)
+                    u_total[free_dofs] = pcg.solve(F_global[free_dofs], initial)
+                    solver_report.update(iterations=max(pcg.iterations), residual=max(pcg.residuals))
+                elif request.precision == "mixed":
+                    u_total[free_dofs], solver_report = self._mixed_precision_solve(
+                        K_ff, F_global[free_dofs], free_dofs, method, node_order
+                    )
+                else:
+                    factor = self._factorize(K_ff, free_dofs, method, node_order)
+                    u_total[free_dofs] = factor.solve(F_global[free_dofs])
+            except StructureUnstableError as e:
+                raise self._mechanism_error(e, request, free_dofs) from None
         
+        # 6. Post-Processing: Reactions and Forces
+        reactions = np.zeros((total_dof, len(load_sets)))
+        if restrained_dofs:
+            # R = K_total * u - F_applied (excluding reactions)
+            # More robustly: R = K_row * u - F_row
+            # F_row here must include the nodal loads and FEA contributions
+            reactions = K_global @ u_total - F_global
         
-        member_fixed_actions = {} # Store for post-processing: member_id -> np.array(6) local
+        return self.collect_results(
+            request, index, node_dof_map, load_sets, member_fixed_actions,
+            u_total, reactions, k_local, T_members, solver_report
+        )
+    
+    # Steps of solve() that FrameSession reuses to keep and update a factorization
+
+    def dof_layout(self, request: FrameRequest) -> Tuple[Dict[str, List[int]], List[int], List[int]]:
+        """(node id -> its three global DOFs, free DOFs, restrained DOFs) of a frame."""
+        node_dof_map = self._map_dofs(request.nodes)
+        return (node_dof_map, *self._split_dofs(request, node_dof_map))
+
+    def member_stiffness(self, members: List[FrameMember], index: FrameModelIndex, rows=None):
+        """(k_local, T, k_global) stacks of the members (see _calculate_member_stiffness_batch)."""
+        return self._calculate_member_stiffness_batch(members, index, rows)
+
+    def factorization_plan(self, index: FrameModelIndex, num_free: int, method: str,
+                           factorization_only: bool = False) -> Tuple[str, Optional[np.ndarray], str]:
+        """(method, node order, storage of [K]) of a K_ff solver (see _choose_factorization)."""
+        method, node_order = self._choose_factorization(index, num_free, method, factorization_only)
+        return method, node_order, self._storage(3 * len(index.node_row), method)
+
+    def factorize_free_stiffness(self, request: FrameRequest, index: FrameModelIndex, k_global: np.ndarray,
+                                 free_dofs: List[int], plan: Tuple[str, Optional[np.ndarray], str]):
+        """
+        Assemble [K] from a member stiffness stack and factorize its K_ff.
+
+        Args:
+            plan: Result of factorization_plan (a factorizing method, not "pcg")
+
+        Raises:
+            StructureUnstableError: Naming the mechanism's nodes and directions
+        """
+        method, node_order, storage = plan
+        K_global = self._assemble_global_stiffness(index, 3 * len(request.nodes), k_global, storage)
+        K_ff = self._free_stiffness(K_global, free_dofs, storage)
+        try:
+            return self._factorize(K_ff, free_dofs, method, node_order)
+        except StructureUnstableError as e:
+            raise self._mechanism_error(e, request, free_dofs) from None
+
+    def assemble_loads(self, request: FrameRequest, index: FrameModelIndex,
+                        node_dof_map: Dict[str, List[int]], T_members: np.ndarray, total_dof: int):
+        """
+        Load vectors of the base loads and every named load case.
         
-        for member in request.members:
-            # Gather all loads on this member
-            member_loads = []
-            # Point loads on member
-            for pl in request.point_loads:
-                if pl.type == "MEMBER_POINT_LOAD" and pl.target_id == member.id:
-                    member_loads.append(pl)
-            # Uniform loads on member
-            for ul in request.uniform_loads:
-                if ul.member_id == member.id:
-                    member_loads.append(ul)
-            
-            if member_loads:
-                # Calculate FEA in Local System
-                fea_local = self._calculate_member_fea(member, member_loads, request.nodes)
-                member_fixed_actions[member.id] = fea_local
-                
-                # Transform to Global
-                T = self._get_transformation_matrix(member, request.nodes)
-                fea_global = T.T @ fea_local
-                
-                # Subtract from Global Force Vector
-                start_dofs = node_dof_map[member.start_node_id]
-                end_dofs = node_dof_map[member.end_node_id]
-                indices = start_dofs + end_dofs
-                
-                for i in range(6):
-                    dof_idx = indices[i]
-                    F_global[dof_idx] -= fea_global[i]
+        Returns:
+            (load sets, {F} with one column per load set, per load set: member_id -> local FEA)
+        """
+        # Column 0 holds the request's own loads, followed by each named load case
+        load_sets = [index.loads] + index.case_loads
+        F_global = np.zeros((total_dof, len(load_sets)))
+        member_fixed_actions = [] # Per load set: member_id -> np.array(6) local
         
-        # 4. Apply Boundary Conditions
+        for col, loads in enumerate(load_sets):
+            F_global[:, col], fixed_actions = self._assemble_load_vector(
+                request, loads, index, node_dof_map, T_members, total_dof
+            )
+            member_fixed_actions.append(fixed_actions)
+        return load_sets, F_global, member_fixed_actions
+    
+    def _split_dofs(self, request: FrameRequest, node_dof_map: Dict[str, List[int]]):
+        """(free DOFs, restrained DOFs) in node order."""
         free_dofs = []
         restrained_dofs = []
         
@@ -96,52 +241,268 @@ class FrameSolver:
             
             if not node.fix_r: free_dofs.append(dofs[2])
             else: restrained_dofs.append(dofs[2])
+        return free_dofs, restrained_dofs
+    
+    def collect_results(self, request: FrameRequest, index: FrameModelIndex, node_dof_map: Dict,
+                         load_sets: List[FrameLoadSet], member_fixed_actions: List[Dict],
+                         u_total: np.ndarray, reactions: np.ndarray, k_local: np.ndarray,
+                         T_members: np.ndarray, solver_report: Dict) -> Dict:
+        """Member forces of every load set, named case results and load combinations."""
+        case_results = []
+        for col, loads in enumerate(load_sets):
+            member_results = []
+            for m_idx, member in enumerate(request.members):
+                # Get FEA if exists, else zero
+                fea_local = member_fixed_actions[col].get(member.id, np.zeros(6))
+                result = self._calculate_member_forces(member, index, loads, node_dof_map, u_total[:, col], fea_local,
+                                                       k_local[m_idx], T_members[m_idx])
+                member_results.append(result)
             
-        # 5. Solve for Displacements
-        # if not free_dofs:
-        #    raise ValueError("Structure is fully restrained")
-        
-        if free_dofs:    
-            K_ff = K_global[np.ix_(free_dofs, free_dofs)]
-            F_f = F_global[free_dofs]
-            
-            # Stability Check
-            det = np.linalg.det(K_ff) if K_ff.shape[0] < 100 else 1.0 
-            # (Determinant check is expensive for large matrices, but useful for small ones)
-            
-            try:
-                u_free = np.linalg.solve(K_ff, F_f)
-            except np.linalg.LinAlgError:
-                raise ValueError("Structure is unstable (singular stiffness matrix)")
-        else:
-            u_free = np.array([])
+            case_results.append({
+                "displacements": u_total[:, col].tolist(),
+                "reactions": reactions[:, col].tolist(),
+                "member_results": member_results
+            })
             
-        u_total = np.zeros(total_dof)
-        if free_dofs:
-            u_total[free_dofs] = u_free
+        named_case_results = [
+            {"name": case.name, **result}
+            for case, result in zip(request.load_cases, case_results[1:])
+        ]
         
-        # 6. Post-Processing: Reactions and Forces
-        reactions = np.zeros(total_dof)
-        if restrained_dofs:
-            # R = K_total * u - F_applied (excluding reactions)
-            # More robustly: R = K_row * u - F_row
-            # F_row here must include the nodal loads and FEA contributions
-            reactions = K_global @ u_total - F_global
-            
-        member_results = []
-        for member in request.members:
-            # Get FEA if exists, else zero
-            fea_local = member_fixed_actions.get(member.id, np.zeros(6))
-            result = self._calculate_member_forces(member, request.nodes, node_dof_map, u_total, fea_local, request)
-            member_results.append(result)
+        # 7. Load Combinations by superposition of the named cases (no further solves)
+        combination_results = []
+        envelope = None
+        if named_case_results:
+            evaluator = LoadCombinationEvaluator(named_case_results)
+            combination_results = evaluator.evaluate(request.combinations)
+            envelope = evaluator.envelope(request.combinations)
+        elif request.combinations:
+            raise ValueError("Load combinations require at least one named load case")
             
         return {
             "success": True,
-            "displacements": u_total.tolist(),
-            "reactions": reactions.tolist(),
-            "member_results": member_results
+            **case_results[0],
+            "case_results": named_case_results,
+            "combination_results": combination_results,
+            "envelope": envelope,
+            "solver_report": solver_report
         }
     
+    def _choose_factorization(self, index: FrameModelIndex, num_free: int, method: str,
+                              factorization_only: bool = False):
+        """
+        Resolve the requested K_ff solver.
+        
+        "banded" and "skyline" renumber the nodes by reverse Cuthill-McKee
+        over the member graph and factorize in that order, in band or profile
+        storage; "direct" uses the dense Cholesky or sparse LU matching the
+        assembly; "pcg" iterates, with the incomplete Cholesky factor in RCM
+        order. "auto" uses PCG from PCG_MIN_DOF free DOFs unless
+        factorization_only (mixed precision and model sessions need a factor
+        of K_ff). Below that it estimates the renumbered bandwidth and profile
+        from the member graph: with SciPy it picks LAPACK's banded Cholesky
+        for narrow bands, without SciPy the skyline solver for small
+        profiles, and the direct factor otherwise.
+        
+        Returns:
+            (method, node order or None for "direct")
+        """
+        if method not in ("auto", "direct", "banded", "skyline", "pcg"):
+            raise ValueError(f"Unknown solver: {method}")
+        if method == "direct" or (method == "auto" and num_free < min(BANDED_MIN_DOF, SKYLINE_MIN_DOF)):
+            return "direct", None
+        
+        node_order = reverse_cuthill_mckee(len(index.node_row), index.member_nodes)
+        if method == "auto" and num_free >= PCG_MIN_DOF and not factorization_only:
+            method = "pcg"
+        elif method == "auto":
+            bandwidth, profile = envelope_size(node_order, index.member_nodes)
+            total = 3 * len(index.node_row)
+            if sp is not None and num_free >= BANDED_MIN_DOF and bandwidth <= BANDED_MAX_BANDWIDTH_RATIO * total:
+                method = "banded"
+            elif (sp is None and num_free >= SKYLINE_MIN_DOF
+                  and profile <= SKYLINE_MAX_PROFILE_RATIO * total * (total + 1) / 2):
+                method = "skyline"
+            else:
+                return "direct", None
+        return method, node_order
+    
+    def _factorize(self, K_ff, free_dofs: List[int], method: str, node_order: np.ndarray,
+                   dtype=np.float64):
+        """Factorize K_ff by a method from _choose_factorization, in the given precision."""
+        if method == "direct":
+            return factorize_stiffness(K_ff, dtype)
+        
+        permutation = dof_permutation(node_order, free_dofs)
+        if method == "banded":
+            return BandedCholeskyFactor(K_ff, permutation, dtype)
+        return SkylineLDLFactor(K_ff, permutation, dtype)
+    
+    def _mixed_precision_solve(self, K_ff, F_ff: np.ndarray, free_dofs: List[int], method: str,
+                               node_order: np.ndarray):
+        """
+        Solve with a float32 factor and float64 iterative refinement.
+        
+        If the float32 factor is near-singular or refinement stalls (K_ff too
+        ill-conditioned for single precision), the solve is redone with the
+        float64 factor, which also locates mechanisms.
+        
+        Returns:
+            (u_ff, solver report)
+        """
+        try:
+            factor = RefinedFactor(
+                K_ff, lambda K, dtype: self._factorize(K, free_dofs, method, node_order, dtype)
+            )
+            u_ff = factor.solve(F_ff)
+            return u_ff, {
+                "method": method, "precision": "mixed",
+                "iterations": max(factor.steps), "residual": max(factor.residuals)
+            }
+        except (StructureUnstableError, RefinementNotConvergedError):
+            factor = self._factorize(K_ff, free_dofs, method, node_order)
+            return factor.solve(F_ff), {"method": method, "precision": "double"}
+    
+    def _pcg_solver(self, K_ff, free_dofs: List[int], node_order: np.ndarray,
+                    settings: FramePCGSettings) -> ConjugateGradientSolver:
+        """Preconditioned conjugate gradient solver of K_ff with the request's settings."""
+        return ConjugateGradientSolver(
+            K_ff,
+            preconditioner=settings.preconditioner,
+            permutation=dof_permutation(node_order, free_dofs),
+            tolerance=settings.tolerance,
+            max_iterations=settings.max_iterations
+        )
+    
+    def _initial_displacements(self, request: FrameRequest, free_dofs: List[int], num_cases: int):
+        """PCG starting guess: the supplied displacements for the base loads, zero for the load cases."""
+        supplied = request.pcg.initial_displacements
+        if supplied is None:
+            return None
+        if len(supplied) != 3 * len(request.nodes):
+            raise ValueError(
+                f"initialDisplacements must have 3 values per node ({3 * len(request.nodes)}), got {len(supplied)}"
+            )
+        initial = np.zeros((len(free_dofs), num_cases))
+        initial[:, 0] = np.asarray(supplied, dtype=float)[free_dofs]
+        return initial
+    
+    def _mechanism_error(self, error: StructureUnstableError, request: FrameRequest,
+                         free_dofs: List[int]) -> StructureUnstableError:
+        """Translate K_ff-local mechanism DOFs into node ids and directions."""
+        if not error.dofs:
+            return error
+        
+        directions = ("x", "y", "rotation")
+        global_dofs = [free_dofs[d] for d in error.dofs]
+        locations = [
+            f"node {request.nodes[dof // 3].id} ({directions[dof % 3]})" for dof in global_dofs
+        ]
+        return StructureUnstableError(
+            global_dofs,
+            f"Structure is unstable: mechanism at {', '.join(locations)}"
+        )
+
+    def _assemble_load_vector(self, request: FrameRequest, loads: FrameLoadSet, index: FrameModelIndex,
+                              node_dof_map: Dict[str, List[int]], T_members: np.ndarray, total_dof: int):
+        """
+        Build {F} for one load case.
+        
+        Returns:
+            Tuple of (F_global, member_fixed_actions) where member_fixed_actions
+            maps member_id -> local FEA vector for post-processing
+        """
+        F_global = np.zeros(total_dof)
+        
+        # Apply Nodal Loads directly
+        for node_id, node_loads in loads.node_loads.items():
+            dofs = node_dof_map[node_id]
+            for pl in node_loads:
+                F_global[dofs[0]] += pl.magnitude_x
+                F_global[dofs[1]] += pl.magnitude_y
+                F_global[dofs[2]] += pl.moment
+        
+        # Handle Member Loads (Equivalent Nodal Loads)
+        # We calculate Fixed End Actions (FEA) and SUBTRACT them from F_global (Action -> Reaction)
+        # Note: F_global = F_nodal - R_fixed_end
+        member_fixed_actions = {}
+        
+        for m_idx, member in enumerate(request.members):
+            # Gather all loads on this member
+            member_loads = loads.member_loads(member.id)
+            
+            if member_loads:
+                # Calculate FEA in Local System
+                fea_local = self._calculate_member_fea(member, member_loads, index)
+                member_fixed_actions[member.id] = fea_local
+                
+                # Transform to Global
+                fea_global = T_members[m_idx].T @ fea_local
+                
+                # Subtract from Global Force Vector
+                start_dofs = node_dof_map[member.start_node_id]
+                end_dofs = node_dof_map[member.end_node_id]
+                indices = start_dofs + end_dofs
+                
+                for i in range(6):
+                    dof_idx = indices[i]
+                    F_global[dof_idx] -= fea_global[i]
+        
+        return F_global, member_fixed_actions
+
+    def _use_sparse(self, total_dof: int) -> bool:
+        if self.assembly == "auto":
+            return sp is not None and total_dof >= SPARSE_ASSEMBLY_MIN_DOF
+        return self.assembly == "sparse"
+
+    def _storage(self, total_dof: int, method: str) -> str:
+        """Storage of [K] for the assembly mode and a method from _choose_factorization."""
+        if self._use_sparse(total_dof):
+            return "sparse"
+        if method in ("banded", "skyline", "pcg"):
+            return "triplets"
+        # Without SciPy, large models solved "direct" are factorized in skyline
+        # storage (see factorize_stiffness) rather than as a dense n x n K
+        if sp is None and self.assembly == "auto" and total_dof >= SPARSE_ASSEMBLY_MIN_DOF:
+            return "triplets"
+        return "dense"
+
+    def _free_stiffness(self, K_global, free_dofs: List[int], storage: str):
+        """K_ff of [K] in the same storage."""
+        if storage == "sparse":
+            return K_global[free_dofs][:, free_dofs]
+        if storage == "triplets":
+            return K_global.submatrix(free_dofs)
+        return K_global[np.ix_(free_dofs, free_dofs)]
+
+    def _assemble_global_stiffness(self, index: FrameModelIndex, total_dof: int,
+                                   k_members: np.ndarray, storage: str):
+        """
+        Assemble [K] from COO triplets of every member at once.
+        
+        Each member contributes its 6x6 global stiffness at the 36 (row, col)
+        pairs of its DOFs. Duplicate pairs (shared nodes) are summed, either
+        by the COO -> CSR conversion, by np.add.at for the dense matrix, or
+        by the band/profile factor reading a TripletMatrix.
+        
+        Args:
+            storage: "dense", "sparse" (CSR) or "triplets"
+        """
+        member_dofs = index.member_dofs()
+        
+        rows = np.repeat(member_dofs, 6, axis=1).ravel()
+        cols = np.tile(member_dofs, (1, 6)).ravel()
+        vals = k_members.ravel()
+        
+        if storage == "sparse":
+            return sp.coo_matrix((vals, (rows, cols)), shape=(total_dof, total_dof)).tocsr()
+        if storage == "triplets":
+            return TripletMatrix(rows, cols, vals, total_dof)
+        
+        K_global = np.zeros((total_dof, total_dof))
+        np.add.at(K_global, (rows, cols), vals)
+        return K_global
+
     def _map_dofs(self, nodes: List[FrameNode]) -> Dict[str, List[int]]:
         mapping = {}
         for i, node in enumerate(nodes):
@@ -149,118 +510,94 @@ class FrameSolver:
             mapping[node.id] = [start, start + 1, start + 2]
         return mapping
 
-    def _get_geometry(self, member: FrameMember, nodes: List[FrameNode]):
-        start = next(n for n in nodes if n.id == member.start_node_id)
-        end = next(n for n in nodes if n.id == member.end_node_id)
-        dx = end.x - start.x
-        dy = end.y - start.y
+    def _get_geometry(self, member: FrameMember, index: FrameModelIndex):
+        start_x, start_y = index.node_coords[index.node_row[member.start_node_id]]
+        end_x, end_y = index.node_coords[index.node_row[member.end_node_id]]
+        dx = float(end_x - start_x)
+        dy = float(end_y - start_y)
         L = math.sqrt(dx**2 + dy**2)
         return L, dx, dy
 
-    def _get_transformation_matrix(self, member: FrameMember, nodes: List[FrameNode]):
-        L, dx, dy = self._get_geometry(member, nodes)
-        c = dx / L
-        s = dy / L
-        
-        T = np.zeros((6, 6))
-        sub_T = np.array([[c, s, 0], [-s, c, 0], [0, 0, 1]])
-        T[0:3, 0:3] = sub_T
-        T[3:6, 3:6] = sub_T
+    def _get_member_geometry_arrays(self, index: FrameModelIndex, rows=None):
+        """Lengths and direction cosines (c, s) of every member (or the members at rows) as arrays."""
+        member_nodes = index.member_nodes if rows is None else index.member_nodes[rows]
+        start = index.node_coords[member_nodes[:, 0]]
+        end = index.node_coords[member_nodes[:, 1]]
+        d = end - start
+        L = np.hypot(d[:, 0], d[:, 1])
+        return L, d[:, 0] / L, d[:, 1] / L
+
+    def _get_transformation_batch(self, c: np.ndarray, s: np.ndarray) -> np.ndarray:
+        """Stack of 6x6 global -> local transformation matrices."""
+        T = np.zeros((len(c), 6, 6))
+        for offset in (0, 3):
+            T[:, offset, offset] = c
+            T[:, offset, offset + 1] = s
+            T[:, offset + 1, offset] = -s
+            T[:, offset + 1, offset + 1] = c
+            T[:, offset + 2, offset + 2] = 1.0
         return T
 
-    def _calculate_member_global_stiffness(self, member: FrameMember, nodes: List[FrameNode]):
-        L, dx, dy = self._get_geometry(member, nodes)
+    def _calculate_member_stiffness_batch(self, members: List[FrameMember], index: FrameModelIndex,
+                                          rows=None):
+        """
+        Local stiffness k', transformation T and global stiffness T^T k' T of all members.
+        
+        With rows (member rows of the index), members are the members at those
+        rows, e.g. the edited members of a FrameSession.
+        
+        Releases are applied with masks (static condensation of the released rotation):
+        - Rigid-Rigid: 12EI/L³, 6EI/L², 4EI/L, 2EI/L
+        - Pin-Fix / Fix-Pin (Propped Cantilever): 3EI/L³, 3EI/L², 3EI/L with the
+          released rotation row/col zero
+        - Pin-Pin: Truss element, bending terms are zero and only axial remains
+        
+        Returns:
+            Tuple of (k_local, T, k_global), each of shape (n_members, 6, 6)
+        """
+        L, c, s = self._get_member_geometry_arrays(index, rows)
+        E = np.array([m.elastic_modulus for m in members], dtype=float)
+        I = np.array([m.moment_of_inertia for m in members], dtype=float)
+        A = np.array([m.cross_section_area for m in members], dtype=float)
+        release_start = np.array([m.release_start for m in members], dtype=bool)
+        release_end = np.array([m.release_end for m in members], dtype=bool)
         
-        E = member.elastic_modulus # Assume kN/m2 or consistent
-        I = member.moment_of_inertia
-        A = member.cross_section_area
+        rigid = ~release_start & ~release_end
+        pin_start = release_start & ~release_end
+        pin_end = release_end & ~release_start
+        propped = pin_start | pin_end
         
-        # Standard Rigidity Terms
+        EI = E * I
         k_axial = E * A / L
-        k1 = 12 * E * I / L**3
-        k2 = 6 * E * I / L**2
-        k3 = 4 * E * I / L # 4EI/L
-        k4 = 2 * E * I / L # 2EI/L
-        
-        # Local Stiffness k' (Standard Rigid-Rigid)
-        k_local = np.array([
-            [k_axial, 0, 0, -k_axial, 0, 0],
-            [0, k1, k2, 0, -k1, k2],
-            [0, k2, k3, 0, -k2, k4],
-            [-k_axial, 0, 0, k_axial, 0, 0],
-            [0, -k1, -k2, 0, k1, -k2],
-            [0, k2, k4, 0, -k2, k3]
-        ])
-        
-        # Apply Releases (Static Condensation / Modified Stiffness)
-        # If pinned at start (M1=0), pinned at end (M2=0)
-        
-        if member.release_start and member.release_end:
-            # Truss Element (Axial only, effectively) for bending
-            # Modified k' for Pin-Pin
-            # Bending terms become zero, only Axial remains
-            # Wait, shear can still exist if it's a beam, but no moments.
-            # Actually for Pin-Pin: 
-            # [ 0, 0, 0 ... ] for rotation rows/cols?
-            # Standard Truss Matrix:
-            k_local_pin_pin = np.zeros((6,6))
-            k_local_pin_pin[0,0] = k_axial; k_local_pin_pin[0,3] = -k_axial
-            k_local_pin_pin[3,0] = -k_axial; k_local_pin_pin[3,3] = k_axial
-            # What about transverse stiffness (Shear)? rigid body mode?
-            # A pin-pin beam CANNOT carry shear if there are no intermediate loads? 
-            # In matrix method, pin-pin is usually treated as Truss element.
-            k_local = k_local_pin_pin
-            
-        elif member.release_start:
-            # Pinned-Fixed
-            # Modify 3rd row/col (Rotation start) to be zero? No, condense it.
-            # Modified stiffness:
-            # k'33 becomes 3EI/L
-            k3_mod = 3 * E * I / L # 3EI/L
-            k2_mod = 3 * E * I / L**2 
-            k1_mod = 3 * E * I / L**3
-            
-            # Rebuild bending part
-            # u2, v2, th2 affected
-            k_local = np.zeros((6,6))
-            # Axial
-            k_local[0,0] = k_axial; k_local[0,3] = -k_axial
-            k_local[3,0] = -k_axial; k_local[3,3] = k_axial
-            
-            # Transverse/Rotation (Targeting [1,2, 4,5])
-            # v1, th1(released), v2, th2
-            # Relation: M1 = 0.
-            # Resulting stiffness matrix for Propped Cantilever (Pin-Fix)
-            k_local[1,1] = k1_mod;  k_local[1,4] = -k1_mod; k_local[1,5] = k2_mod
-            k_local[4,1] = -k1_mod; k_local[4,4] = k1_mod;  k_local[4,5] = -k2_mod
-            k_local[5,1] = k2_mod;  k_local[5,4] = -k2_mod; k_local[5,5] = k3_mod
-            
-        elif member.release_end:
-            # Fixed-Pinned
-            # Same as above but mirror
-            k3_mod = 3 * E * I / L
-            k2_mod = 3 * E * I / L**2
-            k1_mod = 3 * E * I / L**3
-            
-            k_local = np.zeros((6,6))
-            # Axial
-            k_local[0,0] = k_axial; k_local[0,3] = -k_axial
-            k_local[3,0] = -k_axial; k_local[3,3] = k_axial
-            
-            # Transverse/Rotation
-            # v1, th1, v2, th2(released)
-            k_local[1,1] = k1_mod;  k_local[1,2] = k2_mod;  k_local[1,4] = -k1_mod
-            k_local[2,1] = k2_mod;  k_local[2,2] = k3_mod;  k_local[2,4] = -k2_mod
-            k_local[4,1] = -k1_mod; k_local[4,2] = -k2_mod; k_local[4,4] = k1_mod
-            
+        # Transverse stiffness (v1, v2)
+        k_vv = np.where(rigid, 12.0, np.where(propped, 3.0, 0.0)) * EI / L**3
+        # Shear-rotation coupling at start (v1, th1) and end (v1, th2)
+        k_v1 = (6.0 * rigid + 3.0 * pin_end) * EI / L**2
+        k_v2 = (6.0 * rigid + 3.0 * pin_start) * EI / L**2
+        # Rotational stiffness at each end and carry-over
+        k_r1 = (4.0 * rigid + 3.0 * pin_end) * EI / L
+        k_r2 = (4.0 * rigid + 3.0 * pin_start) * EI / L
+        k_r12 = 2.0 * rigid * EI / L
+        
+        k_local = np.zeros((len(members), 6, 6))
+        k_local[:, 0, 0] = k_axial; k_local[:, 0, 3] = -k_axial; k_local[:, 3, 3] = k_axial
+        k_local[:, 1, 1] = k_vv;    k_local[:, 1, 4] = -k_vv;    k_local[:, 4, 4] = k_vv
+        k_local[:, 1, 2] = k_v1;    k_local[:, 2, 4] = -k_v1
+        k_local[:, 1, 5] = k_v2;    k_local[:, 4, 5] = -k_v2
+        k_local[:, 2, 2] = k_r1;    k_local[:, 5, 5] = k_r2;     k_local[:, 2, 5] = k_r12
+        # Mirror the upper triangle
+        upper = np.triu(k_local, 1)
+        k_local = k_local + np.transpose(upper, (0, 2, 1))
+        
         # Global Transform
-        T = self._get_transformation_matrix(member, nodes)
-        return T.T @ k_local @ T
+        T = self._get_transformation_batch(c, s)
+        k_global = np.transpose(T, (0, 2, 1)) @ k_local @ T
+        return k_local, T, k_global
 
-    def _calculate_member_fea(self, member: FrameMember, loads: List, nodes: List[FrameNode]) -> np.ndarray:
+    def _calculate_member_fea(self, member: FrameMember, loads: List, index: FrameModelIndex) -> np.ndarray:
         """Calculate Fixed End Actions (Force/Moment) in Local System."""
         fea = np.zeros(6) # [fx1, fy1, m1, fx2, fy2, m2]
-        L, _, _ = self._get_geometry(member, nodes)
+        L, _, _ = self._get_geometry(member, index)
         
         for load in loads:
             # UDL
@@ -393,27 +730,27 @@ class FrameSolver:
                 
         return fea
 
-    def _calculate_member_forces(self, member: FrameMember, nodes: List[FrameNode], dof_map: Dict, u_total: np.ndarray, fea_local: np.ndarray, request: FrameRequest = None):
+    def _calculate_member_forces(self, member: FrameMember, index: FrameModelIndex, loads: FrameLoadSet, dof_map: Dict,
+                                 u_total: np.ndarray, fea_local: np.ndarray,
+                                 k_local: np.ndarray, T: np.ndarray):
         start_dofs = dof_map[member.start_node_id]
         end_dofs = dof_map[member.end_node_id]
         indices = start_dofs + end_dofs
         u_global_member = u_total[indices]
         
-        T = self._get_transformation_matrix(member, nodes)
         u_local = T @ u_global_member
         
-        # Recalculate k_local (needed)
-        k_local_matrix_temp = self._calculate_member_global_stiffness(member, nodes)
-        k_local = T @ k_local_matrix_temp @ T.T
-        
         # Calculate forces at ends (End Actions)
         f_local = k_local @ u_local + fea_local
         
         # Discretize member for diagram data (20 segments)
         stations = 21
-        L, _, _ = self._get_geometry(member, nodes)
+        L, _, _ = self._get_geometry(member, index)
         x_vals = np.linspace(0, L, stations)
         
+        uniform_loads = loads.member_uniform_loads[member.id]
+        point_loads = loads.member_point_loads[member.id]
+        
         n_vals = []
         v_vals = []
         m_vals = []
@@ -424,23 +761,20 @@ class FrameSolver:
             m = -f_local[2] + f_local[1] * x
             
             # Add effects of loads along span
-            if request:
-                for ul in request.uniform_loads:
-                    if ul.member_id == member.id:
-                        w = ul.magnitude_y 
-                        # Apply if x > 0
-                        if x > 0:
-                            v += w * x
-                            m += w * x**2 / 2
-                
-                for pl in request.point_loads:
-                    if pl.type == "MEMBER_POINT_LOAD" and pl.target_id == member.id:
-                        P = pl.magnitude_y
-                        a = pl.position if pl.position is not None else L/2
-                        # Macaulay Step Function: Only add if x > a
-                        if x > a:
-                            v += P
-                            m += P * (x - a)
+            for ul in uniform_loads:
+                w = ul.magnitude_y 
+                # Apply if x > 0
+                if x > 0:
+                    v += w * x
+                    m += w * x**2 / 2
+            
+            for pl in point_loads:
+                P = pl.magnitude_y
+                a = pl.position if pl.position is not None else L/2
+                # Macaulay Step Function: Only add if x > a
+                if x > a:
+                    v += P
+                    m += P * (x - a)
 
             n_vals.append(n)
             v_vals.append(v)
@@ -479,25 +813,22 @@ class FrameSolver:
         r_simple_start_y = 0.0
         r_simple_end_y = 0.0
         
-        if request:
-             for ul in request.uniform_loads:
-                if ul.member_id == member.id:
-                    w = ul.magnitude_y
-                    # Total Load W = w*L
-                    # R = -Total_Load / 2 (Opposing load)
-                    # if w is negative (down), R should be positive (up)
-                    r_simple_start_y -= w * L / 2
-                    r_simple_end_y -= w * L / 2
-                    
-             for pl in request.point_loads:
-                if pl.type == "MEMBER_POINT_LOAD" and pl.target_id == member.id:
-                    P = pl.magnitude_y
-                    a = pl.position if pl.position is not None else L/2
-                    b = L - a
-                    # R_start = -P*b/L
-                    # R_end = -P*a/L
-                    r_simple_start_y -= P * b / L
-                    r_simple_end_y -= P * a / L
+        for ul in uniform_loads:
+            w = ul.magnitude_y
+            # Total Load W = w*L
+            # R = -Total_Load / 2 (Opposing load)
+            # if w is negative (down), R should be positive (up)
+            r_simple_start_y -= w * L / 2
+            r_simple_end_y -= w * L / 2
+            
+        for pl in point_loads:
+            P = pl.magnitude_y
+            a = pl.position if pl.position is not None else L/2
+            b = L - a
+            # R_start = -P*b/L
+            # R_end = -P*a/L
+            r_simple_start_y -= P * b / L
+            r_simple_end_y -= P * a / L
 
         # Step 2: Iterate and Calc FMD
         for i, x in enumerate(x_vals):
@@ -512,23 +843,20 @@ class FrameSolver:
             m_fmd = r_simple_start_y * x
             
             # Add Load Effects (Same as Total Loop)
-            if request:
-                for ul in request.uniform_loads:
-                    if ul.member_id == member.id:
-                        w = ul.magnitude_y 
-                        if x > 0:
-                            # Load is w. Moment arm x/2.
-                            # w is signed (usually -).
-                            # If w is -, force is Down. Moment is Hogging (-).
-                            # + w*x * x/2. (Negative result).
-                            m_fmd += w * x**2 / 2
-                
-                for pl in request.point_loads:
-                    if pl.type == "MEMBER_POINT_LOAD" and pl.target_id == member.id:
-                        P = pl.magnitude_y
-                        a = pl.position if pl.position is not None else L/2
-                        if x > a:
-                            m_fmd += P * (x - a)
+            for ul in uniform_loads:
+                w = ul.magnitude_y 
+                if x > 0:
+                    # Load is w. Moment arm x/2.
+                    # w is signed (usually -).
+                    # If w is -, force is Down. Moment is Hogging (-).
+                    # + w*x * x/2. (Negative result).
+                    m_fmd += w * x**2 / 2
+            
+            for pl in point_loads:
+                P = pl.magnitude_y
+                a = pl.position if pl.position is not None else L/2
+                if x > a:
+                    m_fmd += P * (x - a)
             
             fmd_vals.append(m_fmd)
             
@@ -0,0 +1,391 @@
+"""
+Preconditioned conjugate gradient solution of the reduced frame stiffness system.
+
+A direct factor of K_ff needs memory for its fill-in: O(n b) for a band of
+half-width b, O(n^2) dense. PCG only needs K_ff itself (sparse or as
+triplets), a preconditioner with the sparsity of K_ff and a few work vectors,
+so memory grows linearly with the model. Every load case is iterated at once
+as one (n, n_cases) block; each column keeps its own step lengths and stops
+when its relative residual ||F - K u|| / ||F|| drops below the tolerance.
+
+Preconditioners:
+    "jacobi": the inverse diagonal of K_ff
+    "ic": zero fill-in incomplete Cholesky, K_ff ~ U^T D U with U restricted
+        to the pattern of K_ff. Rows are grouped into levels whose entries
+        only depend on rows of earlier levels, so the factorization and both
+        triangular solves run level by level in vectorized NumPy.
+"""
+import numpy as np
+from typing import List, Optional
+
+from stiffness_solvers import (
+    TripletMatrix, SkylineLDLFactor, StructureUnstableError, PIVOT_TOLERANCE,
+    _permuted_upper_triplets, _mechanism_dofs
+)
+
+try:
+    import scipy.sparse as sp
+    import scipy.sparse.linalg as spla
+except ImportError:  # SciPy is optional: K_ff is then given as a TripletMatrix
+    sp = None
+    spla = None
+
+
+PCG_DEFAULT_TOLERANCE = 1e-10
+# Diagonal shifts (relative to the diagonal) tried in turn when incomplete Cholesky breaks down
+IC_SHIFTS = (0.0, 1e-3, 1e-2, 1e-1, 1.0)
+
+
+class PCGNotConvergedError(ValueError):
+    """PCG reached its iteration cap before every load case met the tolerance."""
+
+
+def _csr_operator(K):
+    """K as an object supporting K @ x, with duplicate triplets summed once."""
+    if not isinstance(K, TripletMatrix):
+        return K
+    n = K.shape[0]
+    keys, inverse = np.unique(K.rows * n + K.cols, return_inverse=True)
+    vals = np.bincount(inverse, K.vals)
+    if sp is not None:
+        return sp.csr_matrix((vals, (keys // n, keys % n)), shape=K.shape)
+    return TripletMatrix(keys // n, keys % n, vals, n)
+
+
+def _levels(parents: np.ndarray, children: np.ndarray, n: int) -> np.ndarray:
+    """
+    Level of every row of a triangular dependency graph.
+
+    Row children[e] depends on row parents[e], with parents[e] < children[e]
+    and the edges sorted by parent; a row's level is one more than the
+    highest level among the rows it depends on.
+    """
+    level = [0] * n
+    for parent, child in zip(parents.tolist(), children.tolist()):
+        if level[parent] >= level[child]:
+            level[child] = level[parent] + 1
+    return np.array(level, dtype=np.int64)
+
+
+def _group(keys: np.ndarray, num_groups: int):
+    """Order sorting items by key, and the slice bounds of every key."""
+    order = np.argsort(keys, kind="stable")
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(keys, minlength=num_groups))])
+    return order, bounds
+
+
+def _sweep(levels: np.ndarray, targets: np.ndarray, sources: np.ndarray, coefficients: np.ndarray):
+    """
+    Steps of a level-scheduled triangular solve x[t] -= c x[s].
+
+    Returns, per nonempty level, the distinct targets, the start of each
+    target's run of entries, and the sources and coefficients of the
+    entries sorted by target, so a step is one gather and one reduceat.
+    """
+    order = np.lexsort((targets, levels))
+    levels, targets, sources, coefficients = levels[order], targets[order], sources[order], coefficients[order]
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(levels))]) if len(levels) else [0]
+    steps = []
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        if hi == lo:
+            continue
+        level_targets = targets[lo:hi]
+        starts = np.flatnonzero(np.concatenate([[True], level_targets[1:] != level_targets[:-1]]))
+        steps.append((level_targets[starts], starts, sources[lo:hi], coefficients[lo:hi]))
+    return steps
+
+
+class JacobiPreconditioner:
+    """Diagonal (Jacobi) preconditioner: M^-1 r = r / diag(K_ff)."""
+
+    def __init__(self, K_ff):
+        diagonal = K_ff.diagonal()
+        # A free DOF without stiffness of its own can only be a mechanism
+        weak = np.flatnonzero(~(diagonal > 0))
+        if len(weak):
+            raise StructureUnstableError(weak.tolist())
+        self._inverse = 1.0 / diagonal
+
+    def apply(self, r: np.ndarray) -> np.ndarray:
+        return r * self._inverse.reshape((-1,) + (1,) * (r.ndim - 1))
+
+
+class IncompleteCholeskyPreconditioner:
+    """
+    Zero fill-in incomplete LDL^T of a permuted K_ff: M = P^T U^T D U P.
+
+    U is unit upper triangular with the pattern of the upper triangle of the
+    permuted K_ff (a bandwidth-reducing permutation such as RCM also keeps
+    the number of levels low). If a pivot breaks down, the factorization is
+    repeated with the off-diagonal entries scaled by 1 / (1 + shift), for
+    the shifts in IC_SHIFTS.
+    """
+
+    def __init__(self, K_ff, permutation: np.ndarray = None):
+        """
+        Args:
+            K_ff: Dense, SciPy sparse or TripletMatrix K_ff
+            permutation: Elimination order of the K_ff DOFs; default the identity
+        """
+        n = self.size = K_ff.shape[0]
+        self.permutation = np.arange(n) if permutation is None else np.asarray(permutation)
+
+        # Upper triangle of the permuted K_ff, duplicates summed, sorted by (row, col)
+        rows, cols, vals = _permuted_upper_triplets(K_ff, self.permutation)
+        keys, inverse = np.unique(rows * n + cols, return_inverse=True)
+        self._values = np.bincount(inverse, vals, minlength=len(keys))
+        rows, cols = keys // n, keys % n
+        diagonal_position = np.full(n, -1, dtype=np.int64)
+        on_diagonal = rows == cols
+        diagonal_position[rows[on_diagonal]] = np.flatnonzero(on_diagonal)
+        weak = np.flatnonzero((diagonal_position < 0) | ~(self._values[np.maximum(diagonal_position, 0)] > 0))
+        if len(weak):
+            raise StructureUnstableError(self.permutation[weak].tolist())
+
+        off = np.flatnonzero(~on_diagonal)
+        self._rows, self._cols, self._off = rows[off], cols[off], off
+        self._diagonal_position = diagonal_position
+
+        # Forward solve (U^T) and factorization levels: row i after every k with U[k, i] != 0;
+        # back solve (U) levels: row i after every j with U[i, j] != 0
+        forward = _levels(self._rows, self._cols, n)
+        flipped = np.lexsort((n - 1 - self._rows, n - 1 - self._cols))
+        backward = _levels(n - 1 - self._cols[flipped], n - 1 - self._rows[flipped], n)[::-1]
+        self.levels = int(forward.max(initial=0)) + 1
+
+        updates = self._prepare_updates(keys, forward)
+        for shift in IC_SHIFTS:
+            pivots = self._factorize(updates, 1.0 / (1.0 + shift))
+            if pivots is not None:
+                break
+        else:
+            raise StructureUnstableError()
+        self.shift = shift
+        self._pivots = pivots
+        self._forward_sweep = _sweep(forward[self._cols], self._cols, self._rows, self._upper)
+        self._backward_sweep = _sweep(backward[self._rows], self._rows, self._cols, self._upper)
+
+    def _prepare_updates(self, keys: np.ndarray, level: np.ndarray):
+        """
+        Index the updates (i, j) -= D_k U_ki U_kj of the factorization.
+
+        Every pair a <= b of off-diagonal entries (k, i), (k, j) of a row k
+        updates entry (i, j) if it is in the pattern (zero fill-in); the
+        updates are grouped by the level of row i, and so are the rows and
+        their off-diagonal entries.
+        """
+        n, rows, cols, num_levels = self.size, self._rows, self._cols, self.levels
+
+        counts = np.bincount(rows, minlength=n)
+        row_start = np.concatenate([[0], np.cumsum(counts)])
+        first, second = [np.zeros(0, dtype=np.int64)], [np.zeros(0, dtype=np.int64)]
+        for m in np.unique(counts[counts > 0]).tolist():
+            starts = row_start[:-1][counts == m]
+            i, j = np.triu_indices(m)
+            first.append((starts[:, None] + i).ravel())
+            second.append((starts[:, None] + j).ravel())
+        a, b = np.concatenate(first), np.concatenate(second)
+
+        target_keys = cols[a] * n + cols[b]
+        target = np.minimum(np.searchsorted(keys, target_keys), len(keys) - 1)
+        keep = keys[target] == target_keys
+        a, b, target = a[keep], b[keep], target[keep]
+        order, bounds = _group(level[cols[a]], num_levels)
+        return (
+            (rows[a][order], self._off[a][order], self._off[b][order], target[order], bounds),
+            _group(level, num_levels),
+            _group(level[rows], num_levels)
+        )
+
+    def _factorize(self, updates, scale: float):
+        """
+        Incomplete LDL^T, left-looking by levels, with off-diagonals scaled by scale.
+
+        `updates` is the index built by _prepare_updates.
+
+        Row i of U: D_i = K_ii - sum_k D_k U_ki^2 and
+        U_ij = (K_ij - sum_k D_k U_ki U_kj) / D_i over the k < i with
+        U_ki != 0. Stores U's off-diagonal values and returns D, or None at
+        a non-positive pivot.
+        """
+        values = self._values.copy()
+        values[self._off] *= scale
+        (source_row, a, b, target, update_bounds), (row_order, row_bounds), (entry_order, entry_bounds) = updates
+
+        pivots = np.empty(self.size)
+        for lev in range(len(row_bounds) - 1):
+            u = slice(update_bounds[lev], update_bounds[lev + 1])
+            if u.stop > u.start:
+                np.subtract.at(values, target[u], pivots[source_row[u]] * values[a[u]] * values[b[u]])
+            level_rows = row_order[row_bounds[lev]:row_bounds[lev + 1]]
+            d = values[self._diagonal_position[level_rows]]
+            if not np.all(d > 0):
+                return None
+            pivots[level_rows] = d
+            entries = entry_order[entry_bounds[lev]:entry_bounds[lev + 1]]
+            values[self._off[entries]] /= pivots[self._rows[entries]]
+        self._upper = values[self._off]
+        return pivots
+
+    def apply(self, r: np.ndarray) -> np.ndarray:
+        """M^-1 r for a vector or an (n, n_cases) matrix."""
+        x = np.asarray(r, dtype=float)[self.permutation].copy()
+        extra = (1,) * (x.ndim - 1)
+
+        # U^T y = r: y_i -= U_ki y_k, then z = y / D, then U u = z: u_i -= U_ij u_j
+        for targets, starts, sources, coefficients in self._forward_sweep:
+            x[targets] -= np.add.reduceat(coefficients.reshape((-1,) + extra) * x[sources], starts, axis=0)
+        x /= self._pivots.reshape((-1,) + extra)
+        for targets, starts, sources, coefficients in self._backward_sweep:
+            x[targets] -= np.add.reduceat(coefficients.reshape((-1,) + extra) * x[sources], starts, axis=0)
+
+        u = np.empty_like(x)
+        u[self.permutation] = x
+        return u
+
+
+class ConjugateGradientSolver:
+    """
+    Preconditioned conjugate gradient solver for an SPD K_ff.
+
+    Used like a factor: solve() takes a vector or an (n, n_cases) block of
+    right-hand sides, optionally with a starting guess (warm start). After a
+    solve, `iterations` and `residuals` hold the iteration count and the
+    final relative residual ||F - K u|| / ||F|| of every column.
+    """
+
+    def __init__(self, K_ff, preconditioner: str = "ic", permutation: np.ndarray = None,
+                 tolerance: float = PCG_DEFAULT_TOLERANCE, max_iterations: Optional[int] = None):
+        """
+        Args:
+            K_ff: Dense, SciPy sparse or TripletMatrix K_ff
+            preconditioner: "ic" (incomplete Cholesky) or "jacobi"
+            permutation: Elimination order of the incomplete Cholesky factor, e.g. after RCM
+            tolerance: Relative residual at which a column has converged
+            max_iterations: Iteration cap; default the number of DOFs
+        """
+        self.size = K_ff.shape[0]
+        self._K = _csr_operator(K_ff)
+        self._permutation = permutation
+        try:
+            if preconditioner == "ic":
+                self.preconditioner = IncompleteCholeskyPreconditioner(K_ff, permutation)
+            elif preconditioner == "jacobi":
+                self.preconditioner = JacobiPreconditioner(K_ff)
+            else:
+                raise ValueError(f"Unknown preconditioner: {preconditioner}")
+        except StructureUnstableError as e:
+            raise StructureUnstableError(e.dofs or self._mechanism_dofs()) from None
+        self.tolerance = tolerance
+        self.max_iterations = self.size if max_iterations is None else max_iterations
+        self.iterations: List[int] = []
+        self.residuals: List[float] = []
+
+    def solve(self, rhs: np.ndarray, initial: np.ndarray = None) -> np.ndarray:
+        """
+        Solve K_ff u = rhs, starting from `initial` (default zero).
+
+        Raises:
+            StructureUnstableError: K_ff is not positive definite along a search direction
+            PCGNotConvergedError: A column has not converged within max_iterations
+        """
+        rhs = np.asarray(rhs, dtype=float)
+        B = rhs.reshape(self.size, -1)
+        X = np.zeros_like(B) if initial is None else np.array(initial, dtype=float).reshape(B.shape)
+        norm_b = np.linalg.norm(B, axis=0)
+        # K u = 0 has the solution u = 0 for an SPD K
+        X[:, norm_b == 0] = 0.0
+        target = self.tolerance * norm_b
+
+        R = B - self._K @ X
+        converged = np.linalg.norm(R, axis=0) <= target
+        iterations = np.zeros(B.shape[1], dtype=np.int64)
+        Z = self.preconditioner.apply(R)
+        P = Z.copy()
+        rz = np.sum(R * Z, axis=0)
+
+        for _ in range(self.max_iterations):
+            active = ~converged
+            if not active.any():
+                break
+            Q = self._K @ P
+            pq = np.sum(P * Q, axis=0)
+            if not np.all(pq[active] > 0):
+                raise StructureUnstableError(self._mechanism_dofs())
+            alpha = np.divide(rz, pq, out=np.zeros_like(rz), where=active)
+            X += alpha * P
+            R -= alpha * Q
+            iterations[active] += 1
+            converged |= np.linalg.norm(R, axis=0) <= target
+
+            Z = self.preconditioner.apply(R)
+            rz_next = np.sum(R * Z, axis=0)
+            beta = np.divide(rz_next, rz, out=np.zeros_like(rz), where=active & (rz != 0))
+            P = Z + beta * P
+            rz = rz_next
+
+        # Report and accept the true residual, not the recursively updated one
+        # (they drift apart when K_ff is singular or nearly so)
+        true_norm = np.linalg.norm(B - self._K @ X, axis=0)
+        converged &= true_norm <= np.maximum(target, np.finfo(float).tiny)
+        residuals = np.divide(true_norm, norm_b, out=np.zeros_like(true_norm), where=norm_b > 0)
+        self.iterations, self.residuals = iterations.tolist(), residuals.tolist()
+        if not converged.all():
+            # A singular K_ff with loads that do not excite the mechanism need not break down
+            mechanism = self._singular_mechanism_dofs()
+            if mechanism:
+                raise StructureUnstableError(mechanism)
+            raise PCGNotConvergedError(
+                f"PCG did not converge in {self.max_iterations} iterations "
+                f"(relative residual {residuals[~converged].max():.1e}, tolerance {self.tolerance:.0e})"
+            )
+        if not np.all(np.isfinite(X)):
+            raise StructureUnstableError(self._mechanism_dofs())
+        return X.reshape(rhs.shape)
+
+    def _shifted_solve(self, shift: float, rhs: np.ndarray) -> np.ndarray:
+        """
+        (K_ff + shift*I)^-1 rhs by a direct factorization.
+
+        Only used to locate a mechanism: CSR K_ff gets a sparse LU and
+        triplets a skyline factor in the preconditioner's elimination order,
+        so a sparse K_ff is never densified.
+        """
+        n = self.size
+        if isinstance(self._K, np.ndarray):
+            return np.linalg.solve(self._K + shift * np.eye(n), rhs)
+        if sp is not None and sp.issparse(self._K):
+            return spla.splu(sp.csc_matrix(self._K + shift * sp.identity(n))).solve(rhs)
+        diagonal = np.arange(n)
+        shifted = TripletMatrix(
+            np.concatenate([self._K.rows, diagonal]), np.concatenate([self._K.cols, diagonal]),
+            np.concatenate([self._K.vals, np.full(n, shift)]), n
+        )
+        return SkylineLDLFactor(shifted, self._permutation).solve(rhs)
+
+    def _mechanism_dofs(self) -> List[int]:
+        """K_ff-local DOFs of the mechanism, located as for the direct factors (see _mechanism_dofs)."""
+        return _mechanism_dofs(self._K, self._K.diagonal(), self._shifted_solve)
+
+    def _singular_mechanism_dofs(self) -> List[int]:
+        """
+        Mechanism DOFs if K_ff is singular, else an empty list.
+
+        The shifted solve that locates the mechanism is a step of inverse
+        iteration, so its result is close to the lowest mode of K_ff; K_ff
+        counts as singular if that mode's Rayleigh quotient vanishes
+        relative to the diagonal, like a weak pivot.
+        """
+        modes = []
+
+        def shifted_solve(shift: float, rhs: np.ndarray) -> np.ndarray:
+            modes.append(self._shifted_solve(shift, rhs))
+            return modes[-1]
+
+        diagonal = self._K.diagonal()
+        dofs = _mechanism_dofs(self._K, diagonal, shifted_solve)
+        if not modes or not np.all(np.isfinite(modes[0])):
+            return dofs
+        x = modes[0]
+        rayleigh = (x @ (self._K @ x)) / (x @ x)
+        return dofs if rayleigh <= PIVOT_TOLERANCE * np.abs(diagonal).max(initial=0.0) else []
@@ -0,0 +1,146 @@
+"""
+Load combinations for frame analysis by linear superposition.
+
+The structure is linear-elastic, so a combination such as 1.2D + 1.6L is the
+same weighted sum of the solved base cases' displacements, reactions and
+member diagrams. No combination triggers a new solve.
+"""
+import numpy as np
+from typing import List, Dict
+from models import FrameLoadCombination
+
+
+# Member result entries that scale with the loads (stations are geometry)
+MEMBER_END_KEYS = ["axial_start", "shear_start", "moment_start", "axial_end", "shear_end", "moment_end"]
+MEMBER_DIAGRAM_KEYS = ["n_diagram", "v_diagram", "m_diagram", "fmd_diagram", "emd_diagram"]
+
+# Diagrams enveloped across scenarios (output prefix, row in MEMBER_DIAGRAM_KEYS)
+ENVELOPE_DIAGRAMS = [("n", 0), ("v", 1), ("m", 2)]
+
+
+class LoadCombinationEvaluator:
+    """
+    Combines solved load cases with one weighted sum over a (cases x quantities) array.
+
+    Each case result (as returned by FrameSolver in "case_results") is packed
+    into one row: displacements, reactions, member end forces and member
+    diagrams. A combination is then a row of load factors, and all
+    combinations are evaluated together as factors @ quantities.
+    """
+
+    def __init__(self, case_results: List[Dict]):
+        if not case_results:
+            raise ValueError("Load combinations require at least one named load case")
+
+        self.case_names = [r["name"] for r in case_results]
+        self.case_index = {name: i for i, name in enumerate(self.case_names)}
+        if len(self.case_index) != len(self.case_names):
+            raise ValueError("Load case names must be unique")
+
+        # Layout shared by every case (same geometry)
+        template = case_results[0]
+        self.num_dof = len(template["displacements"])
+        self.member_ids = [m["member_id"] for m in template["member_results"]]
+        self.member_stations = [m["stations"] for m in template["member_results"]]
+        self.num_stations = len(self.member_stations[0]) if self.member_stations else 0
+
+        self.quantities = np.stack([self._pack(r) for r in case_results])
+
+    def _pack(self, case_result: Dict) -> np.ndarray:
+        members = case_result["member_results"]
+        end_forces = np.array([[m[k] for k in MEMBER_END_KEYS] for m in members], dtype=float)
+        diagrams = np.array([[m[k] for k in MEMBER_DIAGRAM_KEYS] for m in members], dtype=float)
+        return np.concatenate([
+            np.asarray(case_result["displacements"], dtype=float),
+            np.asarray(case_result["reactions"], dtype=float),
+            end_forces.ravel(),
+            diagrams.ravel()
+        ])
+
+    @property
+    def _diagram_offset(self) -> int:
+        return 2 * self.num_dof + 6 * len(self.member_ids)
+
+    def _unpack(self, row: np.ndarray) -> Dict:
+        n_dof = self.num_dof
+        n_members = len(self.member_ids)
+        displacements = row[:n_dof]
+        reactions = row[n_dof:2 * n_dof]
+        offset = 2 * n_dof
+        end_forces = row[offset:offset + 6 * n_members].reshape(n_members, 6)
+        diagrams = row[self._diagram_offset:].reshape(n_members, len(MEMBER_DIAGRAM_KEYS), self.num_stations)
+
+        member_results = []
+        for i, member_id in enumerate(self.member_ids):
+            result = {"member_id": member_id, "stations": self.member_stations[i]}
+            result.update(zip(MEMBER_END_KEYS, end_forces[i].tolist()))
+            result.update(zip(MEMBER_DIAGRAM_KEYS, diagrams[i].tolist()))
+            member_results.append(result)
+
+        return {
+            "displacements": displacements.tolist(),
+            "reactions": reactions.tolist(),
+            "member_results": member_results
+        }
+
+    def factor_matrix(self, combinations: List[FrameLoadCombination]) -> np.ndarray:
+        """Load factors of every combination as a (combinations x cases) array."""
+        factors = np.zeros((len(combinations), len(self.case_names)))
+        for i, combo in enumerate(combinations):
+            for case_name, factor in combo.factors.items():
+                if case_name not in self.case_index:
+                    raise ValueError(f"Combination '{combo.name}' references unknown load case '{case_name}'")
+                factors[i, self.case_index[case_name]] += factor
+        return factors
+
+    def combine(self, combinations: List[FrameLoadCombination]) -> np.ndarray:
+        """Combined quantities as a (combinations x quantities) array."""
+        return self.factor_matrix(combinations) @ self.quantities
+
+    def evaluate(self, combinations: List[FrameLoadCombination]) -> List[Dict]:
+        """Combination results in the same shape as FrameSolver case results."""
+        combined = self.combine(combinations)
+        return [
+            {"name": combo.name, **self._unpack(row)}
+            for combo, row in zip(combinations, combined)
+        ]
+
+    def envelope(self, combinations: List[FrameLoadCombination] = ()) -> Dict:
+        """
+        Max/min of N, V and M at every station of every member across scenarios.
+
+        Scenarios are the named load cases followed by the combinations. The
+        extremes are NumPy reductions over a (scenarios x members x stations)
+        array per diagram; the governing scenario is reported as an index into
+        the returned "scenarios" list.
+        """
+        names = self.case_names + [combo.name for combo in combinations]
+        rows = self.quantities
+        if combinations:
+            rows = np.vstack([rows, self.combine(combinations)])
+
+        diagrams = rows[:, self._diagram_offset:].reshape(
+            len(names), len(self.member_ids), len(MEMBER_DIAGRAM_KEYS), self.num_stations
+        )
+
+        extremes = {}
+        for prefix, row in ENVELOPE_DIAGRAMS:
+            values = diagrams[:, :, row, :]  # (scenarios, members, stations)
+            max_idx = values.argmax(axis=0)
+            min_idx = values.argmin(axis=0)
+            extremes[prefix] = (
+                np.take_along_axis(values, max_idx[None], axis=0)[0], max_idx,
+                np.take_along_axis(values, min_idx[None], axis=0)[0], min_idx
+            )
+
+        member_envelopes = []
+        for i, member_id in enumerate(self.member_ids):
+            result = {"member_id": member_id, "stations": self.member_stations[i]}
+            for prefix, (max_vals, max_idx, min_vals, min_idx) in extremes.items():
+                result[f"{prefix}_max"] = max_vals[i].tolist()
+                result[f"{prefix}_max_scenario"] = max_idx[i].tolist()
+                result[f"{prefix}_min"] = min_vals[i].tolist()
+                result[f"{prefix}_min_scenario"] = min_idx[i].tolist()
+            member_envelopes.append(result)
+
+        return {"scenarios": names, "member_envelopes": member_envelopes}
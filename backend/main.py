@@ -2,16 +2,56 @@
 FastAPI application for Slope Deflection Method calculator.
 Provides REST API for structural analysis calculations.
 """
-from fastapi import FastAPI, HTTPException
+import asyncio
+import functools
+import numpy as np
+from contextlib import asynccontextmanager
+from typing import Any, List, Optional
+from fastapi import FastAPI, HTTPException, Response, Body, Header, Depends
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from models import CalculationRequest, CalculationResponse, SpanResult, NodeResult, FrameRequest, FrameResponse
-from solver import SlopeDeflectionSolver
+from pydantic import ValidationError
+from models import (
+    CalculationRequest, CalculationResponse, FrameRequest, FrameResponse,
+    BeamSweepRequest, FrameSweepRequest, SweepResponse,
+    InfluenceLineRequest, InfluenceLineResponse, MovingLoadRequest, MovingLoadResponse,
+    PatternLoadRequest, PatternLoadResponse,
+    FrameSessionRequest, FrameSessionUpdate, FrameSessionResponse
+)
+from analysis import (
+    analyze_beam, analyze_frame, beam_dof_count, frame_dof_count,
+    analyze_many, analyze_beams, beam_error_response, frame_error_response, serialize_response,
+    analyze_influence_lines, influence_dof_count, analyze_moving_load, moving_load_dof_count,
+    analyze_pattern_load, pattern_load_dof_count, frame_session_response, frame_session_error_response
+)
+from execution import executor
+from sweep import sweep_grid, sweep_chunks, sweep_chunk, sweep_dof_count, sweep_response, sweep_error_response
+from result_cache import result_cache, request_key
+from binary_format import MEDIA_TYPE as BINARY_MEDIA_TYPE, negotiate_binary, encode_response
+from singleflight import single_flight
+from frame_session import FrameSession, frame_sessions
 import traceback
 
+
+# Largest number of models accepted by one batch call
+BATCH_MAX_ITEMS = 10000
+# Batches are split into this many chunks per worker so fast workers pick up more
+BATCH_CHUNKS_PER_WORKER = 4
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Start (and pre-warm) the solver worker pool before serving requests
+    executor.start()
+    yield
+    executor.shutdown()
+
+
 app = FastAPI(
     title="Slope Deflection Calculator API",
     description="Structural analysis API for continuous beams and frames",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS for frontend communication
@@ -44,46 +84,86 @@ async def health_check():
     }
 
 
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """Result cache hit/miss counters and size, plus request coalescing and frame session counters."""
+    return {
+        **result_cache.stats(),
+        "single_flight": single_flight.stats(),
+        "frame_sessions": frame_sessions.stats()
+    }
+
+
+async def _cached_analysis(kind: str, request, analyze, dof_count: int,
+                           binary_dtype: Optional[str] = None) -> Response:
+    """
+    Run analyze(request) on the executor, through the result cache.
+    
+    Args:
+        binary_dtype: Float dtype of the binary format (see negotiate_binary), or None for JSON
+    """
+    async def solve() -> bytes:
+        response = await executor.run(analyze, request, dof_count=dof_count)
+        if binary_dtype is not None:
+            return encode_response(response, binary_dtype)
+        return serialize_response(response)
+    
+    if binary_dtype is not None:
+        return await _cached_response(f"{kind}+{binary_dtype}", request, solve, BINARY_MEDIA_TYPE)
+    return await _cached_response(kind, request, solve)
+
+
+async def _cached_response(kind: str, request, solve, media_type: str = "application/json") -> Response:
+    """
+    Serve a repeat request from the result cache, or solve and store the serialized response.
+    
+    Concurrent requests for the same model share one solve (single-flight).
+    Only successful responses are cached; failures raise before reaching the cache.
+    
+    Args:
+        solve: Coroutine function producing the body
+        media_type: Content type of the body; part of the cache key through kind
+    """
+    key = request_key(kind, request)
+    body = result_cache.get(key)
+    if body is not None:
+        return Response(content=body, media_type=media_type, headers={"X-Cache": "HIT", "Vary": "Accept"})
+    
+    body = await single_flight.run(key, solve)
+    result_cache.put(key, body)
+    return Response(content=body, media_type=media_type, headers={"X-Cache": "MISS", "Vary": "Accept"})
+
+
+def _binary_dtype(accept: Optional[str] = Header(default=None)) -> Optional[str]:
+    """
+    Float dtype of the binary format asked for by the Accept header, or None for JSON.
+    
+    An unsupported dtype is a content negotiation failure (406), not a failed
+    analysis, so it is rejected before the endpoint runs.
+    """
+    try:
+        return negotiate_binary(accept)
+    except ValueError as e:
+        raise HTTPException(status_code=406, detail=str(e))
+
+
 @app.post("/api/calculate", response_model=CalculationResponse)
-async def calculate(request: CalculationRequest):
+async def calculate(request: CalculationRequest, binary_dtype: Optional[str] = Depends(_binary_dtype)):
     """
     Perform Slope Deflection analysis on the provided beam/frame configuration.
     
     Args:
         request: Beam configuration with spans, supports, and loads
+        binary_dtype: Float dtype of the compact array encoding if the Accept header asks for it
     
     Returns:
         Analysis results with moments, shear, reactions, and optional solution steps
     """
     try:
-        # Validate input
-        if len(request.spans) < 1:
-            raise HTTPException(
-                status_code=400,
-                detail="At least one span is required"
-            )
-        
-        if len(request.supports) < 2:
-            raise HTTPException(
-                status_code=400,
-                detail="At least two supports are required"
-            )
-        
-        # Create solver instance
-        solver = SlopeDeflectionSolver(
-            spans=request.spans,
-            supports=request.supports
-        )
-        
-        # Solve
-        results = solver.solve(include_steps=request.include_steps)
-        
-        # Format response
-        return CalculationResponse(
-            success=True,
-            span_results=[SpanResult(**r) for r in results["span_results"]],
-            node_results=[NodeResult(**r) for r in results["node_results"]],
-            solution_steps=results["solution_steps"]
+        # Span/support counts are enforced by CalculationRequest validation.
+        # Solve (inline for small beams, on the worker pool for large ones)
+        return await _cached_analysis(
+            "beam", request, analyze_beam, beam_dof_count(request), binary_dtype
         )
     
     except Exception as e:
@@ -91,63 +171,314 @@ async def calculate(request: CalculationRequest):
         error_trace = traceback.format_exc()
         print(f"Calculation error: {error_trace}")
         
-        return CalculationResponse(
-            success=False,
-            span_results=[],
-            node_results=[],
-            error_message=f"Calculation failed: {str(e)}"
-        )
+        return beam_error_response(f"Calculation failed: {str(e)}")
 
 
 @app.post("/api/calculate-frame", response_model=FrameResponse)
-async def calculate_frame(request: FrameRequest):
+async def calculate_frame(request: FrameRequest, binary_dtype: Optional[str] = Depends(_binary_dtype)):
     """
     Perform Direct Stiffness Method analysis on 2D frame.
+    
+    The binary media type in the Accept header selects the compact array encoding.
     """
     try:
-        from frame_solver import FrameSolver
-        from models import FrameMemberResult, FrameResponse
-        
-        solver = FrameSolver()
-        results = solver.solve(request)
-        
-        # Convert member results dicts to Pydantic models
-        member_results = [
-            FrameMemberResult(
-                memberId=r["member_id"],
-                axialStart=r["axial_start"],
-                shearStart=r["shear_start"],
-                momentStart=r["moment_start"],
-                axialEnd=r["axial_end"],
-                shearEnd=r["shear_end"],
-                momentEnd=r["moment_end"],
-                stations=r.get("stations"),
-                nDiagram=r.get("n_diagram"),
-                vDiagram=r.get("v_diagram"),
-                mDiagram=r.get("m_diagram"),
-                fmdDiagram=r.get("fmd_diagram"),
-                emdDiagram=r.get("emd_diagram")
-            )
-            for r in results["member_results"]
-        ]
-        
-        return FrameResponse(
-            success=True,
-            displacements=results["displacements"],
-            reactions=results["reactions"],
-            memberResults=member_results
+        return await _cached_analysis(
+            "frame", request, analyze_frame, frame_dof_count(request), binary_dtype
         )
         
     except Exception as e:
         error_trace = traceback.format_exc()
         print(f"Frame calculation error: {error_trace}")
-        return FrameResponse(
-            success=False,
-            displacements=[],
-            reactions=[],
-            memberResults=[],
-            errorMessage=f"Calculation failed: {str(e)}"
+        return frame_error_response(f"Calculation failed: {str(e)}")
+
+
+async def _batch_analysis(kind: str, model, analyze_chunk, error_response, dof_count,
+                          items: List[Any], stream: bool) -> Response:
+    """
+    Validate, solve and serialize a batch of models.
+    
+    Items are validated one by one so an invalid or failing model only
+    produces an error entry for itself. Cached results are reused; the rest
+    are solved in chunks on the worker pool by analyze_chunk, which returns
+    (success, JSON body) per model (see analyze_many).
+    
+    Returns:
+        A JSON array of responses in input order, or with stream=True an
+        NDJSON stream of {"index", "result"} lines in completion order
+    """
+    if len(items) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"A batch may contain at most {BATCH_MAX_ITEMS} models"
+        )
+    
+    bodies: List[Optional[bytes]] = [None] * len(items)
+    keys: List[Optional[str]] = [None] * len(items)
+    pending = []
+    requests = []
+    for i, item in enumerate(items):
+        try:
+            request = model.model_validate(item)
+        except ValidationError as e:
+            bodies[i] = serialize_response(error_response(f"Invalid request: {str(e)}"))
+            continue
+        
+        keys[i] = request_key(kind, request)
+        body = result_cache.get(keys[i])
+        if body is not None:
+            bodies[i] = body
+            continue
+        pending.append(i)
+        requests.append(request)
+    
+    # Contiguous chunks, one pool submission each
+    workers = executor.workers if executor.pool is not None else 1
+    n_chunks = min(len(pending), workers * BATCH_CHUNKS_PER_WORKER)
+    bounds = [round(c * len(pending) / n_chunks) for c in range(n_chunks + 1)] if n_chunks else []
+    
+    async def solve_chunk(start: int, stop: int) -> List[int]:
+        chunk = requests[start:stop]
+        results = await executor.run(
+            analyze_chunk, chunk,
+            dof_count=sum(dof_count(r) for r in chunk)
+        )
+        indices = pending[start:stop]
+        for i, (success, body) in zip(indices, results):
+            bodies[i] = body
+            if success:
+                result_cache.put(keys[i], body)
+        return indices
+    
+    tasks = [solve_chunk(bounds[c], bounds[c + 1]) for c in range(n_chunks)]
+    
+    if not stream:
+        await asyncio.gather(*tasks)
+        return Response(content=b"[" + b",".join(bodies) + b"]", media_type="application/json")
+    
+    def line(i: int) -> bytes:
+        return b'{"index":' + str(i).encode() + b',"result":' + bodies[i] + b"}\n"
+    
+    async def lines():
+        # Invalid and cached items are ready immediately
+        ready = [i for i, body in enumerate(bodies) if body is not None]
+        for i in ready:
+            yield line(i)
+        for finished in asyncio.as_completed(tasks):
+            for i in await finished:
+                yield line(i)
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.post("/api/calculate-batch", response_model=List[CalculationResponse])
+async def calculate_batch(items: List[Any] = Body(...), stream: bool = False):
+    """
+    Analyze many beams in one call.
+    
+    Args:
+        items: CalculationRequest payloads
+        stream: Stream NDJSON lines as chunks finish instead of one array in input order
+    """
+    return await _batch_analysis(
+        "beam", CalculationRequest, analyze_beams, beam_error_response, beam_dof_count, items, stream
+    )
+
+
+@app.post("/api/calculate-frame-batch", response_model=List[FrameResponse])
+async def calculate_frame_batch(items: List[Any] = Body(...), stream: bool = False):
+    """
+    Analyze many frames in one call.
+    
+    Args:
+        items: FrameRequest payloads
+        stream: Stream NDJSON lines as chunks finish instead of one array in input order
+    """
+    return await _batch_analysis(
+        "frame", FrameRequest, functools.partial(analyze_many, analyze_frame, frame_error_response),
+        frame_error_response, frame_dof_count, items, stream
+    )
+
+
+
+async def _sweep_analysis(kind: str, request) -> Response:
+    """
+    Expand the sweep grid, solve its chunks on the worker pool and assemble the arrays.
+    
+    Raises:
+        ValueError: On invalid axes or a grid that is too large
+    """
+    axes, shape = sweep_grid(request)
+    num_points = int(np.prod(shape))
+    
+    async def solve() -> bytes:
+        chunks = await asyncio.gather(*(
+            executor.run(sweep_chunk, request, axes, start, stop,
+                         dof_count=(stop - start) * sweep_dof_count(request))
+            for start, stop in sweep_chunks(request, num_points)
+        ))
+        return serialize_response(sweep_response(request, axes, chunks))
+    
+    return await _cached_response(kind, request, solve)
+
+
+@app.post("/api/calculate-sweep", response_model=SweepResponse)
+async def calculate_sweep(request: BeamSweepRequest):
+    """
+    Analyze a beam over a grid of parameter values.
+    
+    Args:
+        request: Base beam, swept parameters and requested outputs
+    
+    Returns:
+        Axis values and one flattened array per requested output
+    """
+    try:
+        return await _sweep_analysis("beam-sweep", request)
+    
+    except Exception as e:
+        error_trace = traceback.format_exc()
+        print(f"Sweep error: {error_trace}")
+        return sweep_error_response(f"Sweep failed: {str(e)}")
+
+
+@app.post("/api/calculate-frame-sweep", response_model=SweepResponse)
+async def calculate_frame_sweep(request: FrameSweepRequest):
+    """
+    Analyze a 2D frame over a grid of parameter values.
+    """
+    try:
+        return await _sweep_analysis("frame-sweep", request)
+    
+    except Exception as e:
+        error_trace = traceback.format_exc()
+        print(f"Frame sweep error: {error_trace}")
+        return sweep_error_response(f"Sweep failed: {str(e)}")
+
+
+@app.post("/api/influence-lines", response_model=InfluenceLineResponse)
+async def influence_lines(request: InfluenceLineRequest):
+    """
+    Influence lines of reactions, node moments and section forces of a continuous beam.
+    
+    Args:
+        request: Beam spans and supports, unit load spacing and sections
+    
+    Returns:
+        Influence ordinates per quantity, one value per unit load position
+    """
+    try:
+        return await _cached_analysis(
+            "influence", request, analyze_influence_lines, influence_dof_count(request)
+        )
+    
+    except Exception as e:
+        error_trace = traceback.format_exc()
+        print(f"Influence line error: {error_trace}")
+        return InfluenceLineResponse(success=False, errorMessage=f"Calculation failed: {str(e)}")
+
+
+@app.post("/api/moving-load", response_model=MovingLoadResponse)
+async def moving_load(request: MovingLoadRequest):
+    """
+    Envelopes of moment, shear and reactions of a continuous beam under a moving axle train.
+    
+    Args:
+        request: Beam spans and supports, axle loads and spacings, step and stations
+    
+    Returns:
+        Max/min envelopes with the governing leading-axle positions
+    """
+    try:
+        return await _cached_analysis(
+            "moving-load", request, analyze_moving_load, moving_load_dof_count(request)
+        )
+    
+    except Exception as e:
+        error_trace = traceback.format_exc()
+        print(f"Moving load error: {error_trace}")
+        return MovingLoadResponse(success=False, errorMessage=f"Calculation failed: {str(e)}")
+
+
+@app.post("/api/pattern-load", response_model=PatternLoadResponse)
+async def pattern_load(request: PatternLoadRequest):
+    """
+    Envelopes of a continuous beam under patterned (checkerboard) live load.
+    
+    Args:
+        request: Beam with permanent span loads, live load per span and optional patterns
+    
+    Returns:
+        Max/min envelopes with the governing pattern of every station and reaction
+    """
+    try:
+        return await _cached_analysis(
+            "pattern-load", request, analyze_pattern_load, pattern_load_dof_count(request)
         )
+    
+    except Exception as e:
+        error_trace = traceback.format_exc()
+        print(f"Pattern load error: {error_trace}")
+        return PatternLoadResponse(success=False, errorMessage=f"Calculation failed: {str(e)}")
+
+
+def _session_response(response: FrameSessionResponse, binary_dtype: Optional[str]) -> Response:
+    """Body of a frame session response, as JSON or in the binary array format."""
+    if binary_dtype is not None:
+        return Response(content=encode_response(response, binary_dtype), media_type=BINARY_MEDIA_TYPE)
+    return Response(content=serialize_response(response), media_type="application/json")
+
+
+@app.post("/api/frame-sessions", response_model=FrameSessionResponse)
+async def create_frame_session(request: FrameSessionRequest,
+                               binary_dtype: Optional[str] = Depends(_binary_dtype)):
+    """
+    Analyze a 2D frame and keep its K_ff factorization for incremental updates.
+    
+    Returns:
+        The analysis results and the sessionId to update the frame with
+    """
+    try:
+        session = await executor.run_local(
+            FrameSession, request.frame, request.refactor_after, dof_count=frame_dof_count(request.frame)
+        )
+        session_id = frame_sessions.add(session)
+        return _session_response(frame_session_response(session_id, session.results), binary_dtype)
+    
+    except Exception as e:
+        error_trace = traceback.format_exc()
+        print(f"Frame session error: {error_trace}")
+        return frame_session_error_response(f"Calculation failed: {str(e)}")
+
+
+@app.patch("/api/frame-sessions/{session_id}", response_model=FrameSessionResponse)
+async def update_frame_session(session_id: str, update: FrameSessionUpdate,
+                               binary_dtype: Optional[str] = Depends(_binary_dtype)):
+    """
+    Edit members of a frame session and re-analyze.
+    
+    The edits are applied to the kept factorization as a low-rank update. If
+    the analysis fails, the session keeps its previous model.
+    """
+    session = frame_sessions.get(session_id)
+    if session is None:
+        return frame_session_error_response(f"Unknown or expired frame session: {session_id}", session_id)
+    
+    try:
+        results = await executor.run_local(
+            session.update, update.members, dof_count=frame_dof_count(session.request)
+        )
+        return _session_response(frame_session_response(session_id, results), binary_dtype)
+    
+    except Exception as e:
+        error_trace = traceback.format_exc()
+        print(f"Frame session error: {error_trace}")
+        return frame_session_error_response(f"Calculation failed: {str(e)}", session_id)
+
+
+@app.delete("/api/frame-sessions/{session_id}")
+async def close_frame_session(session_id: str):
+    """Discard a frame session and its factorization."""
+    return {"success": frame_sessions.remove(session_id)}
 
 
 if __name__ == "__main__":
@@ -1,7 +1,7 @@
 """
 Pydantic models for request/response validation in the Slope Deflection calculator.
 """
-from typing import List, Optional, Literal
+from typing import List, Optional, Literal, Dict
 from pydantic import BaseModel, Field
 
 
@@ -29,6 +29,17 @@ class DiagramData(BaseModel):
         populate_by_name = True
 
 
+class PiecewisePolynomial(BaseModel):
+    """
+    Exact diagram over a span as polynomial pieces.
+
+    Piece i covers breakpoints[i] <= x <= breakpoints[i + 1] (m from the left
+    end) with value sum(coefficients[i][k] * (x - breakpoints[i]) ** k).
+    """
+    breakpoints: List[float] = Field(description="Piece boundaries along the span (m)")
+    coefficients: List[List[float]] = Field(description="Ascending-power coefficients of each piece")
+
+
 class Span(BaseModel):
     """Represents a single span in the beam/frame."""
     id: str = Field(description="Unique identifier for the span")
@@ -76,6 +87,11 @@ class CalculationRequest(BaseModel):
         description="Include step-by-step solution in response",
         alias="includeSteps"
     )
+    diagram_format: Literal["sampled", "piecewise"] = Field(
+        default="sampled",
+        description="Sampled diagram points, or exact piecewise-polynomial SFD/BMD with an exact max moment",
+        alias="diagramFormat"
+    )
 
     class Config:
         populate_by_name = True
@@ -91,11 +107,15 @@ class SpanResult(BaseModel):
     max_moment: float = Field(description="Maximum moment in span (kN·m)", alias="maxMoment")
     max_moment_location: float = Field(description="Location of max moment from left (m)", alias="maxMomentLocation")
     
-    # Diagram data for visualization
-    sfd_data: DiagramData = Field(description="Shear Force Diagram data", alias="sfdData")
-    fmd_data: DiagramData = Field(description="Free Moment Diagram data (simply supported)", alias="fmdData")
-    emd_data: DiagramData = Field(description="End Moment Diagram data (from support moments)", alias="emdData")
-    bmd_data: DiagramData = Field(description="Complete Bending Moment Diagram (FMD + EMD)", alias="bmdData")
+    # Diagram data for visualization (sampled format)
+    sfd_data: Optional[DiagramData] = Field(default=None, description="Shear Force Diagram data", alias="sfdData")
+    fmd_data: Optional[DiagramData] = Field(default=None, description="Free Moment Diagram data (simply supported)", alias="fmdData")
+    emd_data: Optional[DiagramData] = Field(default=None, description="End Moment Diagram data (from support moments)", alias="emdData")
+    bmd_data: Optional[DiagramData] = Field(default=None, description="Complete Bending Moment Diagram (FMD + EMD)", alias="bmdData")
+    
+    # Exact diagrams (piecewise format)
+    sfd_pieces: Optional[PiecewisePolynomial] = Field(default=None, description="Shear Force Diagram polynomials", alias="sfdPieces")
+    bmd_pieces: Optional[PiecewisePolynomial] = Field(default=None, description="Bending Moment Diagram polynomials", alias="bmdPieces")
 
     class Config:
         populate_by_name = True
@@ -130,6 +150,7 @@ class CalculationResponse(BaseModel):
     span_results: List[SpanResult]
     node_results: List[NodeResult]
     solution_steps: Optional[List[SolutionStep]] = None
+    error_message: Optional[str] = None
 
 # === FRAME ANALYSIS MODELS ===
 
@@ -185,12 +206,74 @@ class FrameUniformLoad(BaseModel):
         populate_by_name = True
 
 
+class FrameLoadCase(BaseModel):
+    """A named set of loads analysed on the same frame geometry."""
+    name: str = Field(description="Load case name (e.g. 'Dead', 'Live', 'Wind')")
+    point_loads: List[FramePointLoad] = Field(default_factory=list, alias="pointLoads")
+    uniform_loads: List[FrameUniformLoad] = Field(default_factory=list, alias="uniformLoads")
+
+    class Config:
+        populate_by_name = True
+
+
+class FrameLoadCombination(BaseModel):
+    """A factored combination of named load cases (e.g. 1.2D + 1.6L)."""
+    name: str = Field(description="Combination name (e.g. 'ULS1')")
+    factors: Dict[str, float] = Field(description="Load case name -> load factor")
+
+
+class FramePCGSettings(BaseModel):
+    """Settings of the preconditioned conjugate gradient solver (solver "pcg")."""
+    preconditioner: Literal["ic", "jacobi"] = Field(
+        default="ic",
+        description="Zero fill-in incomplete Cholesky or diagonal (Jacobi) preconditioner"
+    )
+    tolerance: float = Field(
+        default=1e-10, gt=0, lt=1,
+        description="Relative residual ||F - K u|| / ||F|| at which a load case has converged"
+    )
+    max_iterations: int = Field(
+        default=5000, gt=0,
+        description="Iteration cap; the analysis fails if a load case has not converged by then",
+        alias="maxIterations"
+    )
+    initial_displacements: Optional[List[float]] = Field(
+        default=None,
+        description="Starting displacements of the base load case (3 per node, as in the response), "
+                    "e.g. the result of a previous analysis of a similar model",
+        alias="initialDisplacements"
+    )
+
+    class Config:
+        populate_by_name = True
+
+
 class FrameRequest(BaseModel):
     """Complete configuration for 2D Frame Analysis."""
     nodes: List[FrameNode]
     members: List[FrameMember]
     point_loads: List[FramePointLoad] = Field(default_factory=list, alias="pointLoads")
     uniform_loads: List[FrameUniformLoad] = Field(default_factory=list, alias="uniformLoads")
+    load_cases: List[FrameLoadCase] = Field(
+        default_factory=list,
+        description="Additional named load cases solved with the same stiffness factorization",
+        alias="loadCases"
+    )
+    combinations: List[FrameLoadCombination] = Field(
+        default_factory=list,
+        description="Combinations of the named load cases, evaluated by superposition"
+    )
+    solver: Literal["auto", "direct", "banded", "skyline", "pcg"] = Field(
+        default="auto",
+        description="K_ff solver: dense/sparse direct, banded Cholesky or skyline LDL^T after RCM renumbering, "
+                    "preconditioned conjugate gradients, or chosen by size"
+    )
+    pcg: FramePCGSettings = Field(default_factory=FramePCGSettings, description="Settings of the \"pcg\" solver")
+    precision: Literal["double", "mixed"] = Field(
+        default="double",
+        description="Factorize K_ff in float64, or in float32 with float64 iterative refinement "
+                    "(falls back to float64 if refinement does not converge)"
+    )
 
     class Config:
         populate_by_name = True
@@ -217,12 +300,338 @@ class FrameMemberResult(BaseModel):
         populate_by_name = True
 
 
+class FrameCaseResult(BaseModel):
+    """Results of one named load case."""
+    name: str
+    displacements: List[float]
+    reactions: List[float]
+    member_results: List[FrameMemberResult] = Field(alias="memberResults")
+
+    class Config:
+        populate_by_name = True
+
+
+class FrameMemberEnvelope(BaseModel):
+    """Max/min diagrams of a member across load cases and combinations."""
+    member_id: str = Field(alias="memberId")
+    stations: List[float]
+    n_max: List[float] = Field(alias="nMax")
+    n_min: List[float] = Field(alias="nMin")
+    v_max: List[float] = Field(alias="vMax")
+    v_min: List[float] = Field(alias="vMin")
+    m_max: List[float] = Field(alias="mMax")
+    m_min: List[float] = Field(alias="mMin")
+    # Governing scenario at each station (index into FrameEnvelope.scenarios)
+    n_max_scenario: List[int] = Field(alias="nMaxScenario")
+    n_min_scenario: List[int] = Field(alias="nMinScenario")
+    v_max_scenario: List[int] = Field(alias="vMaxScenario")
+    v_min_scenario: List[int] = Field(alias="vMinScenario")
+    m_max_scenario: List[int] = Field(alias="mMaxScenario")
+    m_min_scenario: List[int] = Field(alias="mMinScenario")
+
+    class Config:
+        populate_by_name = True
+
+
+class FrameEnvelope(BaseModel):
+    """Envelope of member diagrams across all scenarios of a request."""
+    scenarios: List[str] = Field(description="Load case names followed by combination names")
+    member_envelopes: List[FrameMemberEnvelope] = Field(alias="memberEnvelopes")
+
+    class Config:
+        populate_by_name = True
+
+
+class FrameSolverReport(BaseModel):
+    """How the stiffness system of a frame analysis was solved."""
+    method: Literal["direct", "banded", "skyline", "pcg"]
+    precision: Literal["double", "mixed"] = Field(
+        default="double", description="Precision of the factorization actually used"
+    )
+    iterations: Optional[int] = Field(
+        None, description="PCG iterations or refinement steps (most over the load cases)"
+    )
+    residual: Optional[float] = Field(
+        None, description="Relative residual ||F - K u|| / ||F|| (largest over the load cases)"
+    )
+
+
 class FrameResponse(BaseModel):
     """Results of Frame Analysis."""
     success: bool
     displacements: List[float]
     reactions: List[float]
     member_results: List[FrameMemberResult] = Field(alias="memberResults")
+    case_results: List[FrameCaseResult] = Field(default_factory=list, alias="caseResults")
+    combination_results: List[FrameCaseResult] = Field(default_factory=list, alias="combinationResults")
+    envelope: Optional[FrameEnvelope] = None
+    solver_report: Optional[FrameSolverReport] = Field(None, alias="solverReport")
+    error_message: Optional[str] = Field(None, alias="errorMessage")
+
+    class Config:
+        populate_by_name = True
+
+
+# === FRAME SESSION MODELS ===
+
+class FrameSessionRequest(BaseModel):
+    """Frame to keep on the server for incremental re-analysis."""
+    frame: FrameRequest
+    refactor_after: int = Field(
+        default=20, gt=0,
+        description="Member updates applied as low-rank corrections before K_ff is factorized from scratch",
+        alias="refactorAfter"
+    )
+
+    class Config:
+        populate_by_name = True
+
+
+class FrameMemberUpdate(BaseModel):
+    """New section properties or releases of an existing member (omitted fields are kept)."""
+    id: str = Field(description="ID of the member")
+    elastic_modulus: Optional[float] = Field(default=None, gt=0, alias="elasticModulus")
+    moment_of_inertia: Optional[float] = Field(default=None, gt=0, alias="momentOfInertia")
+    cross_section_area: Optional[float] = Field(default=None, gt=0, alias="crossSectionArea")
+    release_start: Optional[bool] = Field(default=None, alias="releaseStart")
+    release_end: Optional[bool] = Field(default=None, alias="releaseEnd")
+
+    class Config:
+        populate_by_name = True
+
+
+class FrameSessionUpdate(BaseModel):
+    """Member edits applied to a frame session as one update."""
+    members: List[FrameMemberUpdate] = Field(min_length=1)
+
+
+class FrameSessionReport(BaseModel):
+    """How a frame session produced its latest results."""
+    update: Literal["factorization", "low_rank"] = Field(
+        description="K_ff factorized from scratch, or the kept factor corrected by Sherman-Morrison-Woodbury"
+    )
+    rank: int = Field(default=0, description="Number of DOFs in the low-rank correction")
+    updates_since_factorization: int = Field(default=0, alias="updatesSinceFactorization")
+
+    class Config:
+        populate_by_name = True
+
+
+class FrameSessionResponse(FrameResponse):
+    """Results of a frame session after its creation or latest update."""
+    session_id: Optional[str] = Field(None, alias="sessionId")
+    session_report: Optional[FrameSessionReport] = Field(None, alias="sessionReport")
+
+
+# === PARAMETRIC SWEEP MODELS ===
+
+class SweepAxis(BaseModel):
+    """A parameter of the base model swept over a range of values."""
+    parameter: str = Field(
+        description='Path of the parameter in the base model, e.g. "spans[2].length" or '
+                    '"members[m_BC].momentOfInertia" (list items by index or id)'
+    )
+    values: Optional[List[float]] = Field(default=None, description="Explicit values")
+    start: Optional[float] = Field(default=None, description="First value of a generated range")
+    stop: Optional[float] = Field(default=None, description="Last value of a generated range")
+    # Bounded by sweep.SWEEP_MAX_POINTS (the size of a whole grid)
+    num: Optional[int] = Field(default=None, gt=0, le=100000, description="Number of values in the range")
+    step: Optional[float] = Field(default=None, gt=0, description="Spacing of a linear range (instead of num)")
+    scale: Literal["linear", "log"] = Field(default="linear", description="Spacing of the generated range")
+
+
+class BeamSweepRequest(BaseModel):
+    """Base beam swept over a grid of parameter values."""
+    base: CalculationRequest
+    axes: List[SweepAxis] = Field(min_length=1, description="Swept parameters; the grid is their product")
+    outputs: List[Literal[
+        "max_moment", "moment_left", "moment_right", "shear_left", "shear_right",
+        "rotations", "reactions", "moment_reactions"
+    ]] = Field(default=["max_moment", "reactions"], description="Results returned for every grid point")
+
+
+class FrameSweepRequest(BaseModel):
+    """Base frame swept over a grid of parameter values."""
+    base: FrameRequest
+    axes: List[SweepAxis] = Field(min_length=1, description="Swept parameters; the grid is their product")
+    outputs: List[Literal["displacements", "reactions", "drift", "max_moment"]] = Field(
+        default=["drift", "max_moment"],
+        description="Results returned for every grid point"
+    )
+
+
+class SweepAxisValues(BaseModel):
+    """Expanded values of a sweep axis."""
+    parameter: str
+    values: List[float]
+
+
+class SweepOutput(BaseModel):
+    """One result over the whole grid, flattened in row-major order (null where a point failed)."""
+    shape: List[int] = Field(description="Grid shape followed by the shape of the result at one point")
+    values: List[float]
+
+
+class SweepResponse(BaseModel):
+    """Results of a parametric sweep."""
+    success: bool
+    axes: List[SweepAxisValues] = Field(default_factory=list)
+    outputs: Dict[str, SweepOutput] = Field(default_factory=dict)
+    failed_points: List[int] = Field(
+        default_factory=list,
+        description="Flat indices of grid points whose analysis failed",
+        alias="failedPoints"
+    )
+    error_message: Optional[str] = Field(None, alias="errorMessage")
+
+    class Config:
+        populate_by_name = True
+
+
+# === INFLUENCE LINE MODELS ===
+
+class InfluenceSection(BaseModel):
+    """A section of a span whose moment and shear influence lines are wanted."""
+    span_index: int = Field(ge=0, description="Index of the span (0-based)", alias="spanIndex")
+    x: float = Field(ge=0, description="Distance from the left end of the span (m)")
+
+    class Config:
+        populate_by_name = True
+
+
+class InfluenceLineRequest(BaseModel):
+    """Continuous beam whose influence lines for a unit downward load are wanted."""
+    spans: List[Span] = Field(min_length=1, description="List of spans (their loads are ignored)")
+    supports: List[Support] = Field(min_length=2, description="Support configurations")
+    step: Optional[float] = Field(
+        default=None,
+        gt=0,
+        description="Spacing of the unit load positions (m); default 100 stations per span"
+    )
+    sections: Optional[List[InfluenceSection]] = Field(
+        default=None,
+        description="Sections for moment and shear influence lines; default the midspans"
+    )
+
+
+class InfluenceLineResponse(BaseModel):
+    """Influence ordinates, one list per quantity with one value per unit load position."""
+    success: bool
+    positions: List[float] = Field(default_factory=list, description="Unit load positions from the left end (m)")
+    rotations: List[List[float]] = Field(default_factory=list, description="Node rotations, per node")
+    reactions: List[List[float]] = Field(default_factory=list, description="Vertical reactions, per node")
+    node_moments: List[List[float]] = Field(
+        default_factory=list,
+        description="Bending moments at the nodes (BMD convention), per node",
+        alias="nodeMoments"
+    )
+    sections: List[InfluenceSection] = Field(default_factory=list)
+    section_moments: List[List[float]] = Field(default_factory=list, alias="sectionMoments")
+    section_shears: List[List[float]] = Field(default_factory=list, alias="sectionShears")
+    error_message: Optional[str] = Field(None, alias="errorMessage")
+
+    class Config:
+        populate_by_name = True
+
+
+# === MOVING LOAD MODELS ===
+
+class MovingLoadRequest(BaseModel):
+    """Continuous beam crossed by a vehicle axle train."""
+    spans: List[Span] = Field(min_length=1, description="List of spans (their loads are ignored)")
+    supports: List[Support] = Field(min_length=2, description="Support configurations")
+    # Bounded by moving_load.MOVING_LOAD_MAX_AXLES
+    axle_loads: List[float] = Field(
+        min_length=1,
+        max_length=100,
+        description="Axle loads, leading axle first (kN, downward positive)",
+        alias="axleLoads"
+    )
+    axle_spacings: List[float] = Field(
+        default_factory=list,
+        max_length=99,
+        description="Distances between consecutive axles (m)",
+        alias="axleSpacings"
+    )
+    step: float = Field(default=0.1, gt=0, description="Distance the vehicle advances per position (m)")
+    stations_per_span: int = Field(
+        default=21,
+        ge=2,
+        le=1001,
+        description="Equally spaced stations per span for the moment and shear envelopes",
+        alias="stationsPerSpan"
+    )
+
+    class Config:
+        populate_by_name = True
+
+
+class MovingLoadEnvelope(BaseModel):
+    """Extreme values of a quantity and the leading-axle positions (m from left end) that cause them."""
+    max: List[float]
+    max_position: List[float] = Field(alias="maxPosition")
+    min: List[float]
+    min_position: List[float] = Field(alias="minPosition")
+
+    class Config:
+        populate_by_name = True
+
+
+class MovingLoadResponse(BaseModel):
+    """Moving-load envelopes along the beam and at the supports."""
+    success: bool
+    step: Optional[float] = Field(default=None, description="Step actually used (m)")
+    stations: List[float] = Field(default_factory=list, description="Station positions from the left end (m)")
+    station_spans: List[int] = Field(default_factory=list, alias="stationSpans")
+    moment: Optional[MovingLoadEnvelope] = Field(default=None, description="Bending moment (BMD convention) per station")
+    shear: Optional[MovingLoadEnvelope] = Field(default=None, description="Shear force per station")
+    reactions: Optional[MovingLoadEnvelope] = Field(default=None, description="Vertical reaction per node")
+    error_message: Optional[str] = Field(None, alias="errorMessage")
+
+    class Config:
+        populate_by_name = True
+
+
+# === PATTERN LOAD MODELS ===
+
+class PatternLoadRequest(BaseModel):
+    """Continuous beam with permanent span loads and a patterned live UDL."""
+    spans: List[Span] = Field(min_length=1, description="List of spans; their loads are present in every pattern")
+    supports: List[Support] = Field(min_length=2, description="Support configurations")
+    live_loads: List[float] = Field(
+        min_length=1,
+        description="Live UDL per span (kN/m), or a single value for every span",
+        alias="liveLoads"
+    )
+    patterns: Optional[List[List[int]]] = Field(
+        default=None,
+        description="Loaded span indices of each pattern to check; default every possible pattern"
+    )
+
+    class Config:
+        populate_by_name = True
+
+
+class PatternLoadEnvelope(BaseModel):
+    """Extreme values of a quantity and the governing patterns (indices into PatternLoadResponse.patterns)."""
+    max: List[float]
+    max_pattern: List[int] = Field(alias="maxPattern")
+    min: List[float]
+    min_pattern: List[int] = Field(alias="minPattern")
+
+    class Config:
+        populate_by_name = True
+
+
+class PatternLoadResponse(BaseModel):
+    """Pattern live-load envelopes along the beam and at the supports."""
+    success: bool
+    patterns: List[List[int]] = Field(default_factory=list, description="Loaded span indices of the governing patterns")
+    stations: List[float] = Field(default_factory=list, description="Station positions from the left end (m)")
+    station_spans: List[int] = Field(default_factory=list, alias="stationSpans")
+    moment: Optional[PatternLoadEnvelope] = Field(default=None, description="Bending moment (BMD convention) per station")
+    shear: Optional[PatternLoadEnvelope] = Field(default=None, description="Shear force per station")
+    reactions: Optional[PatternLoadEnvelope] = Field(default=None, description="Vertical reaction per node")
     error_message: Optional[str] = Field(None, alias="errorMessage")
 
     class Config:
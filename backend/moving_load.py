@@ -0,0 +1,188 @@
+"""
+Moving-load (vehicle train) envelopes for continuous beams.
+
+A train of axle loads crosses the beam in fixed steps of its lead axle. The
+response to the whole train at every position is the sum of the axle loads
+times the influence ordinates under each axle, so the influence lines are
+computed once on a grid with the same step and the train is convolved with
+them: every axle adds a shifted slice of the influence lines, not one
+analysis per train position. Axles whose offset from the leading axle is not
+a whole number of steps get their own influence lines, on the grid shifted to
+where they sit, so the response is exact at every train position. Sections
+are processed in blocks to bound memory on long beams.
+"""
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from solver import SlopeDeflectionSolver
+
+
+# Largest number of train positions (or influence line positions) of one analysis
+MOVING_LOAD_MAX_POSITIONS = 200000
+# Largest number of axles of a vehicle
+MOVING_LOAD_MAX_AXLES = 100
+# Sections whose influence lines are held in memory at once
+SECTION_BLOCK = 64
+
+
+def grid_layout(beam_length: float, axle_spacings: List[float],
+                step: float) -> Tuple[int, float, int, List[Tuple[int, Optional[float]]]]:
+    """
+    Influence line grid and train positions, without building any arrays.
+
+    Returns:
+        (grid intervals, step used, number of vehicle positions, per axle
+        (grid shift, fraction of a step it lags behind the grid or None))
+    """
+    intervals = int(np.ceil(beam_length / step - 1e-9))
+    step = beam_length / intervals
+    offsets = np.concatenate([[0.0], np.cumsum(axle_spacings)])
+
+    # Leading axle from the left end until the last axle has left the beam
+    num_positions = int(np.ceil((beam_length + offsets[-1]) / step - 1e-9)) + 1
+
+    lags = []
+    for offset in offsets:
+        steps = offset / step
+        shift = int(np.floor(steps + 1e-9))
+        t = steps - shift
+        lags.append((shift, None if t <= 1e-9 else round(t, 12)))
+    return intervals, step, num_positions, lags
+
+
+def position_counts(beam_length: float, axle_spacings: List[float], step: float) -> Tuple[int, int]:
+    """Numbers of vehicle positions and of influence line positions of a moving load analysis."""
+    intervals, _, num_positions, lags = grid_layout(beam_length, axle_spacings, step)
+    # The grid, plus one shifted grid per distinct fractional lag
+    fractions = {t for _, t in lags if t is not None}
+    return num_positions, intervals + 1 + len(fractions) * intervals
+
+
+class MovingLoadAnalysis:
+    """Envelopes of a vehicle axle train crossing a continuous beam."""
+
+    def __init__(self, solver: SlopeDeflectionSolver, axle_loads: List[float],
+                 axle_spacings: List[float], step: float):
+        """
+        Args:
+            solver: Solver of the beam (its span loads are ignored)
+            axle_loads: Axle loads, leading axle first (kN, downward positive)
+            axle_spacings: Distances between consecutive axles (m)
+            step: Distance the train advances between positions (m); reduced
+                slightly if needed so that a whole number of steps spans the beam
+        """
+        if not axle_loads:
+            raise ValueError("A vehicle needs at least one axle")
+        if len(axle_loads) > MOVING_LOAD_MAX_AXLES:
+            raise ValueError(f"A vehicle may have at most {MOVING_LOAD_MAX_AXLES} axles")
+        if len(axle_spacings) != len(axle_loads) - 1:
+            raise ValueError("A vehicle needs one axle spacing less than axle loads")
+        if any(spacing < 0 for spacing in axle_spacings):
+            raise ValueError("Axle spacings cannot be negative")
+        if step <= 0:
+            raise ValueError("The step must be positive")
+
+        self.solver = solver
+        self.axle_loads = np.asarray(axle_loads, dtype=float)
+        # Distance of every axle behind the leading one
+        self.axle_offsets = np.concatenate([[0.0], np.cumsum(axle_spacings)])
+
+        self.lengths = np.array([span.length for span in solver.spans])
+        self.beam_length = float(self.lengths.sum())
+
+        # Sized before anything is allocated: every axle lagging by a new fraction
+        # of a step adds a whole shifted grid of influence line positions
+        if max(position_counts(self.beam_length, axle_spacings, step)) > MOVING_LOAD_MAX_POSITIONS:
+            raise ValueError(f"A moving load analysis may have at most {MOVING_LOAD_MAX_POSITIONS} positions")
+        intervals, self.step, num_positions, lags = grid_layout(self.beam_length, axle_spacings, step)
+
+        # Uniform influence line grid g_k = k * step with the beam end on the grid
+        self.grid = np.linspace(0.0, self.beam_length, intervals + 1)
+        self.vehicle_positions = self.step * np.arange(num_positions)
+
+        # Influence line positions: the grid, plus the grid shifted by (1 - t) steps for
+        # every fraction t of a step that an axle lags behind the leading one
+        positions = [self.grid]
+        shifted: Dict[float, slice] = {}
+        # Per axle: first vehicle position on the beam and its influence line positions
+        self._axle_segments = []
+        for shift, t in lags:
+            if t is None:
+                # Vehicle position m puts the axle on grid point m - shift
+                self._axle_segments.append((shift, slice(0, len(self.grid))))
+                continue
+
+            # ... or a fraction 1 - t into grid interval m - shift - 1
+            if t not in shifted:
+                start = sum(len(p) for p in positions)
+                positions.append(self.grid[:-1] + (1 - t) * self.step)
+                shifted[t] = slice(start, start + intervals)
+            self._axle_segments.append((shift + 1, shifted[t]))
+        self.positions = np.concatenate(positions)
+
+    def train_response(self, influence: np.ndarray) -> np.ndarray:
+        """
+        Response to the whole train at every vehicle position.
+
+        Args:
+            influence: Influence lines at self.positions, shape (quantities, positions)
+
+        Returns:
+            Shape (quantities, vehicle positions)
+        """
+        num_positions = len(self.vehicle_positions)
+        response = np.zeros((influence.shape[0], num_positions))
+        for load, (first, segment) in zip(self.axle_loads, self._axle_segments):
+            values = influence[:, segment]
+            stop = min(num_positions, first + values.shape[1])
+            if first < stop:
+                response[:, first:stop] += load * values[:, :stop - first]
+        return response
+
+    def _envelope(self, response: np.ndarray) -> Dict[str, np.ndarray]:
+        i_max = np.argmax(response, axis=1)
+        i_min = np.argmin(response, axis=1)
+        rows = np.arange(response.shape[0])
+        return {
+            "max": response[rows, i_max],
+            "max_position": self.vehicle_positions[i_max],
+            "min": response[rows, i_min],
+            "min_position": self.vehicle_positions[i_min]
+        }
+
+    def envelopes(self, stations_per_span: int = 21) -> Dict:
+        """
+        Max/min envelopes of moment and shear along the beam and of the reactions.
+
+        Args:
+            stations_per_span: Equally spaced sections per span, ends included
+
+        Returns:
+            Dict with "station_span", "station_x" (local) and "stations"
+            (global) of the sections, and "moment", "shear" and "reactions"
+            envelopes, each a dict of "max", "max_position", "min",
+            "min_position" arrays; positions are those of the leading axle
+        """
+        actions = self.solver.unit_load_actions(self.positions)
+        edges = np.concatenate([[0.0], np.cumsum(self.lengths)])
+
+        station_span = np.repeat(np.arange(len(self.lengths)), stations_per_span)
+        station_x = np.linspace(0, self.lengths, stations_per_span, axis=-1).ravel()
+
+        moment_blocks, shear_blocks = [], []
+        for start in range(0, len(station_span), SECTION_BLOCK):
+            block = slice(start, start + SECTION_BLOCK)
+            moments, shears = self.solver.section_influence(actions, station_span[block], station_x[block])
+            moment_blocks.append(self._envelope(self.train_response(moments)))
+            shear_blocks.append(self._envelope(self.train_response(shears)))
+
+        def join(blocks):
+            return {key: np.concatenate([b[key] for b in blocks]) for key in blocks[0]}
+
+        return {
+            "station_span": station_span,
+            "station_x": station_x,
+            "stations": edges[station_span] + station_x,
+            "moment": join(moment_blocks),
+            "shear": join(shear_blocks),
+            "reactions": self._envelope(self.train_response(actions["reactions"].T))
+        }
@@ -0,0 +1,142 @@
+"""
+Pattern (checkerboard) live-load envelopes for continuous beams.
+
+Design codes ask for the worst of the live-load patterns: alternate spans
+loaded, adjacent spans loaded, and so on. Instead of solving every pattern,
+the beam is solved once for the permanent loads and once per span for the
+live load on that span alone, all as one vectorized batch. Any pattern is the
+permanent case plus the sum of the unit cases of its loaded spans. Over all
+2^n patterns, the maximum at a station is reached by loading exactly the
+spans that add to it, so the envelopes and their governing patterns are exact
+without enumerating the patterns.
+"""
+import numpy as np
+from typing import List, Dict
+from models import Span, Support
+from solver import flatten_span_loads, LOAD_SHAPE_UDL
+from batch_solver import BatchSlopeDeflectionSolver, support_types
+
+
+# Largest number of explicitly given patterns of one analysis
+PATTERN_MAX_PATTERNS = 4096
+# Contributions below this fraction of the largest one count as zero when choosing patterns
+PATTERN_ZERO_TOLERANCE = 1e-9
+
+
+class PatternLoadAnalysis:
+    """Envelopes of a continuous beam under patterned live load."""
+
+    def __init__(self, spans: List[Span], supports: List[Support], live_loads: List[float],
+                 patterns: List[List[int]] = None):
+        """
+        Args:
+            spans: Spans of the beam; their loads are permanent and present in every pattern
+            supports: Support configurations
+            live_loads: Live UDL per span (kN/m), or one value for every span
+            patterns: Loaded span indices of each pattern to consider; default all 2^n patterns
+        """
+        num_spans = len(spans)
+        if len(live_loads) not in (1, num_spans):
+            raise ValueError("Give one live load, or one live load per span")
+        live = np.broadcast_to(np.asarray(live_loads, dtype=float), (num_spans,))
+
+        self.num_spans = num_spans
+        self.patterns = None
+        if patterns is not None:
+            if not patterns:
+                raise ValueError("At least one pattern is required")
+            if len(patterns) > PATTERN_MAX_PATTERNS:
+                raise ValueError(f"A pattern load analysis may have at most {PATTERN_MAX_PATTERNS} patterns")
+            self.patterns = np.zeros((len(patterns), num_spans), dtype=bool)
+            for p, loaded in enumerate(patterns):
+                if any(i < 0 or i >= num_spans for i in loaded):
+                    raise ValueError(f"Pattern {p} loads a non-existent span")
+                self.patterns[p, list(loaded)] = True
+
+        # Permanent loads followed by one live UDL per span, grouped by span again
+        flat = flatten_span_loads(spans)
+        order = np.argsort(np.concatenate([flat["span"], np.arange(num_spans)]), kind="stable")
+        is_live = np.concatenate([np.zeros(len(flat["span"]), dtype=bool), np.ones(num_spans, dtype=bool)])[order]
+        load_span = np.concatenate([flat["span"], np.arange(num_spans)])[order]
+
+        # Case 0: permanent loads; case i + 1: live load on span i only
+        magnitude = np.zeros((num_spans + 1, len(load_span)))
+        magnitude[0, ~is_live] = np.concatenate([flat["magnitude"], live])[order][~is_live]
+        magnitude[1 + load_span[is_live], np.flatnonzero(is_live)] = live
+
+        moment_span = [i for i, span in enumerate(spans) for load in span.loads if load.load_type == "MOMENT"]
+        moment_magnitude = np.zeros((num_spans + 1, len(moment_span)))
+        moment_magnitude[0] = [load.magnitude for span in spans for load in span.loads if load.load_type == "MOMENT"]
+
+        self.solver = BatchSlopeDeflectionSolver(
+            lengths=np.broadcast_to([span.length for span in spans], (num_spans + 1, num_spans)),
+            EI=np.broadcast_to([span.elastic_modulus * span.moment_of_inertia for span in spans],
+                               (num_spans + 1, num_spans)),
+            loads={
+                "span": load_span,
+                "shape": np.concatenate([flat["shape"], np.full(num_spans, LOAD_SHAPE_UDL)])[order],
+                "magnitude": magnitude,
+                "position": np.concatenate([flat["position"], np.zeros(num_spans)])[order]
+            },
+            support_types=support_types(supports, num_spans + 1),
+            moment_span=np.array(moment_span, dtype=np.int64),
+            moment_magnitude=moment_magnitude
+        )
+
+    def _envelope(self, cases: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Max/min over the patterns of a quantity given per case.
+
+        Args:
+            cases: Permanent case followed by the unit cases, shape (spans + 1, stations)
+
+        Returns:
+            Dict of "max", "min" (stations,) and "max_pattern", "min_pattern"
+            (stations, spans) boolean masks of the loaded spans
+        """
+        permanent, unit = cases[0], cases[1:]
+        if self.patterns is None:
+            tolerance = PATTERN_ZERO_TOLERANCE * np.max(np.abs(unit), initial=0.0)
+            max_pattern = (unit > tolerance).T
+            min_pattern = (unit < -tolerance).T
+            return {
+                "max": permanent + np.where(max_pattern.T, unit, 0.0).sum(axis=0),
+                "max_pattern": max_pattern,
+                "min": permanent + np.where(min_pattern.T, unit, 0.0).sum(axis=0),
+                "min_pattern": min_pattern
+            }
+
+        values = permanent + self.patterns.astype(float) @ unit
+        i_max = np.argmax(values, axis=0)
+        i_min = np.argmin(values, axis=0)
+        stations = np.arange(values.shape[1])
+        return {
+            "max": values[i_max, stations],
+            "max_pattern": self.patterns[i_max],
+            "min": values[i_min, stations],
+            "min_pattern": self.patterns[i_min]
+        }
+
+    def envelopes(self) -> Dict:
+        """
+        Moment and shear envelopes along the beam and reaction envelopes.
+
+        Returns:
+            Dict with "station_span", "station_x" (local) and "stations"
+            (global) positions, and "moment", "shear" and "reactions"
+            envelopes (see _envelope)
+        """
+        arrays = self.solver.solve()
+        x = arrays["x"][0]
+        lengths = self.solver.lengths[0]
+        edges = np.concatenate([[0.0], np.cumsum(lengths)])
+        station_span = np.repeat(np.arange(self.num_spans), x.shape[-1])
+
+        return {
+            "station_span": station_span,
+            "station_x": x.ravel(),
+            "stations": edges[station_span] + x.ravel(),
+            "moment": self._envelope(arrays["bmd"].reshape(self.num_spans + 1, -1)),
+            "shear": self._envelope(arrays["sfd"].reshape(self.num_spans + 1, -1)),
+            "reactions": self._envelope(arrays["reactions"])
+        }
@@ -0,0 +1,131 @@
+"""
+Bandwidth-reducing node orderings for the frame stiffness matrix.
+
+Nodes are numbered in the order the request lists them, so the bandwidth of
+K depends on how the frame happened to be drawn. Reverse Cuthill-McKee
+renumbers the node graph (nodes joined by members) breadth-first from a
+peripheral node, which keeps connected nodes close in the numbering and the
+nonzeros of K near its diagonal.
+"""
+import numpy as np
+from collections import deque
+from typing import List, Tuple
+
+
+def _levels(adjacency: List[List[int]], start: int) -> List[List[int]]:
+    """Breadth-first level structure of the component containing start."""
+    seen = {start}
+    levels = [[start]]
+    while True:
+        level = []
+        for node in levels[-1]:
+            for neighbour in adjacency[node]:
+                if neighbour not in seen:
+                    seen.add(neighbour)
+                    level.append(neighbour)
+        if not level:
+            return levels
+        levels.append(level)
+
+
+def _peripheral_node(adjacency: List[List[int]], degree: np.ndarray, start: int) -> int:
+    """
+    Pseudo-peripheral node of start's component (George-Liu).
+
+    Moves to a lowest-degree node of the last BFS level for as long as that
+    increases the number of levels (the eccentricity).
+    """
+    levels = _levels(adjacency, start)
+    while True:
+        candidate = min(levels[-1], key=lambda node: (degree[node], node))
+        candidate_levels = _levels(adjacency, candidate)
+        if len(candidate_levels) <= len(levels):
+            return start
+        start, levels = candidate, candidate_levels
+
+
+def reverse_cuthill_mckee(num_nodes: int, edges: np.ndarray) -> np.ndarray:
+    """
+    Reverse Cuthill-McKee ordering of a graph.
+
+    Args:
+        num_nodes: Number of nodes
+        edges: (edges, 2) array of node pairs; self-loops and duplicates are ignored
+
+    Returns:
+        order: order[k] is the original node placed at position k
+    """
+    adjacency = [set() for _ in range(num_nodes)]
+    for a, b in np.asarray(edges, dtype=np.int64).reshape(-1, 2).tolist():
+        if a != b:
+            adjacency[a].add(b)
+            adjacency[b].add(a)
+    degree = np.array([len(neighbours) for neighbours in adjacency], dtype=np.int64)
+    # Neighbours are visited in increasing degree
+    adjacency = [sorted(neighbours, key=lambda node: (degree[node], node)) for neighbours in adjacency]
+
+    visited = np.zeros(num_nodes, dtype=bool)
+    order: List[int] = []
+    # One component at a time, starting from its lowest-degree node
+    for seed in np.lexsort((np.arange(num_nodes), degree)).tolist():
+        if visited[seed]:
+            continue
+        start = _peripheral_node(adjacency, degree, seed)
+        visited[start] = True
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            order.append(node)
+            for neighbour in adjacency[node]:
+                if not visited[neighbour]:
+                    visited[neighbour] = True
+                    queue.append(neighbour)
+
+    return np.array(order[::-1], dtype=np.int64)
+
+
+def dof_permutation(node_order: np.ndarray, dofs: List[int], dofs_per_node: int = 3) -> np.ndarray:
+    """
+    Permutation of a DOF list that follows a node ordering.
+
+    Args:
+        node_order: New node order (see reverse_cuthill_mckee)
+        dofs: Global DOF indices (node * dofs_per_node + direction), e.g. the free DOFs
+        dofs_per_node: DOFs of every node
+
+    Returns:
+        perm such that dofs[perm] lists the DOFs node by node in the new order
+    """
+    rank = np.empty(len(node_order), dtype=np.int64)
+    rank[node_order] = np.arange(len(node_order))
+    dofs = np.asarray(dofs, dtype=np.int64)
+    return np.argsort(rank[dofs // dofs_per_node] * dofs_per_node + dofs % dofs_per_node, kind="stable")
+
+
+def envelope_size(node_order: np.ndarray, edges: np.ndarray, dofs_per_node: int = 3) -> Tuple[int, int]:
+    """
+    Half-bandwidth and skyline profile of K under a node ordering, from the graph alone.
+
+    Counts every DOF of every node (restraints only make K_ff smaller).
+
+    Returns:
+        (half-bandwidth, number of entries in the upper triangle from each
+        column's first nonzero down to the diagonal), both in DOFs
+    """
+    num_nodes = len(node_order)
+    rank = np.empty(num_nodes, dtype=np.int64)
+    rank[node_order] = np.arange(num_nodes)
+    ranks = rank[np.asarray(edges, dtype=np.int64).reshape(-1, 2)]
+    low, high = ranks.min(axis=1), ranks.max(axis=1)
+
+    # Lowest-ranked node coupled to each node (itself included)
+    first = np.arange(num_nodes)
+    np.minimum.at(first, high, low)
+    reach = np.arange(num_nodes) - first
+
+    d = dofs_per_node
+    bandwidth = d * int(reach.max(initial=0)) + d - 1
+    # Column d*r + i starts at row d*first[r]: height d*reach + i + 1
+    profile = int(d * d * reach.sum()) + num_nodes * d * (d + 1) // 2
+    return bandwidth, profile
+
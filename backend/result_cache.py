@@ -0,0 +1,127 @@
+"""
+Content-addressed cache of serialized analysis responses.
+
+Identical beam and frame models are re-submitted constantly (page reloads,
+toggling diagrams, shared links). Responses are stored as the exact JSON
+bytes sent to the client, keyed by a hash of the normalized request, so a
+repeat request skips both the solver and response serialization.
+
+Configured with environment variables:
+    RESULT_CACHE_MAX_ENTRIES  Maximum number of stored responses (default 1024, 0 disables)
+    RESULT_CACHE_MAX_BYTES    Maximum total size of stored responses (default 64 MiB)
+    RESULT_CACHE_TTL          Seconds before an entry expires (default 0 = never)
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+from pydantic import BaseModel
+
+
+def request_key(kind: str, request: BaseModel) -> str:
+    """
+    Canonical hash of a request.
+
+    The model is dumped by field name (so alias and field-name payloads hash
+    the same), with defaults filled in and keys sorted.
+    """
+    canonical = json.dumps(
+        request.model_dump(mode="json"),
+        sort_keys=True,
+        separators=(",", ":")
+    )
+    return f"{kind}:{hashlib.sha256(canonical.encode()).hexdigest()}"
+
+
+class ResultCache:
+    """Thread-safe LRU cache of response bytes with entry, byte-size and TTL limits."""
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024,
+                 ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl or None
+        # key -> (stored_at, body), least recently used first
+        self._entries: "OrderedDict[str, tuple[float, bytes]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @classmethod
+    def from_env(cls) -> "ResultCache":
+        return cls(
+            max_entries=int(os.environ.get("RESULT_CACHE_MAX_ENTRIES", "1024")),
+            max_bytes=int(os.environ.get("RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+            ttl=float(os.environ.get("RESULT_CACHE_TTL", "0"))
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[0] > self.ttl:
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, body: bytes):
+        # Responses larger than the whole budget are not worth caching
+        if not self.enabled or len(body) > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic(), body)
+            self._bytes += len(body)
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: str):
+        _, body = self._entries.pop(key)
+        self._bytes -= len(body)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
+
+
+# Shared cache of the API process
+result_cache = ResultCache.from_env()
@@ -0,0 +1,277 @@
+"""
+Single-flight coalescing of identical in-flight analyses.
+
+When many clients submit the same model at once (a class opening the same
+example), only one of them runs the solver; the others wait for it and share
+its serialized response.
+
+Within a process, waiters share an asyncio future per model hash. Across
+uvicorn workers on the same host (opt-in), a lock file per model hash
+serializes computations of that model; waiting workers leave a marker, and
+only then does the leader hand its result over in a short-lived result file
+that they pick up instead of solving. The files live in a directory private
+to the server's user, which is refused if another user could write to it.
+
+Configured with environment variables:
+    SINGLEFLIGHT_CROSS_PROCESS  "1" to coalesce across workers on the host (default "0")
+    SINGLEFLIGHT_DIR            Directory for lock/result files (default: $XDG_RUNTIME_DIR/structsolve-inflight,
+                                or <tmp>/structsolve-inflight-<uid>)
+    SINGLEFLIGHT_RESULT_TTL     Seconds a result file can be picked up by other workers (default 30)
+"""
+import asyncio
+import hashlib
+import os
+import stat
+import tempfile
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows: coalesce within the process only
+    fcntl = None
+
+
+# Delay between attempts to take a lock held by another worker (seconds)
+LOCK_POLL_INTERVAL = 0.01
+# Stale result and waiter files are swept after this many writes
+SWEEP_EVERY = 100
+
+
+def default_lock_dir() -> str:
+    """Per-user directory for the cross-worker files."""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "structsolve-inflight")
+    return os.path.join(tempfile.gettempdir(), f"structsolve-inflight-{os.getuid()}")
+
+
+def _private_dir(path: str) -> bool:
+    """Create path with mode 0o700, or check that an existing one is ours and closed to other users."""
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    except OSError:
+        return False
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return (stat.S_ISDIR(st.st_mode) and st.st_uid == os.getuid()
+            and stat.S_IMODE(st.st_mode) & 0o077 == 0)
+
+
+class SingleFlight:
+    """Coalesces concurrent computations that share a key."""
+
+    def __init__(self, lock_dir: Optional[str] = None, result_ttl: float = 30.0):
+        """
+        Args:
+            lock_dir: Private directory for cross-worker coalescing; None coalesces within the process only
+            result_ttl: Seconds a result file can be picked up by other workers
+        """
+        self.lock_dir = lock_dir if fcntl is not None else None
+        self.result_ttl = result_ttl
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._writes = 0
+        if self.lock_dir and not _private_dir(self.lock_dir):
+            # Another user could plant result files for any model: do not share through it
+            print(f"Single-flight directory {self.lock_dir} is not private to this user; "
+                  "coalescing within the process only")
+            self.lock_dir = None
+
+        self.leaders = 0
+        self.coalesced = 0
+        self.cross_process_waits = 0
+        self.cross_process_hits = 0
+
+    @classmethod
+    def from_env(cls) -> "SingleFlight":
+        cross_process = os.environ.get("SINGLEFLIGHT_CROSS_PROCESS", "0") == "1"
+        return cls(
+            lock_dir=(os.environ.get("SINGLEFLIGHT_DIR") or default_lock_dir()) if cross_process else None,
+            result_ttl=float(os.environ.get("SINGLEFLIGHT_RESULT_TTL", "30"))
+        )
+
+    async def run(self, key: str, compute: Callable[[], Awaitable[bytes]]) -> bytes:
+        """
+        Return compute()'s result, sharing one computation among concurrent callers.
+
+        Args:
+            key: Canonical model hash
+            compute: Coroutine factory producing the serialized response
+        """
+        while True:
+            future = self._inflight.get(key)
+            if future is None:
+                break
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # The leader's request was cancelled: take over unless we were cancelled too
+                if not future.cancelled():
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self.leaders += 1
+        try:
+            result = await self._run_across_processes(key, compute)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved when nobody is waiting
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._inflight[key]
+
+    async def _run_across_processes(self, key: str, compute: Callable[[], Awaitable[bytes]]) -> bytes:
+        if not self.lock_dir:
+            return await compute()
+
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        lock_path = os.path.join(self.lock_dir, f"{digest}.lock")
+        wait_path = os.path.join(self.lock_dir, f"{digest}.wait")
+        result_path = os.path.join(self.lock_dir, f"{digest}.result")
+
+        fd = await self._lock(lock_path, wait_path)
+        try:
+            # Another worker may have just finished the same model
+            body = self._read_result(result_path)
+            if body is not None:
+                self.cross_process_hits += 1
+                return body
+
+            body = await compute()
+            # Hand the result over only if another worker is waiting for it
+            if os.path.exists(wait_path):
+                self._write_result(result_path, body)
+                self._remove(wait_path)
+            return body
+        finally:
+            # Unlinked while still held, so the next worker locks a fresh file
+            self._remove(lock_path)
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    async def _lock(self, lock_path: str, wait_path: str) -> int:
+        """
+        Open and exclusively lock the model's lock file without blocking the event loop.
+
+        A worker that has to wait leaves a marker at wait_path. The holder
+        unlinks the lock file before releasing it, so after taking the lock
+        the file is checked to still be the one at lock_path.
+
+        Returns:
+            The locked file descriptor
+        """
+        waited = False
+        while True:
+            fd = os.open(lock_path, os.O_CREAT | os.O_RDWR | os.O_NOFOLLOW, 0o600)
+            try:
+                while True:
+                    try:
+                        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        break
+                    except BlockingIOError:
+                        if not waited:
+                            self.cross_process_waits += 1
+                            waited = True
+                            self._touch(wait_path)
+                        await asyncio.sleep(LOCK_POLL_INTERVAL)
+                try:
+                    current = os.stat(lock_path, follow_symlinks=False)
+                except FileNotFoundError:
+                    current = None
+                if current is not None and os.path.samestat(current, os.fstat(fd)):
+                    return fd
+            except BaseException:
+                os.close(fd)
+                raise
+            os.close(fd)
+
+    def _read_result(self, path: str) -> Optional[bytes]:
+        try:
+            fd = os.open(path, os.O_RDONLY | os.O_NOFOLLOW)
+        except OSError:
+            return None
+        try:
+            st = os.fstat(fd)
+            if st.st_uid != os.getuid() or time.time() - st.st_mtime > self.result_ttl:
+                return None
+            with os.fdopen(fd, "rb", closefd=False) as f:
+                return f.read()
+        except OSError:
+            return None
+        finally:
+            os.close(fd)
+
+    def _write_result(self, path: str, body: bytes):
+        try:
+            # mkstemp creates the file with O_EXCL and mode 0o600
+            fd, tmp_path = tempfile.mkstemp(dir=self.lock_dir, suffix=".tmp")
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+        except OSError:
+            self._remove(tmp_path)
+            return
+
+        self._writes += 1
+        if self._writes % SWEEP_EVERY == 0:
+            self._sweep()
+
+    @staticmethod
+    def _touch(path: str):
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_WRONLY | os.O_NOFOLLOW, 0o600))
+        except OSError:
+            pass
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _sweep(self):
+        """Delete result and waiter files too old to be picked up."""
+        cutoff = time.time() - self.result_ttl
+        try:
+            names = os.listdir(self.lock_dir)
+        except OSError:
+            return
+        for name in names:
+            if not name.endswith((".result", ".wait", ".tmp")):
+                continue
+            path = os.path.join(self.lock_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def stats(self) -> Dict:
+        return {
+            "in_flight": len(self._inflight),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "cross_process": bool(self.lock_dir),
+            "cross_process_waits": self.cross_process_waits,
+            "cross_process_hits": self.cross_process_hits
+        }
+
+
+# Shared coalescer of the API process
+single_flight = SingleFlight.from_env()
@@ -4,7 +4,8 @@ Handles continuous beams and frames with various load types.
 """
 import numpy as np
 from typing import List, Tuple, Dict
-from models import Span, Support, LoadConfig, SolutionStep
+from models import Span, Support, LoadConfig, SolutionStep, DiagramData, PiecewisePolynomial
+from banded import TridiagonalMatrix
 
 
 def calculate_fem(load: LoadConfig, length: float) -> Tuple[float, float]:
@@ -85,6 +86,274 @@ def calculate_total_fem(loads: List[LoadConfig], length: float) -> Tuple[float,
     return (fem_left_total, fem_right_total)
 
 
+# Load shapes for the vectorized diagram evaluation
+LOAD_SHAPE_UDL = 0
+LOAD_SHAPE_POINT = 1
+LOAD_SHAPE_TRIANGULAR = 2
+
+# Number of x-stations per span in the diagram data
+DIAGRAM_POINTS = 100
+
+
+def unit_load_positions(lengths: np.ndarray, step: float = None) -> np.ndarray:
+    """
+    Positions along the beam (from its left end) for influence lines.
+    
+    Args:
+        lengths: Span lengths
+        step: Spacing of the positions; default DIAGRAM_POINTS stations per span
+    
+    Returns:
+        Increasing positions from 0 to the total length, both ends included
+    """
+    edges = np.concatenate([[0.0], np.cumsum(lengths)])
+    if step is None:
+        return np.unique(np.linspace(edges[:-1], edges[1:], DIAGRAM_POINTS, axis=-1))
+    
+    positions = step * np.arange(int(np.floor(edges[-1] / step + 1e-9)) + 1)
+    if edges[-1] - positions[-1] > 1e-9 * edges[-1]:
+        positions = np.append(positions, edges[-1])
+    return np.minimum(positions, edges[-1])
+
+
+def flatten_span_loads(spans: List[Span]) -> Dict[str, np.ndarray]:
+    """
+    Flatten the loads of all spans into parallel arrays for vectorized evaluation.
+    
+    Point loads at the centre become point loads at a = L/2. MOMENT and NONE
+    loads do not enter the shear/free-moment diagrams and are skipped.
+    
+    Returns:
+        Dict with "span" (span index), "load" (index of the load in its span),
+        "shape" (LOAD_SHAPE_*), "magnitude" and "position" (a from left end,
+        0 for distributed loads) arrays
+    """
+    span_idx, load_idx, shape, magnitude, position = [], [], [], [], []
+    
+    for i, span in enumerate(spans):
+        for j, load in enumerate(span.loads):
+            if load.load_type == "UDL":
+                kind, a = LOAD_SHAPE_UDL, 0.0
+            elif load.load_type == "POINT_CENTER":
+                kind, a = LOAD_SHAPE_POINT, span.length / 2
+            elif load.load_type == "POINT_ARBITRARY":
+                kind, a = LOAD_SHAPE_POINT, load.position
+            elif load.load_type == "TRIANGULAR":
+                kind, a = LOAD_SHAPE_TRIANGULAR, 0.0
+            else:
+                continue
+            span_idx.append(i)
+            load_idx.append(j)
+            shape.append(kind)
+            magnitude.append(load.magnitude)
+            position.append(a)
+    
+    return {
+        "span": np.array(span_idx, dtype=np.int64),
+        "load": np.array(load_idx, dtype=np.int64),
+        "shape": np.array(shape, dtype=np.int64),
+        "magnitude": np.array(magnitude, dtype=float),
+        "position": np.array(position, dtype=float)
+    }
+
+
+def _sum_by_span(terms: np.ndarray, load_span: np.ndarray, num_spans: int) -> np.ndarray:
+    """
+    Add (..., loads, stations) load terms into a (..., spans, stations) array.
+    
+    Loads must be grouped by span, in the order flatten_span_loads returns them.
+    """
+    total = np.zeros(terms.shape[:-2] + (num_spans,) + terms.shape[-1:])
+    if len(load_span):
+        loaded_spans, starts = np.unique(load_span, return_index=True)
+        total[..., loaded_spans, :] = np.add.reduceat(terms, starts, axis=-2)
+    return total
+
+
+def span_load_actions(lengths: np.ndarray, loads: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Vectorized calculate_fem and load resultants of flattened span loads.
+    
+    Args:
+        lengths: Span lengths, shape (..., spans)
+        loads: Flattened loads from flatten_span_loads; "magnitude" and
+            "position" may carry the same leading dimensions as lengths
+    
+    Returns:
+        Dict of "fem_left", "fem_right", "total_load" and "moment_about_right"
+        (moment of the loads about the right support) arrays shaped like lengths
+    """
+    num_spans = lengths.shape[-1]
+    L = lengths[..., loads["span"]]
+    w = loads["magnitude"]
+    a = loads["position"]
+    b = L - a
+    udl = loads["shape"] == LOAD_SHAPE_UDL
+    point = loads["shape"] == LOAD_SHAPE_POINT
+    
+    # Per load: UDL, point load at a, triangular (zero at left, max at right)
+    terms = {
+        "fem_left": np.where(udl, -(w * L**2) / 12,
+                    np.where(point, -(w * a * b**2) / L**2, -(w * L**2) / 30)),
+        "fem_right": np.where(udl, (w * L**2) / 12,
+                     np.where(point, (w * a**2 * b) / L**2, (w * L**2) / 20)),
+        "total_load": np.where(udl, w * L, np.where(point, w, (w * L) / 2)),
+        "moment_about_right": np.where(udl, w * L * (L / 2),
+                              np.where(point, w * (L - a), ((w * L) / 2) * (L / 3)))
+    }
+    return {
+        name: _sum_by_span(term[..., None], loads["span"], num_spans)[..., 0]
+        for name, term in terms.items()
+    }
+
+
+def span_diagram_grid(x: np.ndarray, lengths: np.ndarray, loads: Dict[str, np.ndarray],
+                      R_left: np.ndarray, R_left_ss: np.ndarray,
+                      M_ab: np.ndarray, M_ba: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Evaluate SFD, FMD, EMD and BMD for all spans on a (spans x stations) grid.
+    
+    Point loads enter through Heaviside masks (x > a), UDLs and triangular
+    loads through their polynomial terms. Contributions of every load are
+    computed at once and summed into their span.
+    
+    Args:
+        x: Stations, shape (..., spans, stations)
+        lengths: Span lengths, shape (..., spans)
+        loads: Flattened loads from flatten_span_loads; "magnitude" and
+            "position" may carry the same leading dimensions as x
+        R_left: Left reactions with end moments, shape (..., spans)
+        R_left_ss: Simply-supported left reactions, shape (..., spans)
+        M_ab, M_ba: Slope deflection end moments, shape (..., spans)
+    
+    Returns:
+        Dict of "sfd", "fmd", "emd", "bmd" arrays shaped like x
+    """
+    num_spans = x.shape[-2]
+    L = lengths[..., None]
+    
+    # Station grid of the span each load acts on: (..., loads, stations)
+    xs = x[..., loads["span"], :]
+    L_load = L[..., loads["span"], :]
+    w = loads["magnitude"][..., None]
+    a = loads["position"][..., None]
+    
+    # Each load shape's terms are evaluated on its own loads only
+    shear_terms = np.empty(np.broadcast_shapes(xs.shape, w.shape))
+    moment_terms = np.empty_like(shear_terms)
+    
+    udl = loads["shape"] == LOAD_SHAPE_UDL
+    xu, wu = xs[..., udl, :], w[..., udl, :]
+    shear_terms[..., udl, :] = wu * xu
+    moment_terms[..., udl, :] = wu * xu**2 / 2
+    
+    point = loads["shape"] == LOAD_SHAPE_POINT
+    xp, wp, ap = xs[..., point, :], w[..., point, :], a[..., point, :]
+    step = xp > ap
+    shear_terms[..., point, :] = wp * step
+    moment_terms[..., point, :] = wp * (xp - ap) * step
+    
+    tri = loads["shape"] == LOAD_SHAPE_TRIANGULAR
+    xt, wt, Lt = xs[..., tri, :], w[..., tri, :], L_load[..., tri, :]
+    shear_terms[..., tri, :] = wt * xt**2 / (2 * Lt)
+    moment_terms[..., tri, :] = wt * xt**3 / (6 * Lt)
+    
+    # === Shear Force Diagram ===
+    sfd = R_left[..., None] - _sum_by_span(shear_terms, loads["span"], num_spans)
+    
+    # === Free Moment Diagram (FMD) - Simply Supported ===
+    fmd = R_left_ss[..., None] * x - _sum_by_span(moment_terms, loads["span"], num_spans)
+    
+    # === End Moment Diagram (EMD) - Linear variation ===
+    # Slope Deflection moments converted to BMD convention (hogging negative)
+    M_left_bmd = M_ab[..., None]
+    M_right_bmd = -M_ba[..., None]
+    emd = M_left_bmd + (M_right_bmd - M_left_bmd) * (x / L)
+    
+    # === Complete BMD = FMD + EMD (Superposition) ===
+    return {"sfd": sfd, "fmd": fmd, "emd": emd, "bmd": fmd + emd}
+
+
+def span_polynomials(lengths: np.ndarray, loads: Dict[str, np.ndarray],
+                     R_left: np.ndarray, M_ab: np.ndarray) -> List[Dict[str, np.ndarray]]:
+    """
+    Exact SFD and BMD of every span as piecewise polynomials.
+
+    Pieces break at the point loads inside the span. Within a piece the load
+    intensity q(x) is linear (UDLs plus triangular loads), so the shear is
+    quadratic and the moment cubic; with t measured from the piece start,
+    V(t) = V0 - q0 t - q' t²/2 and M(t) = M0 + V0 t - q0 t²/2 - q' t³/6.
+
+    Args:
+        lengths: Span lengths, shape (spans,)
+        loads: Flattened loads from flatten_span_loads
+        R_left: Left reactions with end moments, shape (spans,)
+        M_ab: Slope deflection moments at the left ends, shape (spans,)
+
+    Returns:
+        Per span a dict of "breakpoints" (pieces + 1,) in local x, and
+        "shear" (pieces, 3) and "moment" (pieces, 4) coefficients in
+        ascending powers of t
+    """
+    polynomials = []
+    for i, L in enumerate(lengths):
+        on_span = loads["span"] == i
+        shape = loads["shape"][on_span]
+        w = loads["magnitude"][on_span]
+        a = loads["position"][on_span]
+
+        point = shape == LOAD_SHAPE_POINT
+        w_point, a_point = w[point], a[point]
+        breakpoints = np.unique(np.concatenate([[0.0, L], a_point[(a_point > 0) & (a_point < L)]]))
+        x0 = breakpoints[:-1]
+
+        # q(x) = q_udl + q_slope * x
+        q_udl = w[shape == LOAD_SHAPE_UDL].sum()
+        q_slope = (w[shape == LOAD_SHAPE_TRIANGULAR] / L).sum()
+        q0 = q_udl + q_slope * x0
+
+        # Shear just right of each piece start, moment at it
+        passed = a_point <= x0[:, None]
+        V0 = R_left[i] - q_udl * x0 - q_slope * x0**2 / 2 - (passed * w_point).sum(axis=1)
+        M0 = (M_ab[i] + R_left[i] * x0 - q_udl * x0**2 / 2 - q_slope * x0**3 / 6
+              - (passed * w_point * (x0[:, None] - a_point)).sum(axis=1))
+
+        slope = np.full_like(x0, q_slope)
+        polynomials.append({
+            "breakpoints": breakpoints,
+            "shear": np.stack([V0, -q0, -slope / 2], axis=1),
+            "moment": np.stack([M0, V0, -q0 / 2, -slope / 6], axis=1)
+        })
+    return polynomials
+
+
+def piecewise_extreme(breakpoints: np.ndarray, coefficients: np.ndarray) -> Tuple[float, float]:
+    """
+    Value of largest magnitude of a piecewise polynomial and its location.
+
+    Candidates are the piece ends and the stationary points inside each piece
+    (real roots of the derivative), so the result is exact.
+
+    Args:
+        breakpoints: Piece boundaries, shape (pieces + 1,)
+        coefficients: Ascending-power coefficients in t = x - breakpoints[i], shape (pieces, degree + 1)
+
+    Returns:
+        (value, x) of the first extreme along the span
+    """
+    best_value, best_x = 0.0, float(breakpoints[0])
+    for x0, h, c in zip(breakpoints[:-1], np.diff(breakpoints), coefficients):
+        derivative = c[1:] * np.arange(1, len(c))
+        roots = np.roots(derivative[::-1]) if np.any(derivative[1:]) else np.array([])
+        roots = roots[np.abs(roots.imag) <= 1e-12 * max(h, 1.0)].real
+        t = np.concatenate([[0.0], np.sort(roots[(roots > 0) & (roots < h)]), [h]])
+        values = np.polynomial.polynomial.polyval(t, c)
+        j = int(np.argmax(np.abs(values)))
+        if abs(values[j]) > abs(best_value):
+            best_value, best_x = float(values[j]), float(x0 + t[j])
+    return best_value, best_x
+
+
 class SlopeDeflectionSolver:
     """Solver for continuous beams using the Slope Deflection Method."""
     
@@ -100,14 +369,22 @@ class SlopeDeflectionSolver:
         for support in supports:
             self.support_map[support.node_index] = support.support_type
     
-    def solve(self, include_steps: bool = True) -> Dict:
+    def solve(self, include_steps: bool = True, diagram_format: str = "sampled") -> Dict:
         """
         Main solver method.
         
+        Args:
+            include_steps: Record the solution steps
+            diagram_format: "sampled" for DIAGRAM_POINTS stations per diagram,
+                "piecewise" for exact SFD/BMD polynomials and an exact max moment
+        
         Returns:
             Dictionary with span_results, node_results, and solution_steps
         """
+        if diagram_format not in ("sampled", "piecewise"):
+            raise ValueError(f"Unknown diagram format: {diagram_format}")
         self.include_steps = include_steps
+        self.diagram_format = diagram_format
         self.step_counter = 1
         
         # Step 1: Calculate Fixed End Moments
@@ -140,6 +417,132 @@ class SlopeDeflectionSolver:
             "solution_steps": self.solution_steps if include_steps else None
         }
     
+    def influence_lines(self, positions: np.ndarray = None,
+                        sections: List[Tuple[int, float]] = None) -> Dict[str, np.ndarray]:
+        """
+        Influence lines for a unit downward point load moving along the beam.
+        
+        The stiffness matrix is factored once; the fixed end moments of every
+        unit-load position form the rows of one right-hand-side matrix that
+        is solved in a single pass. Loads on the spans are ignored.
+        
+        Args:
+            positions: Unit load positions from the left end of the beam (m);
+                default DIAGRAM_POINTS stations per span
+            sections: (span index, x from the span's left end) of the sections
+                whose moment and shear are wanted; default the midspans
+        
+        Returns:
+            Dict of arrays, one row per quantity and one column per position:
+                "positions" (positions,)
+                "rotations", "reactions" (nodes, positions)
+                "node_moments" (nodes, positions): BMD-convention moment at each
+                    node, at the end of the span to its left (first node: start
+                    of the first span)
+                "section_span", "section_x" (sections,)
+                "section_moments", "section_shears" (sections, positions)
+        """
+        if sections is None:
+            sections = [(i, span.length / 2) for i, span in enumerate(self.spans)]
+        section_span = np.array([s for s, _ in sections], dtype=np.int64)
+        section_x = np.array([x for _, x in sections], dtype=float)
+        
+        actions = self.unit_load_actions(positions)
+        section_moments, section_shears = self.section_influence(actions, section_span, section_x)
+        
+        return {
+            "positions": actions["positions"],
+            "rotations": actions["rotations"].T,
+            "reactions": actions["reactions"].T,
+            "node_moments": np.concatenate([actions["M_ab"][:, :1], -actions["M_ba"]], axis=1).T,
+            "section_span": section_span,
+            "section_x": section_x,
+            "section_moments": section_moments,
+            "section_shears": section_shears
+        }
+    
+    def unit_load_actions(self, positions: np.ndarray = None) -> Dict[str, np.ndarray]:
+        """
+        Rotations and span end actions for a unit downward load at each position.
+        
+        Args:
+            positions: Unit load positions from the left end of the beam (m);
+                default DIAGRAM_POINTS stations per span
+        
+        Returns:
+            Dict of "positions", the loaded span "load_span" and local position
+            "a" per position, "rotations" and "reactions" (positions, nodes) and
+            "M_ab", "M_ba", "R_left" (positions, spans)
+        """
+        lengths = np.array([span.length for span in self.spans])
+        EI = np.array([span.elastic_modulus * span.moment_of_inertia for span in self.spans])
+        k = (2 * EI) / lengths
+        edges = np.concatenate([[0.0], np.cumsum(lengths)])
+        
+        positions = unit_load_positions(lengths) if positions is None else np.asarray(positions, dtype=float)
+        if np.any(positions < 0) or np.any(positions > edges[-1]):
+            raise ValueError("Unit load positions must lie on the beam")
+        
+        # Span and local position a of every unit load (a load on a node goes to the span on its right)
+        load_span = np.minimum(np.searchsorted(edges, positions, side="right") - 1, self.num_spans - 1)
+        L = lengths[load_span]
+        a = positions - edges[load_span]
+        b = L - a
+        loaded = load_span[:, None] == np.arange(self.num_spans)
+        fem_left = loaded * (-(a * b**2) / L**2)[:, None]
+        fem_right = loaded * ((a**2 * b) / L**2)[:, None]
+        
+        # One FEM load vector per position, all solved with one factorization
+        K, _ = self._assemble_system([(0.0, 0.0)] * self.num_spans)
+        K_reduced, _, free_dofs = self._apply_boundary_conditions(K, np.zeros(self.num_nodes))
+        F = np.zeros((len(positions), self.num_nodes))
+        F[:, :-1] -= fem_left
+        F[:, 1:] -= fem_right
+        rotations = np.zeros((len(positions), self.num_nodes))
+        if free_dofs:
+            rotations[:, free_dofs] = K_reduced.factorize().solve(F[:, free_dofs])
+        
+        theta_a = rotations[:, :-1]
+        theta_b = rotations[:, 1:]
+        M_ab = k * (2 * theta_a + theta_b) + fem_left
+        M_ba = k * (2 * theta_b + theta_a) + fem_right
+        R_left = (-M_ab - M_ba + loaded * (L - a)[:, None]) / lengths
+        R_right = loaded - R_left
+        
+        reactions = np.zeros((len(positions), self.num_nodes))
+        reactions[:, 1:] += R_right
+        reactions[:, :-1] += R_left
+        
+        return {
+            "positions": positions,
+            "load_span": load_span,
+            "a": a,
+            "rotations": rotations,
+            "reactions": reactions,
+            "M_ab": M_ab,
+            "M_ba": M_ba,
+            "R_left": R_left
+        }
+    
+    def section_influence(self, actions: Dict[str, np.ndarray], section_span: np.ndarray,
+                          section_x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Moment and shear influence lines at sections, from unit_load_actions.
+        
+        Returns:
+            (moments, shears), each of shape (sections, positions)
+        """
+        if np.any(section_span < 0) or np.any(section_span >= self.num_spans):
+            raise ValueError("Influence line section on a non-existent span")
+        
+        # End moment and left reaction of the span, minus the unit load once passed
+        a = actions["a"][:, None]
+        passed = (actions["load_span"][:, None] == section_span) * (section_x > a)
+        R_left = actions["R_left"][:, section_span]
+        moments = actions["M_ab"][:, section_span] + R_left * section_x - passed * (section_x - a)
+        shears = R_left - passed
+        return moments.T, shears.T
+    
     def _add_step(self, description: str, equation: str = None, result: str = None):
         """Add a solution step for educational output."""
         if self.include_steps:
@@ -166,7 +569,7 @@ class SlopeDeflectionSolver:
         
         return fems
     
-    def _assemble_system(self, fems: List[Tuple[float, float]]) -> Tuple[np.ndarray, np.ndarray]:
+    def _assemble_system(self, fems: List[Tuple[float, float]]) -> Tuple[TridiagonalMatrix, np.ndarray]:
         """
         Assemble global stiffness matrix and force vector.
         
@@ -175,38 +578,35 @@ class SlopeDeflectionSolver:
         
         For beams without sway (ψ = 0):
         M_ij = (2EI/L)(2θ_i + θ_j) + FEM_ij
+        
+        Span i only couples nodes i and i+1, so K is tridiagonal and is
+        stored as its three diagonals.
         """
-        K = np.zeros((self.num_nodes, self.num_nodes))
+        lengths = np.array([span.length for span in self.spans])
+        EI = np.array([span.elastic_modulus * span.moment_of_inertia for span in self.spans])
+        k = (2 * EI) / lengths
+        fem_left, fem_right = np.array(fems, dtype=float).reshape(-1, 2).T
+        
+        K = TridiagonalMatrix.zeros(self.num_nodes)
         F = np.zeros(self.num_nodes)
         
-        for i, span in enumerate(self.spans):
-            L = span.length
-            EI = span.elastic_modulus * span.moment_of_inertia
-            k = (2 * EI) / L
-            
-            fem_left, fem_right = fems[i]
-            
-            # Node indices
-            node_a = i
-            node_b = i + 1
-            
-            # Equilibrium at node A: Sum of moments = 0
-            # M_ab contributes: k(2θ_a + θ_b) + FEM_ab
-            # Coefficient of θ_a is 2k, coefficient of θ_b is k
-            K[node_a, node_a] += 2 * k
-            K[node_a, node_b] += k
-            F[node_a] -= fem_left
-            
-            # Equilibrium at node B
-            # M_ba contributes: k(2θ_b + θ_a) + FEM_ba
-            # Coefficient of θ_b is 2k, coefficient of θ_a is k
-            K[node_b, node_b] += 2 * k
-            K[node_b, node_a] += k
-            F[node_b] -= fem_right
+        # Equilibrium at node A (left end of each span): Sum of moments = 0
+        # M_ab contributes: k(2θ_a + θ_b) + FEM_ab
+        # Coefficient of θ_a is 2k, coefficient of θ_b is k
+        K.diag[:-1] += 2 * k
+        K.upper += k
+        F[:-1] -= fem_left
+        
+        # Equilibrium at node B (right end of each span)
+        # M_ba contributes: k(2θ_b + θ_a) + FEM_ba
+        # Coefficient of θ_b is 2k, coefficient of θ_a is k
+        K.diag[1:] += 2 * k
+        K.lower += k
+        F[1:] -= fem_right
         
         return K, F
     
-    def _apply_boundary_conditions(self, K: np.ndarray, F: np.ndarray) -> Tuple[np.ndarray, np.ndarray, List[int]]:
+    def _apply_boundary_conditions(self, K: TridiagonalMatrix, F: np.ndarray) -> Tuple[TridiagonalMatrix, np.ndarray, List[int]]:
         """
         Apply boundary conditions by removing rows/columns for fixed supports.
         
@@ -223,20 +623,20 @@ class SlopeDeflectionSolver:
             if support_type in ["PINNED", "ROLLER"]:
                 free_dofs.append(node_idx)
         
-        # Extract reduced system
-        K_reduced = K[np.ix_(free_dofs, free_dofs)]
+        # Extract reduced system (still tridiagonal)
+        K_reduced = K.reduce(free_dofs)
         F_reduced = F[free_dofs]
         
         return K_reduced, F_reduced, free_dofs
     
-    def _solve_rotations(self, K_reduced: np.ndarray, F_reduced: np.ndarray, 
+    def _solve_rotations(self, K_reduced: TridiagonalMatrix, F_reduced: np.ndarray, 
                         free_dofs: List[int]) -> np.ndarray:
         """Solve for unknown rotations."""
         rotations = np.zeros(self.num_nodes)
         
         if len(free_dofs) > 0:
-            # Solve reduced system
-            theta_free = np.linalg.solve(K_reduced, F_reduced)
+            # Solve reduced system in O(n) (Thomas algorithm)
+            theta_free = K_reduced.solve(F_reduced)
             
             # Map back to full rotation vector
             for i, dof in enumerate(free_dofs):
@@ -256,6 +656,7 @@ class SlopeDeflectionSolver:
         Uses FBD method for reactions and separates FMD, EMD, and BMD.
         """
         span_results = []
+        end_actions = []
         
         for i, span in enumerate(self.spans):
             L = span.length
@@ -272,16 +673,23 @@ class SlopeDeflectionSolver:
             
             # Calculate reactions using FBD method
             R_left, R_right = self._calculate_span_reactions(span, M_ab, M_ba)
-            
-            # Generate diagram data (SFD, FMD, EMD, BMD)
-            diagram_data = self._generate_diagram_data(span, M_ab, M_ba, R_left, R_right)
-            
-            # Find maximum moment and its location
-            bmd_values = diagram_data["bmd_data"].values
-            max_moment_idx = np.argmax(np.abs(bmd_values))
-            max_moment = bmd_values[max_moment_idx]
-            max_location = diagram_data["bmd_data"].x_coords[max_moment_idx]
-
+            end_actions.append((M_ab, M_ba, R_left, R_right))
+        
+        end_actions = np.array(end_actions).reshape(-1, 4)
+        if self.diagram_format == "piecewise":
+            diagram_data, max_moments, max_locations = self._generate_diagram_pieces(end_actions)
+        else:
+            diagram_data, max_moments, max_locations = self._sample_diagrams(end_actions)
+        
+        for i, span in enumerate(self.spans):
+            M_ab, M_ba, R_left, R_right = end_actions[i]
+            EI = span.elastic_modulus * span.moment_of_inertia
+            k = (2 * EI) / span.length
+            theta_a = rotations[i]
+            theta_b = rotations[i + 1]
+            fem_left, _ = fems[i]
+            max_moment = float(max_moments[i])
+            max_location = float(max_locations[i])
             
             span_results.append({
                 "span_index": i,
@@ -291,7 +699,7 @@ class SlopeDeflectionSolver:
                 "shear_right": -R_right,  # Negative because it acts downward on span
                 "max_moment": max_moment,
                 "max_moment_location": max_location,
-                **diagram_data  # Include sfd_data, fmd_data, emd_data, bmd_data
+                **diagram_data[i]  # sfd_data, fmd_data, emd_data, bmd_data or sfd_pieces, bmd_pieces
             })
             
             if self.include_steps:
@@ -366,61 +774,89 @@ class SlopeDeflectionSolver:
         
         return (R_left, R_right)
     
-    def _generate_diagram_data(self, span: 'Span', M_ab: float, M_ba: float, 
-                              R_left: float, R_right: float) -> Dict:
+    def _sample_diagrams(self, end_actions: np.ndarray) -> Tuple[List[Dict], np.ndarray, np.ndarray]:
         """
-        Generate data points for SFD, FMD, EMD, and BMD.
-        
-        Key: Separates Free Moment Diagram (FMD) and End Moment Diagram (EMD),
-        then superposes them to get complete BMD.
+        Sampled diagram data of every span and the sampled maximum moment.
         
-        Sign Convention Translation:
-        - Slope Deflection: Clockwise (-), Counter-Clockwise (+)
-        - BMD: Sagging (+), Hogging (-)
+        Returns:
+            (per span dict of sfd_data, fmd_data, emd_data, bmd_data,
+             max moments, their locations)
         """
-        L = span.length
-        num_points = 100
-        x_coords = np.linspace(0, L, num_points).tolist()
+        diagrams = self._generate_diagram_grid(end_actions)
+        
+        # Find maximum moment and its location
+        bmd = diagrams["bmd"]
+        max_moment_idx = np.argmax(np.abs(bmd), axis=1)
+        max_moments = bmd[np.arange(self.num_spans), max_moment_idx]
+        max_locations = diagrams["x"][np.arange(self.num_spans), max_moment_idx]
+        
+        diagram_data = []
+        for i in range(self.num_spans):
+            x_coords = diagrams["x"][i].tolist()
+            diagram_data.append({
+                f"{name}_data": DiagramData(x_coords=x_coords, values=diagrams[name][i].tolist())
+                for name in ("sfd", "fmd", "emd", "bmd")
+            })
+        return diagram_data, max_moments, max_locations
+    
+    def _generate_diagram_pieces(self, end_actions: np.ndarray) -> Tuple[List[Dict], np.ndarray, np.ndarray]:
+        """
+        Exact SFD/BMD polynomials of every span and the exact maximum moment.
         
-        sfd_values = []
-        fmd_values = []
-        emd_values = []
+        The largest |BMD| lies at a piece end or where the shear vanishes,
+        so it is taken from the roots of each shear piece.
         
-        # Calculate simply-supported reaction for FMD
-        # (as if there were no end moments)
-        R_left_ss = self._calculate_simply_supported_reaction(span)
+        Returns:
+            (per span dict of sfd_pieces, bmd_pieces, max moments, their locations)
+        """
+        lengths = np.array([span.length for span in self.spans])
+        polynomials = span_polynomials(
+            lengths, flatten_span_loads(self.spans),
+            R_left=end_actions[:, 2], M_ab=end_actions[:, 0]
+        )
+        
+        diagram_data, max_moments, max_locations = [], [], []
+        for poly in polynomials:
+            breakpoints = poly["breakpoints"].tolist()
+            diagram_data.append({
+                f"{name}_pieces": PiecewisePolynomial(breakpoints=breakpoints, coefficients=poly[kind].tolist())
+                for name, kind in (("sfd", "shear"), ("bmd", "moment"))
+            })
+            max_moment, max_location = piecewise_extreme(poly["breakpoints"], poly["moment"])
+            max_moments.append(max_moment)
+            max_locations.append(max_location)
+        return diagram_data, np.array(max_moments), np.array(max_locations)
+    
+    def _generate_diagram_grid(self, end_actions: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Generate data points for SFD, FMD, EMD, and BMD of every span.
         
-        for x in x_coords:
-            # === Shear Force Diagram ===
-            shear = self._calculate_shear_at_x(span, x, R_left)
-            sfd_values.append(shear)
-            
-            # === Free Moment Diagram (FMD) - Simply Supported ===
-            fmd = self._calculate_free_moment_at_x(span, x, R_left_ss)
-            fmd_values.append(fmd)
-            
-            # === End Moment Diagram (EMD) - Linear variation ===
-            # CRITICAL: Sign convention translation
-            # Slope Deflection moments need to be converted to BMD convention
-            # For hogging (tension on top): negative in BMD
-            M_left_bmd = M_ab  # Keep as is (will be negative for hogging)
-            M_right_bmd = -M_ba # Negate (SD 'positive' hogging -> BMD 'negative' hogging)
-            
-            # Linear interpolation
-            emd = M_left_bmd + (M_right_bmd - M_left_bmd) * (x / L)
-            emd_values.append(emd)
+        Key: Separates Free Moment Diagram (FMD) and End Moment Diagram (EMD),
+        then superposes them to get complete BMD.
         
-        # === Complete BMD = FMD + EMD (Superposition) ===
-        bmd_values = [fmd + emd for fmd, emd in zip(fmd_values, emd_values)]
+        Sign Convention Translation:
+        - Slope Deflection: Clockwise (-), Counter-clockwise (+)
+        - BMD: Sagging (+), Hogging (-)
         
-        from models import DiagramData
+        Args:
+            end_actions: (spans, 4) array of (M_ab, M_ba, R_left, R_right)
         
-        return {
-            "sfd_data": DiagramData(x_coords=x_coords, values=sfd_values),
-            "fmd_data": DiagramData(x_coords=x_coords, values=fmd_values),
-            "emd_data": DiagramData(x_coords=x_coords, values=emd_values),
-            "bmd_data": DiagramData(x_coords=x_coords, values=bmd_values)
-        }
+        Returns:
+            Dict of "x", "sfd", "fmd", "emd", "bmd" arrays of shape (spans, DIAGRAM_POINTS)
+        """
+        lengths = np.array([span.length for span in self.spans])
+        x = np.linspace(0, lengths, DIAGRAM_POINTS, axis=-1)
+        
+        # Simply-supported reactions for FMD (as if there were no end moments)
+        R_left_ss = np.array([self._calculate_simply_supported_reaction(span) for span in self.spans])
+        
+        diagrams = span_diagram_grid(
+            x, lengths, flatten_span_loads(self.spans),
+            R_left=end_actions[:, 2], R_left_ss=R_left_ss,
+            M_ab=end_actions[:, 0], M_ba=end_actions[:, 1]
+        )
+        diagrams["x"] = x
+        return diagrams
     
     def _calculate_simply_supported_reaction(self, span: 'Span') -> float:
         """Calculate left reaction as if beam were simply supported (no end moments)."""
@@ -442,59 +878,6 @@ class SlopeDeflectionSolver:
         
         return moment_about_right / L
     
-    def _calculate_shear_at_x(self, span: 'Span', x: float, R_left: float) -> float:
-        """Calculate shear force at position x along the span."""
-        shear = R_left
-        
-        for load in span.loads:
-            w = load.magnitude
-            
-            if load.load_type == "UDL":
-                # Subtract distributed load up to point x
-                shear -= w * x
-            
-            elif load.load_type == "POINT_CENTER":
-                if x > span.length / 2:
-                    shear -= w
-            
-            elif load.load_type == "POINT_ARBITRARY":
-                if x > load.position:
-                    shear -= w
-            
-            elif load.load_type == "TRIANGULAR":
-                # Triangular load intensity at x: w_x = w * (x / L)
-                # Resultant up to x: (w * x / L) * x / 2 = w * x² / (2L)
-                shear -= w * x**2 / (2 * span.length)
-        
-        return shear
-    
-    def _calculate_free_moment_at_x(self, span: 'Span', x: float, R_left: float) -> float:
-        """Calculate free moment (simply supported) at position x."""
-        moment = R_left * x
-        
-        for load in span.loads:
-            w = load.magnitude
-            
-            if load.load_type == "UDL":
-                # M = R*x - w*x²/2
-                moment -= w * x**2 / 2
-            
-            elif load.load_type == "POINT_CENTER":
-                if x > span.length / 2:
-                    moment -= w * (x - span.length / 2)
-            
-            elif load.load_type == "POINT_ARBITRARY":
-                if x > load.position:
-                    moment -= w * (x - load.position)
-            
-            elif load.load_type == "TRIANGULAR":
-                # For triangular load, moment contribution is more complex
-                # Resultant acts at centroid of triangle up to x
-                # M = w * x³ / (6L)
-                moment -= w * x**3 / (6 * span.length)
-        
-        return moment
-    
     def _calculate_reactions(self, span_results: List[Dict], 
                             rotations: np.ndarray) -> List[Dict]:
         """
@@ -0,0 +1,591 @@
+"""
+Factorizations of the reduced frame stiffness matrix K_ff.
+
+A factor is computed once per solve and then back-substitutes any number of
+right-hand sides, so every load case on the same geometry shares it.
+
+The factorization doubles as the stability check: K_ff of a stable structure
+is symmetric positive definite, so a pivot that vanishes relative to its
+diagonal entry marks a DOF that is free to move without resistance (a
+mechanism).
+"""
+import numpy as np
+from typing import Callable, List
+
+try:
+    import scipy.linalg as sla
+    import scipy.sparse as sp
+    import scipy.sparse.linalg as spla
+except ImportError:  # SciPy is optional: fall back to NumPy's LAPACK bindings
+    sla = None
+    sp = None
+    spla = None
+
+
+UNSTABLE_MESSAGE = "Structure is unstable (singular stiffness matrix)"
+
+# A pivot below this fraction of its original diagonal entry is a mechanism DOF
+PIVOT_TOLERANCE = 1e-12
+# Diagonal shift (relative to the largest diagonal entry) used to extract mechanism modes
+MECHANISM_SHIFT = 1e-10
+# DOFs moving at least this fraction of the largest mechanism displacement are reported
+MECHANISM_MODE_THRESHOLD = 1e-4
+# Pivots of a float32 factor below this fraction of their diagonal entry are not trusted
+# (mechanism pivots are round-off, of order eps(float32)): the solve is redone in float64
+LOW_PRECISION_PIVOT_TOLERANCE = 100 * float(np.finfo(np.float32).eps)
+# Refinement steps of a mixed-precision solve before it is redone in float64 (as in LAPACK's dsposv)
+MAX_REFINEMENT_STEPS = 30
+
+
+class StructureUnstableError(ValueError):
+    """K_ff is singular; `dofs` lists the (K_ff-local) DOFs forming the mechanism."""
+
+    def __init__(self, dofs: List[int] = None, message: str = UNSTABLE_MESSAGE):
+        super().__init__(message)
+        self.dofs = sorted(dofs or [])
+
+
+class RefinementNotConvergedError(ValueError):
+    """Iterative refinement of a low-precision solve did not reach float64 accuracy."""
+
+
+def _weak_pivots(pivots: np.ndarray, diagonal: np.ndarray, tolerance: float = PIVOT_TOLERANCE) -> List[int]:
+    """DOFs whose pivot has (numerically) vanished relative to their diagonal entry."""
+    scale = np.maximum(np.abs(diagonal), np.finfo(float).tiny)
+    return np.flatnonzero(~(pivots > tolerance * scale)).tolist()
+
+
+def _check_pivots(pivots, diagonal: np.ndarray, K_ff, dtype, shifted_solve: Callable = None) -> None:
+    """
+    Raise StructureUnstableError if the factorization failed (pivots is None) or a pivot is weak.
+
+    Mechanism DOFs are only located for float64 factors: a low-precision
+    factor that fails is retried in float64 (see RefinedFactor).
+
+    Args:
+        shifted_solve: See _mechanism_dofs
+    """
+    if np.dtype(dtype) == np.float64:
+        if pivots is None or _weak_pivots(pivots, diagonal):
+            raise StructureUnstableError(_mechanism_dofs(K_ff, diagonal, shifted_solve))
+    elif pivots is None or _weak_pivots(pivots, diagonal, LOW_PRECISION_PIVOT_TOLERANCE):
+        raise StructureUnstableError()
+
+
+def _mechanism_dofs(K_ff, diagonal: np.ndarray, shifted_solve: Callable = None) -> List[int]:
+    """
+    DOFs that move in the mechanism mode(s) of a singular K_ff.
+
+    One step of inverse iteration on K_ff + shift*I: the response to an
+    arbitrary load is dominated by the near-null (mechanism) modes, so the
+    DOFs with a significant share of it are the ones that form the mechanism.
+
+    Args:
+        K_ff: Dense or SciPy sparse K_ff (solved directly), or any K_ff if shifted_solve is given
+        shifted_solve: shifted_solve(shift, rhs) -> (K_ff + shift*I)^-1 rhs, or None
+            if that factorization fails; band and profile factors pass one that
+            refactorizes in their own storage, so K_ff is never densified
+    """
+    n = K_ff.shape[0]
+    shift = MECHANISM_SHIFT * max(np.abs(diagonal).max(initial=0.0), 1.0)
+    rhs = np.random.default_rng(0).standard_normal(n)
+
+    try:
+        if shifted_solve is not None:
+            x = shifted_solve(shift, rhs)
+        elif sp is not None and sp.issparse(K_ff):
+            x = spla.splu(sp.csc_matrix(K_ff + shift * sp.identity(n))).solve(rhs)
+        else:
+            x = np.linalg.solve(K_ff + shift * np.eye(n), rhs)
+    except (RuntimeError, np.linalg.LinAlgError, StructureUnstableError):
+        x = None
+
+    if x is None or not np.all(np.isfinite(x)):
+        # Fall back to DOFs without any stiffness of their own
+        return np.flatnonzero(diagonal == 0).tolist()
+
+    x = np.abs(x)
+    return np.flatnonzero(x > MECHANISM_MODE_THRESHOLD * x.max()).tolist()
+
+
+class TripletMatrix:
+    """
+    Square matrix as (row, col, value) triplets; duplicates add up.
+
+    Lets band and profile factors build their storage from the assembled
+    member contributions without a dense n x n K or a SciPy sparse matrix.
+    """
+
+    def __init__(self, rows: np.ndarray, cols: np.ndarray, vals: np.ndarray, size: int):
+        self.rows = np.asarray(rows, dtype=np.int64)
+        self.cols = np.asarray(cols, dtype=np.int64)
+        self.vals = np.asarray(vals, dtype=float)
+        self.shape = (size, size)
+
+    def submatrix(self, dofs: List[int]) -> "TripletMatrix":
+        """K[dofs][:, dofs], renumbered 0..len(dofs) - 1."""
+        new_index = np.full(self.shape[0], -1, dtype=np.int64)
+        new_index[dofs] = np.arange(len(dofs))
+        rows, cols = new_index[self.rows], new_index[self.cols]
+        keep = (rows >= 0) & (cols >= 0)
+        return TripletMatrix(rows[keep], cols[keep], self.vals[keep], len(dofs))
+
+    def diagonal(self) -> np.ndarray:
+        on_diagonal = self.rows == self.cols
+        return np.bincount(self.rows[on_diagonal], self.vals[on_diagonal], minlength=self.shape[0])
+
+    def toarray(self) -> np.ndarray:
+        K = np.zeros(self.shape)
+        np.add.at(K, (self.rows, self.cols), self.vals)
+        return K
+
+    def __matmul__(self, x: np.ndarray) -> np.ndarray:
+        x = np.asarray(x, dtype=float)
+        out = np.zeros((self.shape[0],) + x.shape[1:])
+        np.add.at(out, self.rows, self.vals.reshape((-1,) + (1,) * (x.ndim - 1)) * x[self.cols])
+        return out
+
+
+class DenseCholeskyFactor:
+    """Cholesky factor of a dense K_ff with pivot-based mechanism detection."""
+
+    def __init__(self, K_ff: np.ndarray, dtype=np.float64):
+        """
+        Args:
+            K_ff: Dense K_ff
+            dtype: Precision of the factor (float64, or float32 for RefinedFactor)
+        """
+        self.size = K_ff.shape[0]
+        K_ff = np.asarray(K_ff, dtype=dtype)
+        diagonal = np.diag(K_ff)
+
+        factor = self._cholesky(K_ff)
+        _check_pivots(np.diag(factor) ** 2 if factor is not None else None, diagonal, K_ff, dtype)
+        self._upper = factor
+
+    @staticmethod
+    def _cholesky(K: np.ndarray):
+        """Upper Cholesky factor (in K's precision), or None if a pivot is not positive."""
+        if sla is not None:
+            potrf, = sla.lapack.get_lapack_funcs(("potrf",), (K,))
+            factor, info = potrf(K, lower=0, clean=1, overwrite_a=0)
+            return factor if info == 0 else None
+
+        try:
+            return np.linalg.cholesky(K).T
+        except np.linalg.LinAlgError:
+            return None
+
+    def solve(self, rhs: np.ndarray) -> np.ndarray:
+        """Solve K_ff u = rhs for a vector or an (n, n_cases) matrix of RHS."""
+        if sla is not None:
+            u = sla.cho_solve((self._upper, False), rhs, check_finite=False)
+        else:
+            u = self._substitute(np.asarray(rhs, dtype=self._upper.dtype))
+
+        if not np.all(np.isfinite(u)):
+            raise StructureUnstableError()
+        return u
+
+    def _substitute(self, rhs: np.ndarray) -> np.ndarray:
+        """Forward and back substitution with the triangular factor, all RHS columns at once (NumPy path)."""
+        U, n = self._upper, self.size
+        shape = rhs.shape
+        x = rhs.reshape(n, -1).copy()
+
+        # U^T y = rhs, row by row
+        for i in range(n):
+            x[i] = (x[i] - U[:i, i] @ x[:i]) / U[i, i]
+        # U u = y, row by row from the end
+        for i in range(n - 1, -1, -1):
+            x[i] = (x[i] - U[i, i + 1:] @ x[i + 1:]) / U[i, i]
+        return x.reshape(shape)
+
+
+class SparseLUFactor:
+    """SuperLU factor of a sparse K_ff (requires SciPy) with pivot-based mechanism detection."""
+
+    def __init__(self, K_ff, dtype=np.float64):
+        """
+        Args:
+            K_ff: SciPy sparse K_ff
+            dtype: Precision of the factor (float64, or float32 for RefinedFactor)
+        """
+        self.size = K_ff.shape[0]
+        K_csc = sp.csc_matrix(K_ff, dtype=dtype)
+        diagonal = K_csc.diagonal()
+
+        try:
+            self._lu = spla.splu(K_csc)
+        except RuntimeError:  # "Factor is exactly singular"
+            _check_pivots(None, diagonal, K_csc, dtype)
+
+        # Column c of K_ff is eliminated at position perm_c[c]
+        pivots = np.abs(self._lu.U.diagonal())[self._lu.perm_c]
+        _check_pivots(pivots, diagonal, K_csc, dtype)
+        self._dtype = dtype
+
+    def solve(self, rhs: np.ndarray) -> np.ndarray:
+        """Solve K_ff u = rhs for a vector or an (n, n_cases) matrix of RHS."""
+        u = self._lu.solve(np.asarray(rhs, dtype=self._dtype))
+        if not np.all(np.isfinite(u)):
+            raise StructureUnstableError()
+        return u
+
+
+def _permuted_upper_triplets(K, permutation: np.ndarray):
+    """(rows, cols, values) of the upper triangle (rows <= cols) of P K P^T."""
+    rank = np.empty(len(permutation), dtype=np.int64)
+    rank[permutation] = np.arange(len(permutation))
+    if isinstance(K, TripletMatrix):
+        rows, cols, vals = rank[K.rows], rank[K.cols], K.vals
+    elif sp is not None and sp.issparse(K):
+        coo = K.tocoo()
+        rows, cols, vals = rank[coo.row], rank[coo.col], coo.data
+    else:
+        rows, cols = np.nonzero(K)
+        vals = K[rows, cols]
+        rows, cols = rank[rows], rank[cols]
+    upper = rows <= cols
+    return rows[upper], cols[upper], vals[upper]
+
+
+def _band_storage(K, permutation: np.ndarray, dtype=np.float64) -> np.ndarray:
+    """
+    Lower band of P K P^T in LAPACK storage: band[i - j, j] = K_p[i, j] for i >= j.
+
+    Args:
+        K: Dense, SciPy sparse or TripletMatrix symmetric matrix
+        permutation: K_p[i, j] = K[permutation[i], permutation[j]]
+        dtype: Precision of the band
+    """
+    # K_p[i, j] for i >= j is the mirror of the upper entry K_p[j, i]
+    cols, rows, vals = _permuted_upper_triplets(K, permutation)
+    band = np.zeros((int((rows - cols).max(initial=0)) + 1, K.shape[0]), dtype=dtype)
+    np.add.at(band, (rows - cols, cols), vals.astype(dtype, copy=False))
+    return band
+
+
+class BandedCholeskyFactor:
+    """
+    Cholesky factor of a permuted K_ff in band storage, with pivot-based mechanism detection.
+
+    With a bandwidth-reducing permutation (see reordering.reverse_cuthill_mckee)
+    the factorization costs O(n b^2) instead of O(n^3) for half-bandwidth b.
+    Uses LAPACK's dpbtrf when SciPy is installed, a NumPy column sweep otherwise.
+    Right-hand sides and solutions use the original K_ff numbering.
+    """
+
+    def __init__(self, K_ff, permutation: np.ndarray = None, dtype=np.float64):
+        """
+        Args:
+            K_ff: Dense, SciPy sparse or TripletMatrix K_ff
+            permutation: Elimination order of the K_ff DOFs; default the identity
+            dtype: Precision of the factor (float64, or float32 for RefinedFactor)
+        """
+        self.size = K_ff.shape[0]
+        self.permutation = np.arange(self.size) if permutation is None else np.asarray(permutation)
+        diagonal = K_ff.diagonal()
+
+        band = _band_storage(K_ff, self.permutation, dtype)
+        self.bandwidth = band.shape[0] - 1
+        factor = self._cholesky(band)
+        pivots = None
+        if factor is not None:
+            # In the original K_ff order, like the diagonal
+            pivots = np.empty(self.size)
+            pivots[self.permutation] = factor[0] ** 2
+        _check_pivots(pivots, diagonal, K_ff, dtype, lambda shift, rhs: self._shifted_solve(band, shift, rhs))
+        self._band = factor
+
+    def _shifted_solve(self, band: np.ndarray, shift: float, rhs: np.ndarray):
+        """(K_ff + shift*I)^-1 rhs from the unfactorized band, or None if it is not positive definite."""
+        shifted = band.copy()
+        shifted[0] += shift
+        self._band = self._cholesky(shifted)
+        if self._band is None:
+            return None
+        return self.solve(rhs)
+
+    @staticmethod
+    def _cholesky(band: np.ndarray):
+        """Lower Cholesky factor in the same band storage and precision, or None if a pivot is not positive."""
+        if sla is not None:
+            pbtrf, = sla.lapack.get_lapack_funcs(("pbtrf",), (band,))
+            factor, info = pbtrf(band, lower=1)
+            return factor if info == 0 else None
+
+        b, n = band.shape[0] - 1, band.shape[1]
+        # Padded with b columns so the trailing updates never run off the end
+        L = np.concatenate([band, np.zeros((b + 1, b), dtype=band.dtype)], axis=1)
+        r, c = np.tril_indices(b)
+        for j in range(n):
+            pivot = L[0, j]
+            if not pivot > 0:
+                return None
+            L[:, j] /= np.sqrt(pivot)
+            column = L[1:, j]
+            # A[j+1+r, j+1+c] -= L[j+1+r, j] L[j+1+c, j] for r >= c
+            L[r - c, j + 1 + c] -= column[r] * column[c]
+        return L[:, :n]
+
+    def solve(self, rhs: np.ndarray) -> np.ndarray:
+        """Solve K_ff u = rhs for a vector or an (n, n_cases) matrix of RHS."""
+        rhs = np.asarray(rhs, dtype=self._band.dtype)[self.permutation]
+        if sla is not None:
+            u_perm = sla.cho_solve_banded((self._band, True), rhs, check_finite=False)
+        else:
+            u_perm = self._substitute(rhs)
+
+        u = np.empty_like(u_perm)
+        u[self.permutation] = u_perm
+        if not np.all(np.isfinite(u)):
+            raise StructureUnstableError()
+        return u
+
+    def _substitute(self, rhs: np.ndarray) -> np.ndarray:
+        """Forward and back substitution with the banded factor (NumPy path)."""
+        L, b, n = self._band, self.bandwidth, self.size
+        shape = rhs.shape
+        x = np.concatenate([rhs.reshape(n, -1), np.zeros((b, rhs.size // n if n else 0), dtype=rhs.dtype)])
+
+        # L y = rhs, column by column
+        for j in range(n):
+            x[j] /= L[0, j]
+            x[j + 1:j + 1 + b] -= np.outer(L[1:, j], x[j])
+        # L^T u = y, row by row from the end
+        for j in range(n - 1, -1, -1):
+            x[j] = (x[j] - L[1:, j] @ x[j + 1:j + 1 + b]) / L[0, j]
+        return x[:n].reshape(shape)
+
+
+class SkylineLDLFactor:
+    """
+    LDL^T factor of a permuted K_ff in skyline (profile) storage, in pure NumPy.
+
+    Column j stores the upper triangle from its first nonzero row down to the
+    diagonal, so memory follows the profile of K_ff rather than n^2 or a
+    uniform band; the factor fills in only inside that profile. The
+    factorization is right-looking: each pivot updates, in one vectorized
+    step, the entries of the columns whose skyline reaches above it. Weak
+    pivots mark a mechanism, as for the other factors.
+    """
+
+    def __init__(self, K_ff, permutation: np.ndarray = None, dtype=np.float64):
+        """
+        Args:
+            K_ff: Dense, SciPy sparse or TripletMatrix K_ff
+            permutation: Elimination order of the K_ff DOFs, e.g. after RCM; default the identity
+            dtype: Precision of the factor (float64, or float32 for RefinedFactor)
+        """
+        n = self.size = K_ff.shape[0]
+        self.permutation = np.arange(n) if permutation is None else np.asarray(permutation)
+        diagonal = K_ff.diagonal()
+
+        # Skyline storage: column j holds rows first[j]..j at values[start[j]:start[j + 1]]
+        rows, cols, vals = _permuted_upper_triplets(K_ff, self.permutation)
+        first = np.arange(n)
+        np.minimum.at(first, cols, rows)
+        heights = np.arange(n) - first + 1
+        start = np.concatenate([[0], np.cumsum(heights)])
+        self.first, self.start = first, start
+        self.diagonal_index = start[1:] - 1
+        # values index of every upper triplet
+        self._entries = (start[cols] + rows - first[cols], vals)
+        self._load(dtype)
+
+        factorized = self._factorize()
+        pivots = None
+        if factorized is not None:
+            # In the original K_ff order, like the diagonal
+            pivots = np.empty(n)
+            pivots[self.permutation] = factorized
+        _check_pivots(pivots, diagonal, K_ff, dtype, self._shifted_solve)
+        del self._entries
+
+    def _load(self, dtype, shift: float = 0.0):
+        """Fill the skyline with K_ff (+ shift*I) before factorizing."""
+        index, vals = self._entries
+        self.values = np.zeros(self.start[-1], dtype=dtype)
+        np.add.at(self.values, index, vals.astype(dtype, copy=False))
+        self.values[self.diagonal_index] += shift
+
+    def _shifted_solve(self, shift: float, rhs: np.ndarray):
+        """(K_ff + shift*I)^-1 rhs, refactorized in the same skyline, or None if it is not positive definite."""
+        self._load(np.float64, shift)
+        if self._factorize() is None:
+            return None
+        return self.solve(rhs)
+
+    def _factorize(self):
+        """In-place LDL^T; returns the pivots D, or None at a non-positive pivot."""
+        n, first, start, values = self.size, self.first, self.start, self.values
+
+        # Columns reaching above row k (first[j] <= k < j), grouped by k
+        above = np.arange(n) - first
+        columns = np.repeat(np.arange(n), above)
+        rows = np.repeat(first - np.cumsum(np.concatenate([[0], above[:-1]])), above) + np.arange(above.sum())
+        order = np.lexsort((columns, rows))
+        columns = columns[order]
+        bounds = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=n))])
+
+        # values index of entry (i, j) is column_base[j] + i
+        column_base = start[:-1] - first
+        triu = {}
+        pivots = np.empty(n)
+        for k in range(n):
+            pivot = values[self.diagonal_index[k]]
+            if not pivot > 0:
+                return None
+            pivots[k] = pivot
+            active = columns[bounds[k]:bounds[k + 1]]
+            m = len(active)
+            if not m:
+                continue
+            # Row k of U, then the symmetric update K_ij -= D_k U_ki U_kj for i <= j in active
+            base = column_base[active]
+            row_index = base + k
+            u = values[row_index] / pivot
+            values[row_index] = u
+            if m not in triu:
+                triu[m] = np.triu_indices(m)
+            i, j = triu[m]
+            values[base[j] + active[i]] -= (pivot * u)[i] * u[j]
+        return pivots
+
+    def solve(self, rhs: np.ndarray) -> np.ndarray:
+        """Solve K_ff u = rhs for a vector or an (n, n_cases) matrix of RHS."""
+        first, start, values = self.first, self.start, self.values
+        x = np.asarray(rhs, dtype=float)[self.permutation].copy()
+
+        # U^T y = rhs, D z = y, U u = z
+        for j in range(self.size):
+            x[j] -= values[start[j]:self.diagonal_index[j]] @ x[first[j]:j]
+        x /= values[self.diagonal_index].reshape((-1,) + (1,) * (x.ndim - 1))
+        for j in range(self.size - 1, -1, -1):
+            x[first[j]:j] -= np.multiply.outer(values[start[j]:self.diagonal_index[j]], x[j])
+
+        u = np.empty_like(x)
+        u[self.permutation] = x
+        if not np.all(np.isfinite(u)):
+            raise StructureUnstableError()
+        return u
+
+
+def factorize_stiffness(K_ff, dtype=np.float64):
+    """
+    Factorize K_ff with the method matching its storage, in the given precision.
+
+    Dense K_ff gets a Cholesky factor and SciPy sparse K_ff a sparse LU.
+    Triplets are never densified: they are converted to CSR for the sparse
+    LU, or factorized in skyline storage (in their own numbering) without SciPy.
+    """
+    if isinstance(K_ff, TripletMatrix):
+        if sp is None:
+            return SkylineLDLFactor(K_ff, dtype=dtype)
+        K_ff = sp.csr_matrix((K_ff.vals, (K_ff.rows, K_ff.cols)), shape=K_ff.shape)
+    if sp is not None and sp.issparse(K_ff):
+        return SparseLUFactor(K_ff, dtype)
+    return DenseCholeskyFactor(K_ff, dtype)
+
+
+def _scaled(K, scale: np.ndarray, dtype):
+    """diag(scale) K diag(scale) in the storage of K, with values in dtype (triplets stay float64)."""
+    if isinstance(K, TripletMatrix):
+        return TripletMatrix(K.rows, K.cols, K.vals * scale[K.rows] * scale[K.cols], K.shape[0])
+    if sp is not None and sp.issparse(K):
+        D = sp.diags(scale)
+        return (D @ K @ D).astype(dtype)
+    K_scaled = np.asarray(K, dtype=dtype)
+    K_scaled = K_scaled * scale.astype(dtype)[:, None]
+    K_scaled *= scale.astype(dtype)
+    return K_scaled
+
+
+def _scaled_norm_inf(K, scale: np.ndarray) -> float:
+    """Largest absolute row sum of diag(scale) K diag(scale) (an upper bound for triplets with duplicates)."""
+    if isinstance(K, TripletMatrix):
+        row_sums = np.bincount(K.rows, np.abs(K.vals) * scale[K.cols], minlength=K.shape[0])
+    else:
+        row_sums = np.asarray(abs(K) @ scale).ravel()
+    return float((scale * row_sums).max(initial=0.0))
+
+
+class RefinedFactor:
+    """
+    Low-precision factor of K_ff with float64 iterative refinement.
+
+    K_ff is scaled symmetrically to a unit diagonal, which removes the gap
+    between axial, bending and rotational stiffness terms, and factorized in
+    float32: half the storage of a float64 factor and about twice the BLAS
+    throughput. Each refinement step solves for the correction with the
+    float32 factor against a float64 residual r = F - K u, so u converges to
+    float64 accuracy when cond(D K_ff D) is well below 1 / eps(float32). A
+    column has converged when ||D r|| <= sqrt(n) eps ||D K D|| ||D^-1 u||
+    (infinity norms, as LAPACK's dsposv but on the scaled system, so that a
+    few very stiff members cannot loosen the test for the rest);
+    RefinementNotConvergedError is raised if the residual
+    stops halving or MAX_REFINEMENT_STEPS run out, and StructureUnstableError
+    if the float32 factor has a weak pivot. Callers then redo the solve with
+    a float64 factor.
+
+    After a solve, `steps` and `residuals` hold the refinement steps and the
+    relative residual ||F - K u|| / ||F|| of every column.
+    """
+
+    def __init__(self, K_ff, factorize: Callable, dtype=np.float32):
+        """
+        Args:
+            K_ff: Dense, SciPy sparse or TripletMatrix K_ff (float64)
+            factorize: factorize(K, dtype) -> factor with a solve(rhs) method, e.g. factorize_stiffness
+            dtype: Precision of the factor
+        """
+        self.size = K_ff.shape[0]
+        diagonal = K_ff.diagonal()
+        if not np.all(diagonal > 0):
+            raise StructureUnstableError()
+        self._K = K_ff
+        # Diagonal 2**60 rather than 1: fill that decays along the band of a
+        # frame's factor stays out of float32's (slow) denormal range longer
+        self._scale = 2.0 ** 30 / np.sqrt(diagonal)
+        self._norm = _scaled_norm_inf(K_ff, self._scale)
+        self._dtype = dtype
+        self._factor = factorize(_scaled(K_ff, self._scale, dtype), dtype)
+        self.steps: List[int] = []
+        self.residuals: List[float] = []
+
+    def _correction(self, r: np.ndarray) -> np.ndarray:
+        """K_ff^-1 r with the low-precision factor of the scaled K_ff."""
+        scale = self._scale.reshape((-1,) + (1,) * (r.ndim - 1))
+        d = self._factor.solve((r * scale).astype(self._dtype))
+        return np.asarray(d, dtype=float) * scale
+
+    def solve(self, rhs: np.ndarray) -> np.ndarray:
+        """Solve K_ff u = rhs for a vector or an (n, n_cases) matrix of RHS."""
+        rhs = np.asarray(rhs, dtype=float)
+        B = rhs.reshape(self.size, -1)
+        threshold = np.sqrt(self.size) * np.finfo(float).eps * self._norm
+        scale = self._scale[:, None]
+
+        u = self._correction(B)
+        steps = np.zeros(B.shape[1], dtype=np.int64)
+        previous = np.full(B.shape[1], np.inf)
+        for _ in range(MAX_REFINEMENT_STEPS + 1):
+            R = B - self._K @ u
+            residual = np.abs(R * scale).max(axis=0)
+            active = residual > threshold * np.abs(u / scale).max(axis=0)
+            if not active.any():
+                break
+            if np.any(active & ~(residual < 0.5 * previous)) or steps.max() == MAX_REFINEMENT_STEPS:
+                raise RefinementNotConvergedError("Iterative refinement did not reach float64 accuracy")
+            previous = residual
+            u[:, active] += self._correction(R[:, active])
+            steps[active] += 1
+
+        norm_b = np.linalg.norm(B, axis=0)
+        residuals = np.linalg.norm(R, axis=0)
+        self.steps = steps.tolist()
+        self.residuals = np.divide(residuals, norm_b, out=np.zeros_like(residuals), where=norm_b > 0).tolist()
+        if not np.all(np.isfinite(u)):
+            raise StructureUnstableError()
+        return u.reshape(rhs.shape)
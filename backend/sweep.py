@@ -0,0 +1,417 @@
+"""
+Parametric sweeps of a base beam or frame over a grid of parameter values.
+
+A sweep request names parameters of the base model by path
+("spans[2].length", "members[m_BC].momentOfInertia") and gives each a range
+of values; the grid is the product of the axes. Points are generated lazily,
+chunk by chunk, from their flat grid index, so the full set of models never
+exists at once:
+
+- Beams are mapped onto the arrays of BatchSlopeDeflectionSolver once; each
+  chunk only overwrites the swept columns and is solved in one vectorized pass.
+- Frames are solved point by point from a copy of the base model.
+
+Only the requested outputs are kept, as (points, ...) arrays.
+"""
+import math
+import re
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from pydantic import BaseModel, ValidationError
+from models import (
+    SweepAxis, BeamSweepRequest, FrameSweepRequest,
+    SweepResponse, SweepAxisValues, SweepOutput
+)
+from solver import flatten_span_loads
+from batch_solver import BatchSlopeDeflectionSolver, support_types
+from frame_solver import FrameSolver
+
+
+# Largest number of grid points of one sweep
+SWEEP_MAX_POINTS = 100000
+# Grid points per chunk (one worker pool submission each)
+BEAM_SWEEP_CHUNK_POINTS = 2048
+FRAME_SWEEP_CHUNK_POINTS = 32
+
+_SEGMENT = re.compile(r"^(\w+)(?:\[([^\]]+)\])?$")
+
+# Field path of a parameter, list items resolved to indices: [(field, index or None), ...]
+Address = List[Tuple[str, Optional[int]]]
+
+
+def axis_length(axis: SweepAxis) -> int:
+    """
+    Number of values of a sweep axis, without expanding it.
+
+    Raises:
+        ValueError: On an invalid axis or one longer than SWEEP_MAX_POINTS
+    """
+    if axis.values is not None:
+        if not axis.values:
+            raise ValueError(f"Sweep axis {axis.parameter} has no values")
+        num = len(axis.values)
+    elif axis.start is None or axis.stop is None:
+        raise ValueError(f"Sweep axis {axis.parameter} needs values or a start and stop")
+    elif axis.scale == "log":
+        if axis.start <= 0 or axis.stop <= 0:
+            raise ValueError(f"Logarithmic sweep axis {axis.parameter} needs positive bounds")
+        if axis.num is None:
+            raise ValueError(f"Logarithmic sweep axis {axis.parameter} needs num")
+        num = axis.num
+    elif axis.num is not None:
+        num = axis.num
+    elif axis.step is not None:
+        # Include the stop value when the range is a whole number of steps
+        steps = np.floor(abs(axis.stop - axis.start) / axis.step + 1e-9)
+        num = int(steps) + 1 if steps < SWEEP_MAX_POINTS else SWEEP_MAX_POINTS + 1
+    else:
+        raise ValueError(f"Sweep axis {axis.parameter} needs num or step")
+
+    if num > SWEEP_MAX_POINTS:
+        raise ValueError(f"A sweep may contain at most {SWEEP_MAX_POINTS} points")
+    return num
+
+
+def axis_values(axis: SweepAxis) -> np.ndarray:
+    """Expand a sweep axis into its values."""
+    num = axis_length(axis)
+    if axis.values is not None:
+        return np.array(axis.values, dtype=float)
+    if axis.scale == "log":
+        return np.geomspace(axis.start, axis.stop, num)
+    if axis.num is not None:
+        return np.linspace(axis.start, axis.stop, num)
+    span = axis.stop - axis.start
+    return axis.start + np.sign(span) * axis.step * np.arange(num)
+
+
+def _field_name(model: BaseModel, name: str, path: str) -> str:
+    """Field of a model by field name or alias."""
+    for field_name, field in type(model).model_fields.items():
+        if name == field_name or name == field.alias:
+            return field_name
+    raise ValueError(f"Invalid sweep parameter {path}: unknown field {name}")
+
+
+def _select(items: list, selector: str, path: str) -> int:
+    """Index of a list item given by position or id."""
+    selector = selector.strip().strip("'\"")
+    if selector.isdigit():
+        index = int(selector)
+        if index >= len(items):
+            raise ValueError(f"Invalid sweep parameter {path}: index {index} out of range")
+        return index
+
+    for index, item in enumerate(items):
+        if getattr(item, "id", None) == selector:
+            return index
+    raise ValueError(f"Invalid sweep parameter {path}: no item with id {selector}")
+
+
+def parameter_address(model: BaseModel, path: str) -> Address:
+    """
+    Resolve a parameter path against a model.
+
+    Raises:
+        ValueError: If the path does not lead to a numeric field
+    """
+    address = []
+    target = model
+    for segment in path.split("."):
+        match = _SEGMENT.match(segment.strip())
+        if match is None or not isinstance(target, BaseModel):
+            raise ValueError(f"Invalid sweep parameter {path}")
+
+        name, selector = match.groups()
+        name = _field_name(target, name, path)
+        value = getattr(target, name)
+        if selector is None:
+            address.append((name, None))
+            target = value
+        else:
+            if not isinstance(value, list):
+                raise ValueError(f"Invalid sweep parameter {path}: {name} is not a list")
+            index = _select(value, selector, path)
+            address.append((name, index))
+            target = value[index]
+
+    if address[-1][1] is not None or isinstance(target, (bool, BaseModel, list, str)):
+        raise ValueError(f"Sweep parameter {path} is not a number")
+    return address
+
+
+def _parent(model: BaseModel, address: Address) -> BaseModel:
+    """Model holding the parameter's field."""
+    target = model
+    for name, index in address[:-1]:
+        target = getattr(target, name)
+        if index is not None:
+            target = target[index]
+    return target
+
+
+def _check_values(model: BaseModel, address: Address, values: np.ndarray, path: str):
+    """
+    Validate the values of an axis against the field's constraints.
+
+    The constraints of numeric fields are bounds, so only the smallest and
+    largest values are checked (NaN, if any, is both).
+    """
+    parent = _parent(model, address)
+    name = address[-1][0]
+    validator = type(parent).__pydantic_validator__
+    for value in dict.fromkeys((values.min(), values.max())):
+        try:
+            validator.validate_assignment(parent.model_copy(), name, float(value))
+        except ValidationError as e:
+            raise ValueError(f"Invalid value {value} for sweep parameter {path}: {e.errors()[0]['msg']}")
+
+
+def sweep_grid(request) -> Tuple[List[np.ndarray], Tuple[int, ...]]:
+    """
+    Expand and validate the axes of a sweep request.
+
+    Returns:
+        Values of every axis and the grid shape
+
+    Raises:
+        ValueError: On an invalid axis or a grid larger than SWEEP_MAX_POINTS
+    """
+    # The grid size is known from the axis definitions: reject it before expanding any axis
+    addresses = [parameter_address(request.base, axis.parameter) for axis in request.axes]
+    shape = tuple(axis_length(axis) for axis in request.axes)
+    if math.prod(shape) > SWEEP_MAX_POINTS:
+        raise ValueError(f"A sweep may contain at most {SWEEP_MAX_POINTS} points")
+
+    values = []
+    for axis, address in zip(request.axes, addresses):
+        axis_vals = axis_values(axis)
+        _check_values(request.base, address, axis_vals, axis.parameter)
+        values.append(axis_vals)
+
+    if isinstance(request, BeamSweepRequest):
+        # Rejects parameters the vectorized beam solver cannot sweep
+        BeamSweep(request)
+    return values, shape
+
+
+def sweep_chunks(request, num_points: int) -> List[Tuple[int, int]]:
+    """Flat index ranges [start, stop) of the chunks of a sweep."""
+    size = BEAM_SWEEP_CHUNK_POINTS if isinstance(request, BeamSweepRequest) else FRAME_SWEEP_CHUNK_POINTS
+    return [(start, min(start + size, num_points)) for start in range(0, num_points, size)]
+
+
+def sweep_dof_count(request) -> int:
+    """Size of one grid point's stiffness system."""
+    if isinstance(request, BeamSweepRequest):
+        return len(request.base.spans) + 1
+    return 3 * len(request.base.nodes)
+
+
+def _point_values(axes: List[np.ndarray], start: int, stop: int) -> List[np.ndarray]:
+    """Values of every axis at the grid points start..stop (flat, row-major)."""
+    indices = np.unravel_index(np.arange(start, stop), tuple(len(values) for values in axes))
+    return [values[idx] for values, idx in zip(axes, indices)]
+
+
+class BeamSweep:
+    """Maps the swept beam parameters onto the arrays of BatchSlopeDeflectionSolver."""
+
+    def __init__(self, request: BeamSweepRequest):
+        base = request.base
+        self.outputs = request.outputs
+        self.support_types = support_types(base.supports, len(base.spans) + 1)
+        self.flat = flatten_span_loads(base.spans)
+
+        moments = [(i, j) for i, span in enumerate(base.spans)
+                   for j, load in enumerate(span.loads) if load.load_type == "MOMENT"]
+        self.moment_span = np.array([i for i, _ in moments], dtype=np.int64)
+
+        load_types = [[load.load_type for load in span.loads] for span in base.spans]
+        self.center_loads = np.array([
+            load_types[i][j] == "POINT_CENTER" for i, j in zip(self.flat["span"], self.flat["load"])
+        ], dtype=bool)
+
+        self.base_arrays = {
+            "length": np.array([span.length for span in base.spans], dtype=float),
+            "elastic_modulus": np.array([span.elastic_modulus for span in base.spans], dtype=float),
+            "moment_of_inertia": np.array([span.moment_of_inertia for span in base.spans], dtype=float),
+            "magnitude": self.flat["magnitude"],
+            "position": self.flat["position"],
+            "moment": np.array([base.spans[i].loads[j].magnitude for i, j in moments], dtype=float)
+        }
+
+        self.targets = []
+        for axis in request.axes:
+            address = parameter_address(base, axis.parameter)
+            self.targets.append(self._target(address, load_types, moments, axis.parameter))
+
+    def _target(self, address: Address, load_types, moments, path: str) -> Optional[Tuple[str, int]]:
+        """(array, column) a parameter is written to; None if it does not affect the analysis."""
+        names = [name for name, _ in address]
+        if names[0] == "spans" and len(address) == 2 and names[1] in ("length", "elastic_modulus", "moment_of_inertia"):
+            return names[1], address[0][1]
+
+        if names[:2] == ["spans", "loads"] and len(address) == 3:
+            i, j = address[0][1], address[1][1]
+            if names[2] == "magnitude" and load_types[i][j] == "MOMENT":
+                return "moment", moments.index((i, j))
+            row = np.flatnonzero((self.flat["span"] == i) & (self.flat["load"] == j))
+            if names[2] == "magnitude" and len(row):
+                return "magnitude", int(row[0])
+            if names[2] == "position" and len(row) and load_types[i][j] == "POINT_ARBITRARY":
+                return "position", int(row[0])
+            # Magnitude of a NONE load, position of a distributed load
+            return None
+
+        raise ValueError(f"Sweep parameter {path} cannot be swept for beams")
+
+    def solve(self, point_values: List[np.ndarray]) -> Tuple[Dict[str, np.ndarray], List[int]]:
+        """
+        Solve a chunk of grid points in one vectorized pass.
+
+        Returns:
+            Requested outputs of shape (points, ...) and the chunk-relative
+            indices of points that failed (NaN in the outputs)
+        """
+        num_points = len(point_values[0])
+        arrays = {name: np.tile(values, (num_points, 1)) for name, values in self.base_arrays.items()}
+        for target, values in zip(self.targets, point_values):
+            if target is not None:
+                name, column = target
+                arrays[name][:, column] = values
+
+        # Centre point loads follow their span length
+        if self.center_loads.any():
+            arrays["position"][:, self.center_loads] = arrays["length"][:, self.flat["span"][self.center_loads]] / 2
+
+        try:
+            return self._solve_arrays(arrays), []
+        except (ValueError, np.linalg.LinAlgError):
+            pass
+
+        # Isolate the failing points
+        outputs, failed = None, []
+        for p in range(num_points):
+            try:
+                point = self._solve_arrays({name: values[p:p + 1] for name, values in arrays.items()})
+            except (ValueError, np.linalg.LinAlgError):
+                failed.append(p)
+                continue
+            if outputs is None:
+                outputs = {name: np.full((num_points,) + v.shape[1:], np.nan) for name, v in point.items()}
+            for name, v in point.items():
+                outputs[name][p] = v[0]
+        return outputs, failed
+
+    def _solve_arrays(self, arrays: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        solver = BatchSlopeDeflectionSolver(
+            lengths=arrays["length"],
+            EI=arrays["elastic_modulus"] * arrays["moment_of_inertia"],
+            loads={
+                "span": self.flat["span"],
+                "shape": self.flat["shape"],
+                "magnitude": arrays["magnitude"],
+                "position": arrays["position"]
+            },
+            support_types=self.support_types,
+            moment_span=self.moment_span,
+            moment_magnitude=arrays["moment"]
+        )
+        results = solver.solve()
+        return {name: results[name] for name in self.outputs}
+
+
+def _frame_point(request: FrameSweepRequest, addresses: List[Address], values: List[float]) -> Dict[str, np.ndarray]:
+    """Solve the frame at one grid point and extract the requested outputs."""
+    model = request.base.model_copy(deep=True)
+    for address, value in zip(addresses, values):
+        setattr(_parent(model, address), address[-1][0], value)
+
+    results = FrameSolver().solve(model)
+    displacements = np.array(results["displacements"], dtype=float)
+
+    outputs = {}
+    if "displacements" in request.outputs:
+        outputs["displacements"] = displacements
+    if "reactions" in request.outputs:
+        outputs["reactions"] = np.array(results["reactions"], dtype=float)
+    if "drift" in request.outputs:
+        # Largest horizontal node displacement
+        outputs["drift"] = np.array(np.max(np.abs(displacements[0::3])) if len(displacements) else 0.0)
+    if "max_moment" in request.outputs:
+        max_moments = []
+        for member in results["member_results"]:
+            moments = member.get("m_diagram") or [member["moment_start"], member["moment_end"]]
+            max_moments.append(moments[int(np.argmax(np.abs(moments)))])
+        outputs["max_moment"] = np.array(max_moments, dtype=float)
+    return outputs
+
+
+def sweep_chunk(request, axes: List[np.ndarray], start: int, stop: int) -> Tuple[Dict[str, np.ndarray], List[int]]:
+    """
+    Solve grid points start..stop of a sweep.
+
+    Module-level so chunks can run on the worker pool.
+
+    Args:
+        request: BeamSweepRequest or FrameSweepRequest
+        axes: Axis values from sweep_grid
+        start, stop: Flat grid index range
+
+    Returns:
+        Requested outputs of shape (stop - start, ...) (None if every point
+        failed) and the flat indices of the points that failed
+    """
+    point_values = _point_values(axes, start, stop)
+
+    if isinstance(request, BeamSweepRequest):
+        outputs, failed = BeamSweep(request).solve(point_values)
+        return outputs, [start + p for p in failed]
+
+    addresses = [parameter_address(request.base, axis.parameter) for axis in request.axes]
+    outputs, failed = None, []
+    for p in range(stop - start):
+        try:
+            point = _frame_point(request, addresses, [float(values[p]) for values in point_values])
+        except Exception:
+            failed.append(start + p)
+            continue
+        if outputs is None:
+            outputs = {name: np.full((stop - start,) + v.shape, np.nan) for name, v in point.items()}
+        for name, v in point.items():
+            outputs[name][p] = v
+    return outputs, failed
+
+
+def sweep_response(request, axes: List[np.ndarray],
+                   chunks: List[Tuple[Dict[str, np.ndarray], List[int]]]) -> SweepResponse:
+    """Assemble the results of the chunks (in sweep_chunks order) into the response."""
+    shape = tuple(len(values) for values in axes)
+    bounds = sweep_chunks(request, int(np.prod(shape)))
+
+    failed = [index for _, chunk_failed in chunks for index in chunk_failed]
+    sample = next((outputs for outputs, _ in chunks if outputs is not None), None)
+    if sample is None:
+        raise ValueError("The analysis failed at every point of the sweep")
+
+    outputs = {}
+    for name, values in sample.items():
+        grid = np.full((int(np.prod(shape)),) + values.shape[1:], np.nan)
+        for (start, stop), (chunk_outputs, _) in zip(bounds, chunks):
+            if chunk_outputs is not None:
+                grid[start:stop] = chunk_outputs[name]
+        outputs[name] = SweepOutput(shape=list(shape) + list(values.shape[1:]), values=grid.ravel().tolist())
+
+    return SweepResponse(
+        success=True,
+        axes=[SweepAxisValues(parameter=axis.parameter, values=values.tolist())
+              for axis, values in zip(request.axes, axes)],
+        outputs=outputs,
+        failedPoints=failed
+    )
+
+
+def sweep_error_response(message: str) -> SweepResponse:
+    """Failed sweep response."""
+    return SweepResponse(success=False, errorMessage=message)
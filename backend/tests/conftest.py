@@ -0,0 +1,182 @@
+"""
+Shared models and fixtures of the backend tests.
+
+The backend modules import each other by bare name (as uvicorn runs them
+from backend/), so backend/ is put on the import path here.
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from models import (  # noqa: E402
+    FrameRequest, FrameNode, FrameMember, FramePointLoad, FrameUniformLoad,
+    FrameLoadCase, FrameLoadCombination, CalculationRequest, Span, Support, LoadConfig
+)
+
+# Module-level aliases the backend modules bind SciPy (sub)packages to, None without SciPy
+SCIPY_ALIASES = ("sla", "sp", "spla")
+
+
+def portal_frame(bays: int = 3, stories: int = 2, shuffle: int = None, **kwargs) -> FrameRequest:
+    """
+    Multi-bay, multi-storey portal frame with gravity, lateral and member loads.
+
+    Args:
+        bays: Bays of 6 m
+        stories: Storeys of 3.5 m
+        shuffle: Seed to list the nodes in random order (so renumbering matters), or None
+        kwargs: Further FrameRequest fields
+    """
+    nodes, members = [], []
+    for level in range(stories + 1):
+        for col in range(bays + 1):
+            nodes.append(FrameNode(
+                id=f"n{level}_{col}", x=6.0 * col, y=3.5 * level,
+                fix_x=level == 0, fix_y=level == 0, fix_r=level == 0
+            ))
+    for level in range(1, stories + 1):
+        for col in range(bays + 1):
+            members.append(FrameMember(
+                id=f"c{level}_{col}", start_node_id=f"n{level - 1}_{col}", end_node_id=f"n{level}_{col}",
+                elastic_modulus=2e8, moment_of_inertia=8e-5 + 1e-5 * col, cross_section_area=6e-3
+            ))
+        for col in range(1, bays + 1):
+            members.append(FrameMember(
+                id=f"b{level}_{col}", start_node_id=f"n{level}_{col - 1}", end_node_id=f"n{level}_{col}",
+                elastic_modulus=2e8, moment_of_inertia=2e-4, cross_section_area=8e-3
+            ))
+    if shuffle is not None:
+        order = np.random.default_rng(shuffle).permutation(len(nodes))
+        nodes = [nodes[i] for i in order]
+
+    top = f"n{stories}_0"
+    fields = dict(
+        nodes=nodes,
+        members=members,
+        point_loads=[
+            FramePointLoad(type="NODE_LOAD", target_id=top, magnitude_x=15.0),
+            FramePointLoad(type="MEMBER_POINT_LOAD", target_id="b1_1", magnitude_y=-40.0, position=2.0)
+        ],
+        uniform_loads=[FrameUniformLoad(member_id=f"b{stories}_{col}", magnitude_y=-12.0)
+                       for col in range(1, bays + 1)],
+        load_cases=[
+            FrameLoadCase(name="Dead", uniform_loads=[
+                FrameUniformLoad(member_id=f"b{level}_{col}", magnitude_y=-20.0)
+                for level in range(1, stories + 1) for col in range(1, bays + 1)
+            ]),
+            FrameLoadCase(name="Wind", point_loads=[
+                FramePointLoad(type="NODE_LOAD", target_id=f"n{level}_0", magnitude_x=8.0 * level)
+                for level in range(1, stories + 1)
+            ])
+        ],
+        combinations=[FrameLoadCombination(name="ULS", factors={"Dead": 1.2, "Wind": 1.5})]
+    )
+    fields.update(kwargs)
+    return FrameRequest(**fields)
+
+
+def continuous_beam(**kwargs) -> CalculationRequest:
+    """
+    Three-span beam with UDL, point and triangular loads on pinned, roller and fixed supports.
+
+    Args:
+        kwargs: Further CalculationRequest fields
+    """
+    fields = dict(
+        spans=[
+            Span(id="s1", length=6.0, elastic_modulus=2e8, moment_of_inertia=1e-4, loads=[
+                LoadConfig(load_type="UDL", magnitude=12.0),
+                LoadConfig(load_type="POINT_ARBITRARY", magnitude=30.0, position=2.1)
+            ]),
+            Span(id="s2", length=8.0, elastic_modulus=2e8, moment_of_inertia=2e-4, loads=[
+                LoadConfig(load_type="TRIANGULAR", magnitude=18.0),
+                LoadConfig(load_type="POINT_CENTER", magnitude=25.0)
+            ]),
+            Span(id="s3", length=5.0, elastic_modulus=2e8, moment_of_inertia=1e-4, loads=[
+                LoadConfig(load_type="UDL", magnitude=8.0)
+            ])
+        ],
+        supports=[
+            Support(node_index=0, support_type="PINNED"),
+            Support(node_index=1, support_type="ROLLER"),
+            Support(node_index=2, support_type="ROLLER"),
+            Support(node_index=3, support_type="FIXED")
+        ]
+    )
+    fields.update(kwargs)
+    return CalculationRequest(**fields)
+
+
+def released_portal(**kwargs) -> FrameRequest:
+    """
+    Pinned-base portal whose beam is pinned at both ends: it sways freely.
+
+    Args:
+        kwargs: Further FrameRequest fields
+    """
+    def member(member_id, start, end, **releases):
+        return FrameMember(
+            id=member_id, start_node_id=start, end_node_id=end,
+            elastic_modulus=2e8, moment_of_inertia=1e-4, cross_section_area=1e-2, **releases
+        )
+
+    return FrameRequest(
+        nodes=[
+            FrameNode(id="A", x=0, y=0, fix_x=True, fix_y=True),
+            FrameNode(id="B", x=0, y=4),
+            FrameNode(id="C", x=6, y=4),
+            FrameNode(id="D", x=6, y=0, fix_x=True, fix_y=True)
+        ],
+        members=[
+            member("AB", "A", "B"),
+            member("BC", "B", "C", release_start=True, release_end=True),
+            member("CD", "C", "D")
+        ],
+        point_loads=[FramePointLoad(type="NODE_LOAD", target_id="B", magnitude_x=10)],
+        **kwargs
+    )
+
+
+def graph_stiffness(num_nodes: int, member_nodes: np.ndarray) -> np.ndarray:
+    """SPD matrix with the sparsity of a frame's K: a full 6 x 6 block per member, 3 DOFs per node."""
+    K = np.eye(3 * num_nodes)
+    for dofs in (3 * np.asarray(member_nodes)[:, :, None] + np.arange(3)).reshape(-1, 6):
+        K[np.ix_(dofs, dofs)] += 1.0 + np.eye(6)
+    return K
+
+
+def assert_same_results(results, expected, rtol: float = 1e-8):
+    """Displacements, reactions and member end forces of two FrameSolver results (and their load cases) agree."""
+    def scale(values):
+        return max(np.abs(values).max(), 1e-12)
+
+    cases = [results] + results.get("case_results", [])
+    for case, expected_case in zip(cases, [expected] + expected.get("case_results", [])):
+        for key in ("displacements", "reactions"):
+            actual, wanted = np.asarray(case[key], dtype=float), np.asarray(expected_case[key], dtype=float)
+            np.testing.assert_allclose(actual, wanted, rtol=0, atol=rtol * scale(wanted), err_msg=key)
+        forces = np.array([[m[k] for k in ("axial_start", "shear_start", "moment_start",
+                                            "axial_end", "shear_end", "moment_end")]
+                           for m in case["member_results"]])
+        wanted = np.array([[m[k] for k in ("axial_start", "shear_start", "moment_start",
+                                            "axial_end", "shear_end", "moment_end")]
+                           for m in expected_case["member_results"]])
+        np.testing.assert_allclose(forces, wanted, rtol=0, atol=rtol * scale(wanted), err_msg="member forces")
+
+
+@pytest.fixture(params=["scipy", "numpy"])
+def scipy_mode(request, monkeypatch):
+    """Runs a test with SciPy, and again as if SciPy were not installed."""
+    if request.param == "numpy":
+        for module in list(sys.modules.values()):
+            if os.path.dirname(getattr(module, "__file__", None) or "") != BACKEND_DIR:
+                continue
+            for name in SCIPY_ALIASES:
+                if getattr(module, name, None) is not None:
+                    monkeypatch.setattr(module, name, None)
+    return request.param
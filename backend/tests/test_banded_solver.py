@@ -0,0 +1,81 @@
+"""Reverse Cuthill-McKee renumbering and the banded Cholesky solver against the dense direct solve."""
+import numpy as np
+import pytest
+
+import frame_solver
+from conftest import portal_frame, released_portal, graph_stiffness, assert_same_results
+from frame_solver import FrameSolver, FrameModelIndex
+from reordering import reverse_cuthill_mckee, dof_permutation, envelope_size
+from stiffness_solvers import BandedCholeskyFactor, StructureUnstableError
+
+
+def test_rcm_order_is_a_permutation_that_narrows_the_band():
+    request = portal_frame(bays=8, stories=4, shuffle=1)
+    index = FrameModelIndex(request)
+    num_nodes = len(request.nodes)
+
+    order = reverse_cuthill_mckee(num_nodes, index.member_nodes)
+    assert sorted(order.tolist()) == list(range(num_nodes))
+
+    bandwidth, profile = envelope_size(order, index.member_nodes)
+    listed_bandwidth, listed_profile = envelope_size(np.arange(num_nodes), index.member_nodes)
+    assert bandwidth < listed_bandwidth
+    assert profile < listed_profile
+
+
+def test_dof_permutation_orders_free_dofs_by_node_order():
+    # Node 1 first, then node 0; DOF 1 (node 0, y) is restrained
+    permutation = dof_permutation(np.array([1, 0]), [0, 2, 3, 4, 5])
+    assert permutation.tolist() == [2, 3, 4, 0, 1]
+
+
+def test_banded_factor_stores_the_renumbered_band():
+    request = portal_frame(bays=8, stories=4, shuffle=1)
+    index = FrameModelIndex(request)
+    num_nodes = len(request.nodes)
+    K = graph_stiffness(num_nodes, index.member_nodes)
+    rhs = np.random.default_rng(0).normal(size=(K.shape[0], 2))
+
+    order = reverse_cuthill_mckee(num_nodes, index.member_nodes)
+    factor = BandedCholeskyFactor(K, dof_permutation(order, list(range(K.shape[0]))))
+    bandwidth, _ = envelope_size(order, index.member_nodes)
+    assert factor.bandwidth == bandwidth
+    assert BandedCholeskyFactor(K).bandwidth > bandwidth
+    np.testing.assert_allclose(factor.solve(rhs), np.linalg.solve(K, rhs), rtol=1e-10)
+
+
+def test_auto_picks_banded_up_to_the_bandwidth_threshold(monkeypatch):
+    request = portal_frame(bays=14, stories=4)
+    index = FrameModelIndex(request)
+    num_free = 3 * len(request.nodes) - 3 * 15
+    order = reverse_cuthill_mckee(len(request.nodes), index.member_nodes)
+    ratio = envelope_size(order, index.member_nodes)[0] / (3 * len(request.nodes))
+
+    monkeypatch.setattr(frame_solver, "BANDED_MAX_BANDWIDTH_RATIO", ratio)
+    assert FrameSolver()._choose_factorization(index, num_free, "auto")[0] == "banded"
+    monkeypatch.setattr(frame_solver, "BANDED_MAX_BANDWIDTH_RATIO", 0.99 * ratio)
+    assert FrameSolver()._choose_factorization(index, num_free, "auto")[0] == "direct"
+
+
+@pytest.mark.parametrize("shuffle", [None, 7])
+def test_banded_matches_dense_direct(scipy_mode, shuffle):
+    expected = FrameSolver("dense").solve(portal_frame(bays=6, stories=3, shuffle=shuffle, solver="direct"))
+    results = FrameSolver().solve(portal_frame(bays=6, stories=3, shuffle=shuffle, solver="banded"))
+
+    assert results["solver_report"]["method"] == "banded"
+    assert_same_results(results, expected)
+    assert results["combination_results"][0]["member_results"][0]["moment_start"] == pytest.approx(
+        expected["combination_results"][0]["member_results"][0]["moment_start"], rel=1e-8
+    )
+
+
+@pytest.mark.parametrize("assembly", ["dense", "sparse"])
+def test_banded_mechanism_is_located(scipy_mode, assembly):
+    if assembly == "sparse" and scipy_mode == "numpy":
+        pytest.skip("Sparse assembly requires SciPy")
+    with pytest.raises(StructureUnstableError) as error:
+        FrameSolver(assembly).solve(released_portal(solver="banded"))
+
+    message = str(error.value)
+    assert "node B (x)" in message and "node C (x)" in message
+    assert "node A (x)" not in message
@@ -0,0 +1,78 @@
+"""Batch endpoints against one call per model."""
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from conftest import continuous_beam, portal_frame
+from main import app, result_cache
+
+
+def _payload(request) -> dict:
+    return json.loads(request.model_dump_json(by_alias=True))
+
+
+@pytest.fixture
+def client():
+    result_cache.clear()
+    yield TestClient(app)
+    result_cache.clear()
+
+
+BATCHES = {
+    "beam": ("/api/calculate", "/api/calculate-batch", lambda: [
+        continuous_beam(),
+        continuous_beam(include_steps=False),
+        continuous_beam(include_steps=False, spans=continuous_beam().spans[:2],
+                        supports=continuous_beam().supports[:3])
+    ]),
+    "frame": ("/api/calculate-frame", "/api/calculate-frame-batch", lambda: [
+        portal_frame(bays=1, stories=1),
+        portal_frame(bays=2, stories=3),
+        portal_frame(bays=3, stories=2, shuffle=5)
+    ])
+}
+
+
+@pytest.mark.parametrize("kind", BATCHES)
+def test_batch_bodies_match_single_calls(client, kind):
+    single_url, batch_url, requests = BATCHES[kind]
+    payloads = [_payload(request) for request in requests()]
+
+    batch = client.post(batch_url, json=payloads)
+    assert batch.status_code == 200
+    result_cache.clear()
+    singles = [client.post(single_url, json=payload).content for payload in payloads]
+
+    # Concatenated bodies: each entry is byte for byte the single-call response
+    assert batch.content == b"[" + b",".join(singles) + b"]"
+    assert all(entry["success"] for entry in batch.json())
+
+
+def test_invalid_item_only_fails_itself(client):
+    payloads = [_payload(continuous_beam()), {"spans": "not a list"}, _payload(continuous_beam())]
+
+    entries = client.post("/api/calculate-batch", json=payloads).json()
+    assert [entry["success"] for entry in entries] == [True, False, True]
+    assert entries[1]["error_message"].startswith("Invalid request:")
+    assert entries[0] == entries[2]
+
+
+def test_stream_yields_every_index_once(client):
+    payloads = [_payload(portal_frame(bays=b, stories=1)) for b in range(1, 5)] + [{}]
+
+    response = client.post("/api/calculate-frame-batch", params={"stream": True}, json=payloads)
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(line["index"] for line in lines) == list(range(len(payloads)))
+
+    array = client.post("/api/calculate-frame-batch", json=payloads).json()
+    for line in lines:
+        assert line["result"] == array[line["index"]]
+
+
+def test_oversized_batch_is_rejected(client, monkeypatch):
+    monkeypatch.setattr(main, "BATCH_MAX_ITEMS", 2)
+    response = client.post("/api/calculate-batch", json=[_payload(continuous_beam())] * 3)
+    assert response.status_code == 413
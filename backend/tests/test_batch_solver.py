@@ -0,0 +1,90 @@
+"""Vectorized batch beam solver against the one-beam Slope Deflection solver."""
+import numpy as np
+import pytest
+
+from batch_solver import BatchSlopeDeflectionSolver, beam_layout
+from conftest import continuous_beam
+from models import LoadConfig, Span, Support
+from solver import SlopeDeflectionSolver
+
+SCALARS = ("moment_left", "moment_right", "shear_left", "shear_right", "max_moment", "max_moment_location")
+
+
+def _varied_beams(count: int):
+    """Beams of one layout with random lengths, stiffnesses and load magnitudes/positions."""
+    rng = np.random.default_rng(3)
+    base = continuous_beam(include_steps=False)
+    requests = []
+    for _ in range(count):
+        spans = []
+        for span in base.spans:
+            length = span.length * rng.uniform(0.5, 1.5)
+            loads = [load.model_copy(update={
+                "magnitude": load.magnitude * rng.uniform(-1, 2),
+                "position": None if load.position is None else rng.uniform(0, length)
+            }) for load in span.loads]
+            spans.append(span.model_copy(update={
+                "length": length,
+                "moment_of_inertia": span.moment_of_inertia * rng.uniform(0.5, 2),
+                "loads": loads
+            }))
+        requests.append(base.model_copy(update={"spans": spans}))
+    return requests
+
+
+def _assert_matches(batch_result, result):
+    for batch_span, span in zip(batch_result["span_results"], result["span_results"]):
+        for name in SCALARS:
+            assert batch_span[name] == pytest.approx(span[name], rel=1e-9, abs=1e-9), name
+        for name in ("sfd_data", "fmd_data", "emd_data", "bmd_data"):
+            np.testing.assert_allclose(batch_span[name].x_coords, span[name].x_coords, rtol=1e-12)
+            np.testing.assert_allclose(batch_span[name].values, span[name].values, rtol=1e-9, atol=1e-9)
+    for batch_node, node in zip(batch_result["node_results"], result["node_results"]):
+        assert batch_node["rotation"] == pytest.approx(node["rotation"], rel=1e-9, abs=1e-15)
+        assert batch_node["reaction"] == pytest.approx(node["reaction"], rel=1e-9, abs=1e-9)
+        if node["moment_reaction"] is None:
+            assert batch_node["moment_reaction"] is None
+        else:
+            assert batch_node["moment_reaction"] == pytest.approx(node["moment_reaction"], rel=1e-9)
+
+
+def test_batch_matches_one_solve_per_beam():
+    requests = _varied_beams(12)
+    assert len({beam_layout(request) for request in requests}) == 1
+
+    batch = BatchSlopeDeflectionSolver.from_requests(requests).results()
+    for batch_result, request in zip(batch, requests):
+        result = SlopeDeflectionSolver(request.spans, request.supports).solve(include_steps=False)
+        _assert_matches(batch_result, result)
+
+
+@pytest.mark.parametrize("supports", [
+    ["FIXED", "ROLLER", "FIXED"],
+    ["PINNED", "ROLLER", "ROLLER"],
+    ["FIXED", "FIXED", "FIXED"]
+])
+def test_support_layouts_and_applied_moments(supports):
+    supports = [Support(node_index=i, support_type=kind) for i, kind in enumerate(supports)]
+    span_sets = [
+        [
+            Span(id="a", length=4.0 + b, elastic_modulus=2e8, moment_of_inertia=1e-4,
+                 loads=[LoadConfig(load_type="MOMENT", magnitude=15.0 * b),
+                        LoadConfig(load_type="UDL", magnitude=6.0)]),
+            Span(id="b", length=6.0, elastic_modulus=2e8, moment_of_inertia=3e-4,
+                 loads=[LoadConfig(load_type="POINT_ARBITRARY", magnitude=20.0 + b, position=1.5)])
+        ]
+        for b in range(4)
+    ]
+
+    batch = BatchSlopeDeflectionSolver.from_spans(span_sets, supports).results()
+    for batch_result, spans in zip(batch, span_sets):
+        _assert_matches(batch_result, SlopeDeflectionSolver(spans, supports).solve(include_steps=False))
+
+
+def test_mixed_layouts_are_rejected():
+    requests = _varied_beams(2)
+    requests[1] = requests[1].model_copy(update={"supports": [
+        support.model_copy(update={"support_type": "FIXED"}) for support in requests[1].supports
+    ]})
+    with pytest.raises(ValueError, match="same layout"):
+        BatchSlopeDeflectionSolver.from_requests(requests)
@@ -0,0 +1,55 @@
+"""Sampled beam diagrams against the statics of every span."""
+import numpy as np
+import pytest
+
+from conftest import continuous_beam
+from solver import SlopeDeflectionSolver, DIAGRAM_POINTS
+
+
+def _load_terms(span, x):
+    """Shear and moment at x of the span's loads left of x, and their moment about the right end."""
+    L = span.length
+    shear, moment, about_right = np.zeros_like(x), np.zeros_like(x), 0.0
+    for load in span.loads:
+        w = load.magnitude
+        if load.load_type == "UDL":
+            shear += w * x
+            moment += w * x**2 / 2
+            about_right += w * L**2 / 2
+        elif load.load_type == "TRIANGULAR":
+            shear += w * x**2 / (2 * L)
+            moment += w * x**3 / (6 * L)
+            about_right += w * L**2 / 6
+        else:
+            a = L / 2 if load.load_type == "POINT_CENTER" else load.position
+            shear += w * (x > a)
+            moment += w * (x - a) * (x > a)
+            about_right += w * (L - a)
+    return shear, moment, about_right
+
+
+def test_diagrams_match_span_statics():
+    request = continuous_beam()
+    results = SlopeDeflectionSolver(request.spans, request.supports).solve()
+
+    for span, result in zip(request.spans, results["span_results"]):
+        L = span.length
+        x = np.array(result["sfd_data"].x_coords)
+        np.testing.assert_allclose(x, np.linspace(0, L, DIAGRAM_POINTS))
+        shear, moment, about_right = _load_terms(span, x)
+
+        # Hogging end moments, then the left reaction from moment equilibrium about the right end
+        M_left, M_right = result["moment_left"], -result["moment_right"]
+        R_left = (M_right - M_left + about_right) / L
+        R_left_ss = about_right / L
+        scale = max(abs(M_left), abs(M_right), 1.0)
+
+        fmd = R_left_ss * x - moment
+        emd = M_left + (M_right - M_left) * x / L
+        np.testing.assert_allclose(result["fmd_data"].values, fmd, atol=1e-9 * scale)
+        np.testing.assert_allclose(result["emd_data"].values, emd, atol=1e-9 * scale)
+        np.testing.assert_allclose(result["bmd_data"].values, fmd + emd, atol=1e-9 * scale)
+        np.testing.assert_allclose(result["sfd_data"].values, R_left - shear, atol=1e-9 * scale)
+
+        bmd = fmd + emd
+        assert abs(result["max_moment"]) == pytest.approx(np.abs(bmd).max())
@@ -0,0 +1,107 @@
+"""Binary response encoding against the JSON body of the same response."""
+import json
+
+import numpy as np
+import pytest
+
+from analysis import analyze_beam, analyze_frame, analyze_pattern_load, serialize_response
+from binary_format import MEDIA_TYPE, decode_response, encode_response, negotiate_binary
+from conftest import portal_frame
+from models import CalculationRequest, LoadConfig, PatternLoadRequest, Span, Support
+
+
+def _plain(value):
+    """Decoded value with NumPy arrays and scalars turned into lists and Python numbers."""
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    if isinstance(value, np.ndarray):
+        return _plain(value.tolist())
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _assert_same(decoded, expected, rtol, path="$"):
+    if isinstance(expected, dict):
+        assert isinstance(decoded, dict) and decoded.keys() == expected.keys(), path
+        for key in expected:
+            _assert_same(decoded[key], expected[key], rtol, f"{path}.{key}")
+    elif isinstance(expected, list):
+        assert isinstance(decoded, list) and len(decoded) == len(expected), path
+        for i, (a, b) in enumerate(zip(decoded, expected)):
+            _assert_same(a, b, rtol, f"{path}[{i}]")
+    elif isinstance(expected, float) and not isinstance(decoded, bool):
+        assert decoded == pytest.approx(expected, rel=rtol, abs=rtol), path
+    else:
+        assert decoded == expected and type(decoded) is type(expected), path
+
+
+def _beam():
+    return analyze_beam(CalculationRequest(
+        spans=[
+            Span(id="a", length=5.0, elastic_modulus=2e8, moment_of_inertia=1e-4,
+                 loads=[LoadConfig(load_type="UDL", magnitude=10.0)]),
+            Span(id="b", length=7.0, elastic_modulus=2e8, moment_of_inertia=2e-4,
+                 loads=[LoadConfig(load_type="POINT_ARBITRARY", magnitude=40.0, position=3.0)])
+        ],
+        supports=[Support(node_index=0, support_type="FIXED"), Support(node_index=1, support_type="ROLLER"),
+                  Support(node_index=2, support_type="PINNED")]
+    ))
+
+
+RESPONSES = {
+    "beam": _beam,
+    "frame": lambda: analyze_frame(portal_frame(bays=2, stories=2)),
+    "pattern": lambda: analyze_pattern_load(PatternLoadRequest(
+        spans=[Span(id=f"s{i}", length=5.0 + i, elastic_modulus=2e8, moment_of_inertia=1e-4) for i in range(3)],
+        supports=[Support(node_index=i, support_type="PINNED" if i == 0 else "ROLLER") for i in range(4)],
+        live_loads=[10.0]
+    ))
+}
+
+
+@pytest.mark.parametrize("kind", sorted(RESPONSES))
+def test_float64_round_trip_matches_json_body(kind):
+    response = RESPONSES[kind]()
+    expected = json.loads(serialize_response(response))
+    _assert_same(_plain(decode_response(encode_response(response))), expected, rtol=0)
+
+
+@pytest.mark.parametrize("kind", sorted(RESPONSES))
+def test_float32_round_trip_matches_json_body_to_single_precision(kind):
+    response = RESPONSES[kind]()
+    expected = json.loads(serialize_response(response))
+    _assert_same(_plain(decode_response(encode_response(response, "float32"))), expected, rtol=1e-6)
+
+
+def test_arrays_are_aligned_views():
+    body = encode_response(RESPONSES["frame"]())
+    decoded = decode_response(body)
+    displacements = decoded["displacements"]
+    assert isinstance(displacements, np.ndarray) and not displacements.flags.owndata
+    start = np.frombuffer(body, dtype=np.uint8).ctypes.data
+    assert (displacements.ctypes.data - start) % 8 == 0
+
+
+def test_negotiation():
+    assert negotiate_binary(None) is None
+    assert negotiate_binary("application/json") is None
+    assert negotiate_binary(MEDIA_TYPE) == "float64"
+    assert negotiate_binary(f"{MEDIA_TYPE}; dtype=float32") == "float32"
+
+
+def test_unsupported_dtype_is_not_acceptable():
+    from fastapi.testclient import TestClient
+    from main import app
+
+    client = TestClient(app)
+    body = json.loads(portal_frame().model_dump_json(by_alias=True))
+    response = client.post("/api/calculate-frame", json=body, headers={"Accept": f"{MEDIA_TYPE}; dtype=int8"})
+    assert response.status_code == 406
+
+    response = client.post("/api/calculate-frame", json=body, headers={"Accept": f"{MEDIA_TYPE}; dtype=float32"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == MEDIA_TYPE
+    assert decode_response(response.content)["success"] is True
@@ -0,0 +1,34 @@
+"""N/V/M envelopes across load cases and combinations against the scenario diagrams."""
+import numpy as np
+
+from conftest import portal_frame
+from frame_solver import FrameSolver
+from models import FrameLoadCombination
+
+
+def test_envelope_is_the_extreme_of_every_scenario():
+    request = portal_frame(bays=2, stories=2, combinations=[
+        FrameLoadCombination(name="ULS", factors={"Dead": 1.2, "Wind": 1.5}),
+        FrameLoadCombination(name="Uplift", factors={"Dead": 0.9, "Wind": -1.5})
+    ])
+    results = FrameSolver().solve(request)
+    envelope = results["envelope"]
+    scenarios = results["case_results"] + results["combination_results"]
+    assert envelope["scenarios"] == ["Dead", "Wind", "ULS", "Uplift"]
+
+    for i, member in enumerate(envelope["member_envelopes"]):
+        assert member["member_id"] == request.members[i].id
+        for prefix in ("n", "v", "m"):
+            # (scenarios, stations)
+            values = np.array([s["member_results"][i][f"{prefix}_diagram"] for s in scenarios])
+            np.testing.assert_array_equal(member[f"{prefix}_max"], values.max(axis=0))
+            np.testing.assert_array_equal(member[f"{prefix}_min"], values.min(axis=0))
+
+            stations = np.arange(values.shape[1])
+            np.testing.assert_array_equal(values[member[f"{prefix}_max_scenario"], stations], member[f"{prefix}_max"])
+            np.testing.assert_array_equal(values[member[f"{prefix}_min_scenario"], stations], member[f"{prefix}_min"])
+
+
+def test_no_envelope_without_load_cases():
+    results = FrameSolver().solve(portal_frame(load_cases=[], combinations=[]))
+    assert results["envelope"] is None
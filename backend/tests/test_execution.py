@@ -0,0 +1,79 @@
+"""Inline, thread-pool and process-pool execution of analyses."""
+import asyncio
+import os
+import threading
+
+import pytest
+
+from analysis import analyze_frame
+from conftest import portal_frame
+from execution import SolverExecutor
+
+
+def _thread_name() -> str:
+    return threading.current_thread().name
+
+
+def _wait_for(event: threading.Event) -> bool:
+    return event.wait(timeout=5)
+
+
+def test_small_models_run_inline_and_large_ones_on_the_pool():
+    executor = SolverExecutor("thread", workers=2, inline_max_dof=100)
+    executor.start()
+    try:
+        async def names():
+            return (await executor.run(_thread_name, dof_count=100),
+                    await executor.run(_thread_name, dof_count=101))
+        inline, pooled = asyncio.run(names())
+    finally:
+        executor.shutdown()
+
+    assert inline == threading.current_thread().name
+    assert pooled.startswith("solver")
+
+
+def test_event_loop_keeps_serving_during_a_pool_solve():
+    # The pooled call only returns once the event loop has run another task
+    executor = SolverExecutor("thread", workers=1, inline_max_dof=0)
+    executor.start()
+    event = threading.Event()
+
+    async def main():
+        solve = asyncio.ensure_future(executor.run(_wait_for, event, dof_count=1))
+        await asyncio.sleep(0)
+        event.set()
+        return await solve
+
+    try:
+        assert asyncio.run(main())
+    finally:
+        executor.shutdown()
+
+
+def test_process_pool_gives_the_inline_result():
+    request = portal_frame()
+    executor = SolverExecutor("process", workers=1, inline_max_dof=0)
+    executor.start()
+    try:
+        pooled = asyncio.run(executor.run(analyze_frame, request, dof_count=1))
+    finally:
+        executor.shutdown()
+
+    assert pooled.model_dump() == analyze_frame(request).model_dump()
+
+
+def test_configuration_from_the_environment(monkeypatch):
+    monkeypatch.setenv("SOLVER_BACKEND", "inline")
+    monkeypatch.setenv("SOLVER_WORKERS", "3")
+    monkeypatch.setenv("SOLVER_INLINE_MAX_DOF", "42")
+    executor = SolverExecutor.from_env()
+    assert (executor.backend, executor.workers, executor.inline_max_dof) == ("inline", 3, 42)
+
+    # Nothing to start: everything runs inline
+    executor.start()
+    assert executor.pool is None
+    assert asyncio.run(executor.run(os.getpid, dof_count=10 ** 6)) == os.getpid()
+
+    with pytest.raises(ValueError):
+        SolverExecutor("cluster")
@@ -0,0 +1,29 @@
+"""Sparse (COO/CSR) against dense global stiffness assembly."""
+import pytest
+
+import frame_solver
+from conftest import portal_frame, assert_same_results
+from frame_solver import FrameSolver, SPARSE_ASSEMBLY_MIN_DOF
+
+pytest.importorskip("scipy")
+
+
+@pytest.mark.parametrize("shuffle", [None, 4])
+def test_sparse_assembly_matches_dense(shuffle):
+    request = portal_frame(bays=5, stories=4, shuffle=shuffle)
+    assert_same_results(FrameSolver("sparse").solve(request), FrameSolver("dense").solve(request), rtol=1e-10)
+
+
+def test_auto_assembly_goes_sparse_at_the_threshold(monkeypatch):
+    solver = FrameSolver()
+    assert solver._use_sparse(SPARSE_ASSEMBLY_MIN_DOF)
+    assert not solver._use_sparse(SPARSE_ASSEMBLY_MIN_DOF - 1)
+
+    monkeypatch.setattr(frame_solver, "sp", None)
+    assert not solver._use_sparse(SPARSE_ASSEMBLY_MIN_DOF)
+
+
+def test_sparse_assembly_requires_scipy(monkeypatch):
+    monkeypatch.setattr(frame_solver, "sp", None)
+    with pytest.raises(ValueError, match="requires SciPy"):
+        FrameSolver("sparse")
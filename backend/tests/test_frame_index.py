@@ -0,0 +1,49 @@
+"""Node, member and load lookup indexes of a frame request."""
+import numpy as np
+
+from conftest import portal_frame, assert_same_results
+from frame_solver import FrameSolver, FrameModelIndex
+from models import FramePointLoad, FrameUniformLoad
+
+
+def test_index_maps_ids_to_rows():
+    request = portal_frame(bays=2, stories=1, shuffle=2)
+    index = FrameModelIndex(request)
+
+    assert [request.nodes[row].id for row in index.node_row.values()] == list(index.node_row)
+    assert index.member_row == {member.id: i for i, member in enumerate(request.members)}
+    for member, (start, end) in zip(request.members, index.member_nodes):
+        assert (request.nodes[start].id, request.nodes[end].id) == (member.start_node_id, member.end_node_id)
+        np.testing.assert_array_equal(index.node_coords[start], [request.nodes[start].x, request.nodes[start].y])
+
+    dofs = index.member_dofs()
+    np.testing.assert_array_equal(dofs[:, :3], 3 * index.member_nodes[:, :1] + np.arange(3))
+    np.testing.assert_array_equal(dofs[:, 3:], 3 * index.member_nodes[:, 1:] + np.arange(3))
+
+
+def test_node_listing_order_does_not_change_the_results():
+    request = portal_frame(bays=3, stories=3)
+    shuffled = portal_frame(bays=3, stories=3, shuffle=6)
+    results, shuffled_results = FrameSolver().solve(request), FrameSolver().solve(shuffled)
+
+    # Members keep their order; node DOFs follow the node listing
+    position = {node.id: i for i, node in enumerate(shuffled.nodes)}
+    order = np.array([3 * position[node.id] + k for node in request.nodes for k in range(3)])
+    for key in ("displacements", "reactions"):
+        np.testing.assert_allclose(np.asarray(shuffled_results[key])[order], results[key],
+                                   atol=1e-9 * np.abs(results[key]).max())
+    forces = [[m[k] for k in ("axial_start", "shear_start", "moment_start")] for m in results["member_results"]]
+    shuffled_forces = [[m[k] for k in ("axial_start", "shear_start", "moment_start")]
+                       for m in shuffled_results["member_results"]]
+    np.testing.assert_allclose(shuffled_forces, forces, atol=1e-9 * np.abs(forces).max())
+
+
+def test_loads_on_unknown_ids_are_ignored():
+    request = portal_frame(bays=2, stories=2)
+    expected = FrameSolver().solve(request)
+    request.point_loads.append(FramePointLoad(type="NODE_LOAD", target_id="nowhere", magnitude_x=50.0))
+    request.point_loads.append(FramePointLoad(type="MEMBER_POINT_LOAD", target_id="nothing", magnitude_y=-5.0,
+                                              position=1.0))
+    request.uniform_loads.append(FrameUniformLoad(member_id="nothing", magnitude_y=-9.0))
+
+    assert_same_results(FrameSolver().solve(request), expected, rtol=0)
@@ -0,0 +1,76 @@
+"""Frame session updates against a fresh FrameSolver solve of the edited model."""
+import pytest
+
+from conftest import portal_frame, assert_same_results
+from frame_session import FrameSession, MAX_CORRECTION_DOF
+from frame_solver import FrameSolver
+from models import FrameMemberUpdate
+from stiffness_solvers import StructureUnstableError
+
+
+def _fresh(session: FrameSession):
+    return FrameSolver().solve(session.request)
+
+
+@pytest.mark.parametrize("solver", ["direct", "banded", "skyline"])
+def test_updates_match_a_fresh_solve(scipy_mode, solver):
+    # 549 free DOFs: the correction may grow to 27 DOFs before K_ff is refactorized
+    session = FrameSession(portal_frame(bays=60, stories=3, solver=solver, load_cases=[], combinations=[]))
+    assert_same_results(session.results, _fresh(session))
+
+    edits = [
+        [FrameMemberUpdate(id="b2_3", moment_of_inertia=5e-4)],
+        [FrameMemberUpdate(id="c1_0", cross_section_area=2e-2, elastic_modulus=3e8)],
+        # A release changes the member's fixed-end actions as well as its stiffness
+        [FrameMemberUpdate(id="b1_1", release_end=True), FrameMemberUpdate(id="c3_4", moment_of_inertia=1e-5)]
+    ]
+    for edit in edits:
+        results = session.update(edit)
+        assert results["session_report"]["update"] == "low_rank"
+        assert_same_results(results, _fresh(session))
+    assert results["session_report"]["updates_since_factorization"] == len(edits)
+
+
+def test_refactorizes_after_refactor_after_updates():
+    session = FrameSession(portal_frame(bays=3, stories=2), refactor_after=1)
+    assert session.update([FrameMemberUpdate(id="b1_1", moment_of_inertia=3e-4)])["session_report"]["update"] == "low_rank"
+
+    results = session.update([FrameMemberUpdate(id="b1_2", moment_of_inertia=3e-4)])
+    assert results["session_report"]["update"] == "factorization"
+    assert_same_results(results, _fresh(session))
+
+
+def test_large_edits_refactorize_instead_of_growing_the_correction():
+    session = FrameSession(portal_frame(bays=40, stories=2))
+    free = len(session._free_dofs)
+
+    results = session.update([FrameMemberUpdate(id=m.id, moment_of_inertia=3e-4) for m in session.request.members])
+    assert results["session_report"]["update"] == "factorization"
+    assert_same_results(results, _fresh(session))
+
+    # The next single-member edit is a small correction of the new factor
+    results = session.update([FrameMemberUpdate(id="b2_7", moment_of_inertia=5e-4)])
+    assert results["session_report"]["update"] == "low_rank"
+    assert results["session_report"]["rank"] <= min(MAX_CORRECTION_DOF, free)
+    assert_same_results(results, _fresh(session))
+
+
+def test_edit_creating_a_mechanism_leaves_the_session_unchanged(scipy_mode):
+    session = FrameSession(portal_frame(bays=1, stories=1))
+    before = session.results
+
+    # Pinning both ends of the only girder and one column top lets the frame sway
+    with pytest.raises(StructureUnstableError, match="mechanism"):
+        session.update([
+            FrameMemberUpdate(id="b1_1", release_start=True, release_end=True),
+            FrameMemberUpdate(id="c1_0", release_start=True, release_end=True),
+            FrameMemberUpdate(id="c1_1", release_start=True)
+        ])
+    assert session.results is before
+    assert_same_results(session.update([FrameMemberUpdate(id="b1_1", moment_of_inertia=4e-4)]), _fresh(session))
+
+
+def test_unknown_member_is_rejected():
+    session = FrameSession(portal_frame(bays=1, stories=1))
+    with pytest.raises(ValueError, match="Unknown member"):
+        session.update([FrameMemberUpdate(id="nope", moment_of_inertia=1e-4)])
@@ -0,0 +1,63 @@
+"""Influence lines against the point-load solve at every unit-load position."""
+import numpy as np
+import pytest
+
+from conftest import continuous_beam
+from models import LoadConfig
+from solver import SlopeDeflectionSolver, DIAGRAM_POINTS
+
+
+def _point_load_solve(request, position):
+    """Solve with only a unit downward load at a position along the beam."""
+    edges = np.concatenate([[0.0], np.cumsum([span.length for span in request.spans])])
+    loaded = min(int(np.searchsorted(edges, position, side="right")) - 1, len(request.spans) - 1)
+    spans = [span.model_copy(update={"loads": []}) for span in request.spans]
+    spans[loaded].loads = [LoadConfig(load_type="POINT_ARBITRARY", magnitude=1.0,
+                                      position=position - edges[loaded])]
+    return SlopeDeflectionSolver(spans, request.supports).solve(include_steps=False)
+
+
+def test_ordinates_match_point_load_solves():
+    request = continuous_beam()
+    positions = np.array([0.7, 3.3, 6.4, 10.0, 13.9, 16.2, 18.5])
+    # Sections at a sampled diagram station of each span (away from every load position)
+    station = [10, 50, 30]
+    sections = [(i, span.length * k / (DIAGRAM_POINTS - 1)) for i, (span, k) in enumerate(zip(request.spans, station))]
+
+    lines = SlopeDeflectionSolver(request.spans, request.supports).influence_lines(positions, sections)
+    np.testing.assert_array_equal(lines["positions"], positions)
+
+    for j, position in enumerate(positions):
+        results = _point_load_solve(request, position)
+        span_results, node_results = results["span_results"], results["node_results"]
+
+        np.testing.assert_allclose(lines["rotations"][:, j], [n["rotation"] for n in node_results],
+                                   rtol=1e-10, atol=1e-15)
+        np.testing.assert_allclose(lines["reactions"][:, j], [n["reaction"] for n in node_results],
+                                   rtol=1e-10, atol=1e-12)
+        node_moments = [span_results[0]["moment_left"]] + [-s["moment_right"] for s in span_results]
+        np.testing.assert_allclose(lines["node_moments"][:, j], node_moments, rtol=1e-10, atol=1e-12)
+
+        for i, (span, x) in enumerate(sections):
+            result = span_results[span]
+            assert result["bmd_data"].x_coords[station[i]] == pytest.approx(x)
+            assert lines["section_moments"][i, j] == pytest.approx(result["bmd_data"].values[station[i]], abs=1e-10)
+            assert lines["section_shears"][i, j] == pytest.approx(result["sfd_data"].values[station[i]], abs=1e-10)
+
+
+def test_default_positions_cover_the_beam():
+    request = continuous_beam()
+    lines = SlopeDeflectionSolver(request.spans, request.supports).influence_lines()
+
+    positions = lines["positions"]
+    assert positions[0] == 0 and positions[-1] == pytest.approx(19.0)
+    assert np.all(np.diff(positions) > 0)
+    # Midspan sections by default
+    np.testing.assert_allclose(lines["section_x"], [3.0, 4.0, 2.5])
+    assert lines["section_moments"].shape == (3, len(positions))
+
+
+def test_positions_off_the_beam_are_rejected():
+    request = continuous_beam()
+    with pytest.raises(ValueError):
+        SlopeDeflectionSolver(request.spans, request.supports).influence_lines(np.array([-1.0, 2.0]))
@@ -0,0 +1,39 @@
+"""Named load cases solved with one factorization of K_ff."""
+import pytest
+
+import frame_solver
+from conftest import portal_frame, assert_same_results
+from frame_solver import FrameSolver
+
+
+def test_each_case_matches_its_own_solve():
+    request = portal_frame(bays=3, stories=2)
+    results = FrameSolver().solve(request)
+
+    assert [case["name"] for case in results["case_results"]] == ["Dead", "Wind"]
+    for case, case_result in zip(request.load_cases, results["case_results"]):
+        alone = FrameSolver().solve(request.model_copy(update={
+            "point_loads": case.point_loads, "uniform_loads": case.uniform_loads, "load_cases": [], "combinations": []
+        }))
+        assert_same_results(case_result, alone, rtol=1e-10)
+
+    # The base loads are a case of their own
+    base = FrameSolver().solve(request.model_copy(update={"load_cases": [], "combinations": []}))
+    assert_same_results({**results, "case_results": []}, base, rtol=1e-10)
+
+
+@pytest.mark.parametrize("assembly", ["dense", "sparse"])
+def test_stiffness_is_factorized_once(monkeypatch, assembly):
+    pytest.importorskip("scipy")
+    calls = []
+
+    def counting_factorize(K_ff, *args, **kwargs):
+        calls.append(K_ff.shape)
+        return factorize_stiffness(K_ff, *args, **kwargs)
+
+    factorize_stiffness = frame_solver.factorize_stiffness
+    monkeypatch.setattr(frame_solver, "factorize_stiffness", counting_factorize)
+    results = FrameSolver(assembly).solve(portal_frame(bays=3, stories=2))
+
+    assert len(results["case_results"]) == 2
+    assert len(calls) == 1
@@ -0,0 +1,49 @@
+"""Load combinations by superposition against solves of the factored loads."""
+import pytest
+
+from conftest import portal_frame, assert_same_results
+from frame_solver import FrameSolver
+from models import FrameLoadCase, FrameLoadCombination
+
+
+def _scaled(loads, factor):
+    return [load.model_copy(update={
+        key: getattr(load, key) * factor for key in ("magnitude_x", "magnitude_y", "moment") if hasattr(load, key)
+    }) for load in loads]
+
+
+def test_combination_matches_the_solve_of_its_factored_loads():
+    request = portal_frame(bays=3, stories=2, combinations=[
+        FrameLoadCombination(name="ULS", factors={"Dead": 1.2, "Wind": 1.5}),
+        FrameLoadCombination(name="Uplift", factors={"Dead": 0.9, "Wind": -1.5})
+    ])
+    results = FrameSolver().solve(request)
+    assert [combo["name"] for combo in results["combination_results"]] == ["ULS", "Uplift"]
+
+    cases = {case.name: case for case in request.load_cases}
+    for combo, combo_result in zip(request.combinations, results["combination_results"]):
+        point_loads, uniform_loads = [], []
+        for name, factor in combo.factors.items():
+            point_loads += _scaled(cases[name].point_loads, factor)
+            uniform_loads += _scaled(cases[name].uniform_loads, factor)
+        alone = FrameSolver().solve(request.model_copy(update={
+            "point_loads": point_loads, "uniform_loads": uniform_loads, "load_cases": [], "combinations": []
+        }))
+        assert_same_results(combo_result, alone, rtol=1e-10)
+
+        # Diagrams superpose too
+        for member, alone_member in zip(combo_result["member_results"], alone["member_results"]):
+            assert member["m_diagram"] == pytest.approx(alone_member["m_diagram"], rel=1e-9, abs=1e-9)
+
+
+def test_unknown_case_is_rejected():
+    request = portal_frame(combinations=[FrameLoadCombination(name="ULS", factors={"Snow": 1.5})])
+    with pytest.raises(ValueError, match="unknown load case 'Snow'"):
+        FrameSolver().solve(request)
+
+
+def test_case_names_must_be_unique():
+    request = portal_frame()
+    request.load_cases.append(FrameLoadCase(name="Dead"))
+    with pytest.raises(ValueError, match="unique"):
+        FrameSolver().solve(request)
@@ -0,0 +1,56 @@
+"""Mechanism detection and location from the factorization pivots."""
+import numpy as np
+import pytest
+
+import stiffness_solvers
+from conftest import released_portal
+from frame_solver import FrameSolver
+from models import FrameRequest, FrameNode, FrameMember, FramePointLoad
+from stiffness_solvers import DenseCholeskyFactor, StructureUnstableError
+
+
+@pytest.mark.parametrize("assembly", ["dense", "sparse"])
+def test_released_portal_mechanism_is_located(scipy_mode, assembly):
+    if assembly == "sparse" and scipy_mode == "numpy":
+        pytest.skip("Sparse assembly requires SciPy")
+    with pytest.raises(StructureUnstableError) as error:
+        FrameSolver(assembly).solve(released_portal())
+
+    message = str(error.value)
+    assert message.startswith("Structure is unstable: mechanism at ")
+    # The sway of the beam level
+    assert "node B (x)" in message
+    assert "node C (x)" in message
+    assert "node A (x)" not in message and "node D (y)" not in message
+
+
+def test_free_joint_rotation_is_located(scipy_mode):
+    # Both members are pinned at B: the joint itself can spin, nothing else moves
+    request = FrameRequest(
+        nodes=[
+            FrameNode(id="A", x=0, y=0, fix_x=True, fix_y=True, fix_r=True),
+            FrameNode(id="B", x=4, y=0),
+            FrameNode(id="C", x=8, y=0, fix_x=True, fix_y=True, fix_r=True)
+        ],
+        members=[
+            FrameMember(id="AB", start_node_id="A", end_node_id="B", elastic_modulus=2e8,
+                        moment_of_inertia=1e-4, cross_section_area=1e-2, release_end=True),
+            FrameMember(id="BC", start_node_id="B", end_node_id="C", elastic_modulus=2e8,
+                        moment_of_inertia=1e-4, cross_section_area=1e-2, release_start=True)
+        ],
+        point_loads=[FramePointLoad(type="NODE_LOAD", target_id="B", magnitude_y=-10)]
+    )
+    with pytest.raises(StructureUnstableError, match=r"mechanism at node B \(rotation\)$"):
+        FrameSolver().solve(request)
+
+
+def test_dense_factor_without_scipy_substitutes_all_columns(monkeypatch):
+    monkeypatch.setattr(stiffness_solvers, "sla", None)
+    rng = np.random.default_rng(1)
+    A = rng.normal(size=(9, 9))
+    K = A @ A.T + 9 * np.eye(9)
+    rhs = rng.normal(size=(9, 4))
+
+    factor = DenseCholeskyFactor(K)
+    np.testing.assert_allclose(factor.solve(rhs), np.linalg.solve(K, rhs), rtol=1e-10)
+    np.testing.assert_allclose(factor.solve(rhs[:, 0]), np.linalg.solve(K, rhs[:, 0]), rtol=1e-10)
@@ -0,0 +1,86 @@
+"""Batched member stiffness and transformation, with end releases, against closed-form results."""
+import numpy as np
+import pytest
+
+from conftest import portal_frame
+from frame_solver import FrameSolver
+from models import FrameRequest, FrameNode, FrameMember, FramePointLoad, FrameUniformLoad
+
+E, I, A = 2e8, 1e-4, 1e-2
+
+
+def _member(member_id, start, end, **releases):
+    return FrameMember(id=member_id, start_node_id=start, end_node_id=end, elastic_modulus=E,
+                       moment_of_inertia=I, cross_section_area=A, **releases)
+
+
+def test_inclined_cantilever_tip_deflection():
+    # 3-4-5 cantilever with a tip load P square to the member
+    P, L = 10.0, 5.0
+    normal = np.array([-0.8, 0.6])
+    request = FrameRequest(
+        nodes=[FrameNode(id="A", x=0, y=0, fix_x=True, fix_y=True, fix_r=True), FrameNode(id="B", x=3, y=4)],
+        members=[_member("AB", "A", "B")],
+        point_loads=[FramePointLoad(type="NODE_LOAD", target_id="B", magnitude_x=P * normal[0],
+                                    magnitude_y=P * normal[1])]
+    )
+    u = np.array(FrameSolver().solve(request)["displacements"])
+
+    np.testing.assert_allclose(u[3:5], P * L**3 / (3 * E * I) * normal, rtol=1e-10)
+    assert u[5] == pytest.approx(P * L**2 / (2 * E * I), rel=1e-10)
+
+
+@pytest.mark.parametrize("released_end", ["start", "end"])
+def test_released_end_carries_no_moment(released_end):
+    # Fixed-ended member pinned to one of its nodes: a propped cantilever, wL^2/8 at the fixed end
+    w, L = 12.0, 6.0
+    request = FrameRequest(
+        nodes=[FrameNode(id="A", x=0, y=0, fix_x=True, fix_y=True, fix_r=True),
+               FrameNode(id="B", x=L, y=0, fix_x=True, fix_y=True, fix_r=True)],
+        members=[_member("AB", "A", "B", **{f"release_{released_end}": True})],
+        uniform_loads=[FrameUniformLoad(member_id="AB", magnitude_y=-w)]
+    )
+    result = FrameSolver().solve(request)["member_results"][0]
+
+    released, fixed = ("moment_start", "moment_end") if released_end == "start" else ("moment_end", "moment_start")
+    assert result[released] == pytest.approx(0.0, abs=1e-9)
+    assert abs(result[fixed]) == pytest.approx(w * L**2 / 8, rel=1e-10)
+
+
+def test_pin_ended_members_act_as_a_truss():
+    # Two-bar truss: the apex load is carried by axial forces only
+    P = 30.0
+    # No member restrains a joint rotation, so the rotations are fixed to keep K_ff regular
+    request = FrameRequest(
+        nodes=[FrameNode(id="A", x=0, y=0, fix_x=True, fix_y=True, fix_r=True),
+               FrameNode(id="B", x=3, y=4, fix_r=True),
+               FrameNode(id="C", x=6, y=0, fix_x=True, fix_y=True, fix_r=True)],
+        members=[_member("AB", "A", "B", release_start=True, release_end=True),
+                 _member("BC", "B", "C", release_start=True, release_end=True)],
+        point_loads=[FramePointLoad(type="NODE_LOAD", target_id="B", magnitude_y=-P)]
+    )
+    for result in FrameSolver().solve(request)["member_results"]:
+        # Each bar carries (P / 2) / sin(theta), sin(theta) = 4 / 5
+        assert abs(result["axial_start"]) == pytest.approx(P / 2 / 0.8, rel=1e-10)
+        for key in ("shear_start", "moment_start", "shear_end", "moment_end"):
+            assert result[key] == pytest.approx(0.0, abs=1e-9)
+
+
+def test_rotated_frame_has_the_same_member_forces():
+    # Member loads are local, so rotating the geometry and the nodal loads changes no member end force
+    request = portal_frame(bays=2, stories=2)
+    request.members[-1].release_end = True
+    angle = np.radians(30.0)
+    c, s = np.cos(angle), np.sin(angle)
+    rotated = request.model_copy(deep=True)
+    for node in rotated.nodes:
+        node.x, node.y = c * node.x - s * node.y, s * node.x + c * node.y
+    for load in rotated.point_loads:
+        if load.type == "NODE_LOAD":
+            px, py = load.magnitude_x, load.magnitude_y
+            load.magnitude_x, load.magnitude_y = c * px - s * py, s * px + c * py
+
+    keys = ("axial_start", "shear_start", "moment_start", "axial_end", "shear_end", "moment_end")
+    forces = [[m[k] for k in keys] for m in FrameSolver().solve(request)["member_results"]]
+    rotated_forces = [[m[k] for k in keys] for m in FrameSolver().solve(rotated)["member_results"]]
+    np.testing.assert_allclose(rotated_forces, forces, atol=1e-9 * np.abs(forces).max())
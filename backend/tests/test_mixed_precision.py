@@ -0,0 +1,80 @@
+"""Float32 factorization with float64 iterative refinement against the dense double-precision solve."""
+import numpy as np
+import pytest
+
+from conftest import portal_frame, released_portal, assert_same_results
+from frame_solver import FrameSolver
+from stiffness_solvers import (
+    MAX_REFINEMENT_STEPS, RefinedFactor, RefinementNotConvergedError, StructureUnstableError,
+    factorize_stiffness
+)
+
+
+@pytest.mark.parametrize("solver", ["direct", "banded", "skyline"])
+def test_mixed_precision_matches_dense_direct(scipy_mode, solver):
+    expected = FrameSolver("dense").solve(portal_frame(bays=6, stories=3, solver="direct"))
+    results = FrameSolver().solve(portal_frame(bays=6, stories=3, solver=solver, precision="mixed"))
+
+    assert results["solver_report"]["precision"] == "mixed"
+    assert_same_results(results, expected)
+
+
+def test_refined_factor_reaches_double_precision_accuracy():
+    rng = np.random.default_rng(2)
+    A = rng.normal(size=(40, 40))
+    K = A @ A.T + 40 * np.eye(40)
+    rhs = rng.normal(size=(40, 2))
+
+    factor = RefinedFactor(K, factorize_stiffness)
+    np.testing.assert_allclose(factor.solve(rhs), np.linalg.solve(K, rhs), rtol=1e-12)
+    assert max(factor.steps) >= 1
+
+
+def test_float32_factor_refuses_an_ill_conditioned_matrix():
+    # Condition number ~1e12, far beyond what a float32 factor can refine;
+    # FrameSolver then refactorizes in float64
+    Q, _ = np.linalg.qr(np.random.default_rng(3).normal(size=(30, 30)))
+    K = Q @ np.diag(np.logspace(0, 12, 30)) @ Q.T
+
+    with pytest.raises((StructureUnstableError, RefinementNotConvergedError)):
+        RefinedFactor(K, factorize_stiffness).solve(np.ones(30))
+
+
+@pytest.mark.parametrize("area, inertia", [(1e9, 1e-4), (1e3, 1e-12)])
+def test_mixed_precision_is_accurate_with_very_stiff_members(scipy_mode, area, inertia):
+    # A column far stiffer axially, and a girder far more flexible, than the rest:
+    # ||K|| alone says nothing about the accuracy of the other DOFs
+    request = portal_frame(bays=2, stories=2, solver="direct")
+    request.members[0].cross_section_area = area
+    request.members[3].moment_of_inertia = inertia
+    expected = FrameSolver("dense").solve(request)
+    results = FrameSolver().solve(request.model_copy(update={"precision": "mixed"}))
+
+    report = results["solver_report"]
+    assert report["precision"] == "mixed"
+    assert 1 <= report["iterations"] <= MAX_REFINEMENT_STEPS
+    assert report["residual"] < 1e-12
+    assert_same_results(results, expected)
+
+
+def test_refinement_reports_its_steps_and_true_residual():
+    # Axial terms 1e8 times the bending terms, as in a member with A >> I
+    rng = np.random.default_rng(4)
+    A = rng.normal(size=(24, 24))
+    D = np.diag(np.where(np.arange(24) % 3 == 0, 1e4, 1.0))
+    K = D @ (A @ A.T + 24 * np.eye(24)) @ D
+    rhs = rng.normal(size=(24, 3))
+
+    factor = RefinedFactor(K, factorize_stiffness)
+    u = factor.solve(rhs)
+    true_residuals = np.linalg.norm(rhs - K @ u, axis=0) / np.linalg.norm(rhs, axis=0)
+
+    assert len(factor.steps) == 3 and all(1 <= steps <= MAX_REFINEMENT_STEPS for steps in factor.steps)
+    np.testing.assert_allclose(factor.residuals, true_residuals, rtol=1e-6)
+    np.testing.assert_allclose(u, np.linalg.solve(K, rhs), rtol=1e-10, atol=0)
+
+
+def test_mechanism_is_located_in_mixed_precision(scipy_mode):
+    # The float32 factor fails, and the float64 retry locates the mechanism
+    with pytest.raises(StructureUnstableError, match=r"node B \(x\)"):
+        FrameSolver().solve(released_portal(precision="mixed"))
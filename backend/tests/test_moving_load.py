@@ -0,0 +1,75 @@
+"""Moving-load envelopes against single solves of the beam at every train position."""
+import numpy as np
+import pytest
+
+from analysis import analyze_beam, analyze_moving_load, moving_load_dof_count
+from models import CalculationRequest, LoadConfig, MovingLoadRequest, Span, Support
+from moving_load import MOVING_LOAD_MAX_POSITIONS
+
+SPANS = [
+    Span(id="a", length=6.0, elastic_modulus=2e8, moment_of_inertia=1e-4),
+    Span(id="b", length=8.0, elastic_modulus=2e8, moment_of_inertia=2e-4),
+    Span(id="c", length=5.0, elastic_modulus=2e8, moment_of_inertia=1e-4)
+]
+SUPPORTS = [
+    Support(node_index=0, support_type="PINNED"), Support(node_index=1, support_type="ROLLER"),
+    Support(node_index=2, support_type="ROLLER"), Support(node_index=3, support_type="FIXED")
+]
+
+
+def _moment_at(span_result, loads, x: float) -> float:
+    """Bending moment at x of a span carrying only point loads, by statics from its left end."""
+    moment = span_result.bmd_data.values[0] + span_result.sfd_data.values[0] * x
+    return moment - sum(load.magnitude * (x - load.position) for load in loads if load.position < x)
+
+
+def _train_solve(axle_loads, offsets, lead: float, station_spans, station_x):
+    """Moments at the stations and the reactions with the leading axle at lead."""
+    edges = np.concatenate([[0.0], np.cumsum([span.length for span in SPANS])])
+    loads = [[] for _ in SPANS]
+    for load, offset in zip(axle_loads, offsets):
+        x = lead - offset
+        if 0.0 <= x <= edges[-1]:
+            i = min(np.searchsorted(edges, x, side="right") - 1, len(SPANS) - 1)
+            loads[i].append(LoadConfig(load_type="POINT_ARBITRARY", magnitude=load, position=x - edges[i]))
+
+    response = analyze_beam(CalculationRequest(
+        spans=[span.model_copy(update={"loads": span_loads}) for span, span_loads in zip(SPANS, loads)],
+        supports=SUPPORTS, include_steps=False
+    ))
+    moments = [_moment_at(response.span_results[s], loads[s], x) for s, x in zip(station_spans, station_x)]
+    return np.array(moments), np.array([node.reaction for node in response.node_results])
+
+
+# Spacings on the step grid, and off it (each fractional lag adds a shifted influence grid)
+@pytest.mark.parametrize("axle_spacings", [[3.0, 4.5], [3.3, 4.25]])
+def test_envelopes_match_single_solves(axle_spacings):
+    axle_loads = [50.0, 110.0, 90.0]
+    request = MovingLoadRequest(spans=SPANS, supports=SUPPORTS, axle_loads=axle_loads,
+                                axle_spacings=axle_spacings, step=0.25, stations_per_span=9)
+    response = analyze_moving_load(request)
+
+    offsets = np.concatenate([[0.0], np.cumsum(axle_spacings)])
+    edges = np.concatenate([[0.0], np.cumsum([span.length for span in SPANS])])
+    station_x = np.array(response.stations) - edges[response.station_spans]
+    leads = response.step * np.arange(int(round((edges[-1] + offsets[-1]) / response.step)) + 1)
+    solves = [_train_solve(axle_loads, offsets, lead, response.station_spans, station_x) for lead in leads]
+
+    for q, envelope in enumerate((response.moment, response.reactions)):
+        values = np.array([solve[q] for solve in solves])
+        scale = np.abs(values).max()
+        np.testing.assert_allclose(envelope.max, values.max(axis=0), rtol=0, atol=1e-9 * scale)
+        np.testing.assert_allclose(envelope.min, values.min(axis=0), rtol=0, atol=1e-9 * scale)
+        # The reported position produces the extreme
+        position_values = values[np.rint(np.array(envelope.max_position) / response.step).astype(int),
+                                 np.arange(values.shape[1])]
+        np.testing.assert_allclose(envelope.max, position_values, rtol=0, atol=1e-9 * scale)
+
+
+def test_closely_spaced_axles_are_sized_by_their_influence_positions():
+    request = MovingLoadRequest(spans=SPANS, supports=SUPPORTS, axle_loads=[10.0] * 40,
+                                axle_spacings=[0.00037] * 39, step=0.002)
+    # One shifted influence grid per distinct fractional lag
+    assert moving_load_dof_count(request) > len(SPANS) * MOVING_LOAD_MAX_POSITIONS
+    with pytest.raises(ValueError, match="at most"):
+        analyze_moving_load(request)
@@ -0,0 +1,82 @@
+"""Pattern live-load envelopes against single solves of every pattern."""
+import itertools
+
+import numpy as np
+import pytest
+
+from analysis import analyze_beam, analyze_pattern_load
+from models import CalculationRequest, LoadConfig, PatternLoadRequest, Span, Support
+
+
+def _spans(loads_by_span):
+    lengths = [5.0, 7.0, 4.0, 6.0]
+    return [
+        Span(id=f"s{i}", length=lengths[i], elastic_modulus=2e8, moment_of_inertia=1e-4 * (1 + 0.5 * i),
+             loads=loads)
+        for i, loads in enumerate(loads_by_span)
+    ]
+
+
+PERMANENT = [
+    [LoadConfig(load_type="UDL", magnitude=8.0)],
+    [LoadConfig(load_type="POINT_ARBITRARY", magnitude=30.0, position=2.5)],
+    [LoadConfig(load_type="UDL", magnitude=8.0), LoadConfig(load_type="MOMENT", magnitude=12.0, position=1.0)],
+    []
+]
+SUPPORTS = [
+    Support(node_index=0, support_type="FIXED"), Support(node_index=1, support_type="ROLLER"),
+    Support(node_index=2, support_type="ROLLER"), Support(node_index=3, support_type="ROLLER"),
+    Support(node_index=4, support_type="PINNED")
+]
+LIVE = [10.0, 15.0, 5.0, 12.0]
+
+
+def _pattern_solve(loaded):
+    """Moment and shear at every station and the reactions, with live load on the loaded spans."""
+    spans = _spans([
+        PERMANENT[i] + ([LoadConfig(load_type="UDL", magnitude=LIVE[i])] if i in loaded else [])
+        for i in range(len(PERMANENT))
+    ])
+    response = analyze_beam(CalculationRequest(spans=spans, supports=SUPPORTS, include_steps=False))
+    return (
+        np.concatenate([span.bmd_data.values for span in response.span_results]),
+        np.concatenate([span.sfd_data.values for span in response.span_results]),
+        np.array([node.reaction for node in response.node_results])
+    )
+
+
+def _all_patterns(num_spans):
+    return [list(p) for r in range(num_spans + 1) for p in itertools.combinations(range(num_spans), r)]
+
+
+@pytest.mark.parametrize("given_patterns", [False, True])
+def test_envelopes_match_every_pattern(given_patterns):
+    patterns = _all_patterns(len(PERMANENT))
+    solves = [_pattern_solve(set(p)) for p in patterns]
+    response = analyze_pattern_load(PatternLoadRequest(
+        spans=_spans(PERMANENT), supports=SUPPORTS, live_loads=LIVE,
+        patterns=patterns if given_patterns else None
+    ))
+
+    for q, envelope in enumerate((response.moment, response.shear, response.reactions)):
+        values = np.array([solve[q] for solve in solves])
+        scale = np.abs(values).max()
+        np.testing.assert_allclose(envelope.max, values.max(axis=0), rtol=0, atol=1e-9 * scale)
+        np.testing.assert_allclose(envelope.min, values.min(axis=0), rtol=0, atol=1e-9 * scale)
+
+        # The reported governing pattern produces the reported extreme
+        for extreme, governing in ((envelope.max, envelope.max_pattern), (envelope.min, envelope.min_pattern)):
+            for station, p in enumerate(governing):
+                pattern = response.patterns[p]
+                np.testing.assert_allclose(
+                    extreme[station], solves[patterns.index(sorted(pattern))][q][station],
+                    rtol=0, atol=1e-9 * scale
+                )
+
+
+def test_single_live_load_applies_to_every_span():
+    uniform = analyze_pattern_load(PatternLoadRequest(spans=_spans(PERMANENT), supports=SUPPORTS, live_loads=[10.0]))
+    per_span = analyze_pattern_load(PatternLoadRequest(spans=_spans(PERMANENT), supports=SUPPORTS,
+                                                       live_loads=[10.0] * 4))
+    np.testing.assert_allclose(uniform.moment.max, per_span.moment.max)
+    np.testing.assert_allclose(uniform.reactions.min, per_span.reactions.min)
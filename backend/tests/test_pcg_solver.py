@@ -0,0 +1,77 @@
+"""The preconditioned conjugate gradient solver against the dense direct solve."""
+import numpy as np
+import pytest
+
+from conftest import portal_frame, released_portal, assert_same_results
+from frame_solver import FrameSolver
+from iterative_solvers import ConjugateGradientSolver, PCGNotConvergedError
+from models import FramePCGSettings
+from stiffness_solvers import StructureUnstableError
+
+
+@pytest.mark.parametrize("preconditioner", ["ic", "jacobi"])
+def test_pcg_matches_dense_direct(scipy_mode, preconditioner):
+    expected = FrameSolver("dense").solve(portal_frame(bays=6, stories=3, shuffle=5, solver="direct"))
+    results = FrameSolver().solve(portal_frame(
+        bays=6, stories=3, shuffle=5, solver="pcg",
+        pcg=FramePCGSettings(preconditioner=preconditioner, tolerance=1e-12)
+    ))
+
+    assert results["solver_report"]["method"] == "pcg"
+    assert results["solver_report"]["residual"] <= 1e-12
+    assert_same_results(results, expected, rtol=1e-7)
+
+
+def test_pcg_starts_from_supplied_displacements(scipy_mode):
+    request = portal_frame(bays=6, stories=3, solver="pcg", pcg=FramePCGSettings(tolerance=1e-10),
+                           load_cases=[], combinations=[])
+    cold = FrameSolver().solve(request)
+    warm = FrameSolver().solve(request.model_copy(update={"pcg": FramePCGSettings(
+        tolerance=1e-10, initial_displacements=cold["displacements"]
+    )}))
+
+    # Already converged
+    assert cold["solver_report"]["iterations"] > 1
+    assert warm["solver_report"]["iterations"] <= 1
+    assert_same_results(warm, cold, rtol=1e-7)
+
+    # A nearby start (the previous solution of a slightly changed model) still saves iterations
+    nearby = FrameSolver().solve(request.model_copy(update={"pcg": FramePCGSettings(
+        tolerance=1e-10, initial_displacements=[1.001 * u for u in cold["displacements"]]
+    )}))
+    assert nearby["solver_report"]["iterations"] < cold["solver_report"]["iterations"]
+
+
+def test_pcg_reports_non_convergence():
+    request = portal_frame(bays=6, stories=3, solver="pcg",
+                           pcg=FramePCGSettings(preconditioner="jacobi", max_iterations=2))
+    with pytest.raises(PCGNotConvergedError, match="did not converge in 2 iterations"):
+        FrameSolver().solve(request)
+
+
+def test_singular_system_that_does_not_converge_names_the_mechanism(scipy_mode):
+    # A supported spring chain (DOFs 0-3) and a free pair of DOFs (4, 5) with a self-equilibrated load
+    K = np.zeros((6, 6))
+    K[:4, :4] = 2 * np.eye(4) - np.eye(4, k=1) - np.eye(4, k=-1)
+    K[4:, 4:] = [[1.0, -1.0], [-1.0, 1.0]]
+    rhs = np.array([1.0, 0.0, 0.0, 1.0, 1.0, -1.0])
+
+    solver = ConjugateGradientSolver(K, "jacobi", max_iterations=1)
+    with pytest.raises(StructureUnstableError) as error:
+        solver.solve(rhs)
+    assert error.value.dofs == [4, 5]
+
+    # The same system on its supported part only does not converge either, but is not singular
+    with pytest.raises(PCGNotConvergedError):
+        ConjugateGradientSolver(K[:4, :4], "jacobi", max_iterations=1).solve(rhs[:4])
+
+
+@pytest.mark.parametrize("preconditioner", ["ic", "jacobi"])
+def test_pcg_breakdown_locates_the_mechanism(scipy_mode, preconditioner):
+    request = released_portal(solver="pcg", pcg=FramePCGSettings(preconditioner=preconditioner))
+    with pytest.raises(StructureUnstableError) as error:
+        FrameSolver().solve(request)
+
+    message = str(error.value)
+    assert "node B (x)" in message and "node C (x)" in message
+    assert "node A (x)" not in message
@@ -0,0 +1,61 @@
+"""Exact piecewise-polynomial span diagrams against sampled diagrams and a fine-grid search."""
+import numpy as np
+import pytest
+
+from conftest import continuous_beam
+from solver import SlopeDeflectionSolver
+
+
+def _evaluate(pieces, x):
+    """Value of a PiecewisePolynomial at stations x."""
+    breakpoints = np.array(pieces.breakpoints)
+    piece = np.clip(np.searchsorted(breakpoints, x, side="right") - 1, 0, len(pieces.coefficients) - 1)
+    coefficients = np.array([pieces.coefficients[i] for i in piece])
+    t = x - breakpoints[piece]
+    return (coefficients * t[:, None] ** np.arange(coefficients.shape[1])).sum(axis=1)
+
+
+def test_pieces_agree_with_the_sampled_diagrams():
+    request = continuous_beam()
+    solver = SlopeDeflectionSolver(request.spans, request.supports)
+    exact = solver.solve(include_steps=False, diagram_format="piecewise")["span_results"]
+    sampled = solver.solve(include_steps=False)["span_results"]
+
+    for exact_span, sampled_span in zip(exact, sampled):
+        assert "bmd_data" not in exact_span
+        x = np.array(sampled_span["bmd_data"].x_coords)
+        np.testing.assert_allclose(_evaluate(exact_span["bmd_pieces"], x), sampled_span["bmd_data"].values,
+                                   atol=1e-9 * np.abs(sampled_span["bmd_data"].values).max())
+        np.testing.assert_allclose(_evaluate(exact_span["sfd_pieces"], x), sampled_span["sfd_data"].values,
+                                   atol=1e-9 * np.abs(sampled_span["sfd_data"].values).max())
+
+
+def test_max_moment_matches_a_fine_grid_search():
+    request = continuous_beam()
+    spans = SlopeDeflectionSolver(request.spans, request.supports).solve(
+        include_steps=False, diagram_format="piecewise"
+    )["span_results"]
+
+    for span, result in zip(request.spans, spans):
+        x = np.linspace(0, span.length, 200001)
+        moments = _evaluate(result["bmd_pieces"], x)
+        k = int(np.argmax(np.abs(moments)))
+        # The exact extreme is never below the grid's, and the grid gets within its spacing
+        assert abs(result["max_moment"]) >= abs(moments[k]) - 1e-12
+        assert result["max_moment"] == pytest.approx(moments[k], rel=1e-8)
+        assert result["max_moment_location"] == pytest.approx(x[k], abs=1e-3)
+
+
+def test_interior_maximum_is_found_between_stations():
+    # Simply supported span under a triangular load: the peak is at L / sqrt(3), not on a sampled station
+    request = continuous_beam()
+    span = request.spans[1].model_copy(update={"loads": request.spans[1].loads[:1]})
+    supports = [request.supports[0].model_copy(update={"node_index": 0}),
+                request.supports[1].model_copy(update={"node_index": 1})]
+    result = SlopeDeflectionSolver([span], supports).solve(
+        include_steps=False, diagram_format="piecewise"
+    )["span_results"][0]
+
+    w, L = 18.0, 8.0
+    assert result["max_moment_location"] == pytest.approx(L / np.sqrt(3), rel=1e-12)
+    assert result["max_moment"] == pytest.approx(w * L**2 / (9 * np.sqrt(3)), rel=1e-12)
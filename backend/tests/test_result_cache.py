@@ -0,0 +1,81 @@
+"""LRU, byte-size and TTL eviction of the result cache, and cache hits on the analysis endpoints."""
+import json
+from types import SimpleNamespace
+
+
+import result_cache as result_cache_module
+from conftest import continuous_beam
+from models import CalculationRequest
+from result_cache import ResultCache, request_key
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResultCache(max_entries=2)
+    cache.put("a", b"1")
+    cache.put("b", b"2")
+    assert cache.get("a") == b"1"
+    cache.put("c", b"3")
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (b"1", b"3")
+    assert cache.stats()["evictions"] == 1
+
+
+def test_byte_budget_evicts_oldest_entries():
+    cache = ResultCache(max_bytes=10)
+    cache.put("a", b"xxxx")
+    cache.put("b", b"yyyy")
+    cache.put("c", b"zzzz")
+    assert cache.stats()["bytes"] == 8
+    assert cache.get("a") is None and cache.get("b") == b"yyyy"
+
+    # Larger than the whole budget: not stored, nothing evicted
+    cache.put("d", b"w" * 11)
+    assert cache.get("d") is None
+    assert cache.stats()["entries"] == 2
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(result_cache_module, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    cache = ResultCache(ttl=30)
+    cache.put("a", b"1")
+
+    now[0] += 30
+    assert cache.get("a") == b"1"
+    now[0] += 1
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_disabled_cache_stores_nothing():
+    cache = ResultCache(max_entries=0)
+    cache.put("a", b"1")
+    assert not cache.enabled and cache.get("a") is None
+
+
+def test_request_key_ignores_aliases_and_key_order():
+    request = continuous_beam()
+    by_alias = json.loads(request.model_dump_json(by_alias=True))
+    reordered = dict(reversed(list(request.model_dump(mode="json").items())))
+
+    key = request_key("beam", request)
+    assert request_key("beam", CalculationRequest.model_validate(by_alias)) == key
+    assert request_key("beam", CalculationRequest.model_validate(reordered)) == key
+    assert request_key("frame", request) != key
+    assert request_key("beam", continuous_beam(include_steps=False)) != key
+
+
+def test_repeat_request_is_served_from_the_cache():
+    from fastapi.testclient import TestClient
+    from main import app, result_cache
+
+    result_cache.clear()
+    client = TestClient(app)
+    body = json.loads(continuous_beam().model_dump_json(by_alias=True))
+    first = client.post("/api/calculate", json=body)
+    second = client.post("/api/calculate", json=body)
+
+    assert first.headers["X-Cache"] == "MISS" and second.headers["X-Cache"] == "HIT"
+    assert second.content == first.content
+    assert json.loads(first.content)["success"] is True
@@ -0,0 +1,131 @@
+"""Single-flight coalescing of identical analyses within and across processes."""
+import asyncio
+import hashlib
+import os
+
+import pytest
+
+import singleflight as singleflight_module
+from singleflight import SingleFlight
+
+cross_process = pytest.mark.skipif(singleflight_module.fcntl is None, reason="Needs fcntl")
+
+
+def test_concurrent_calls_share_one_computation():
+    flight = SingleFlight()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return b"result"
+
+    async def main():
+        return await asyncio.gather(*(flight.run("model", compute) for _ in range(8)))
+
+    assert asyncio.run(main()) == [b"result"] * 8
+    assert len(calls) == 1
+    assert flight.leaders == 1 and flight.coalesced == 7
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_leader_errors_reach_the_waiters():
+    flight = SingleFlight()
+
+    async def compute():
+        await asyncio.sleep(0.02)
+        raise ValueError("unstable")
+
+    async def main():
+        return await asyncio.gather(*(flight.run("model", compute) for _ in range(3)),
+                                    return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert flight.leaders == 1
+
+
+def test_cancelled_leader_is_taken_over():
+    flight = SingleFlight()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return b"result"
+
+    async def main():
+        leader = asyncio.create_task(flight.run("model", compute))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(flight.run("model", compute))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await waiter
+
+    assert asyncio.run(main()) == b"result"
+    assert len(calls) == 2
+    assert flight.leaders == 2
+
+
+@cross_process
+def test_result_is_handed_over_to_a_waiting_worker(tmp_path):
+    lock_dir = str(tmp_path / "inflight")
+    # Two workers on the host, each with its own coalescer
+    first, second = SingleFlight(lock_dir), SingleFlight(lock_dir)
+    calls = []
+    leader_running = None
+
+    async def slow_compute():
+        calls.append("first")
+        leader_running.set()
+        await asyncio.sleep(0.1)
+        return b"result"
+
+    async def compute():
+        calls.append("second")
+        return b"recomputed"
+
+    async def main():
+        nonlocal leader_running
+        leader_running = asyncio.Event()
+        leader = asyncio.create_task(first.run("model", slow_compute))
+        await leader_running.wait()
+        waiter = asyncio.create_task(second.run("model", compute))
+        await asyncio.sleep(0.05)
+        digest = hashlib.sha256(b"model").hexdigest()
+        marked = os.path.exists(os.path.join(lock_dir, f"{digest}.wait"))
+        return marked, await leader, await waiter
+
+    marked, leader_body, waiter_body = asyncio.run(main())
+    assert marked
+    assert leader_body == waiter_body == b"result"
+    assert calls == ["first"]
+    assert second.cross_process_waits == 1 and second.cross_process_hits == 1
+
+
+@cross_process
+def test_result_is_not_written_without_a_waiter(tmp_path):
+    lock_dir = str(tmp_path / "inflight")
+    flight = SingleFlight(lock_dir)
+
+    async def compute():
+        return b"result"
+
+    assert asyncio.run(flight.run("model", compute)) == b"result"
+    assert os.listdir(lock_dir) == []
+
+
+@cross_process
+def test_shared_directory_is_refused(tmp_path):
+    lock_dir = tmp_path / "inflight"
+    lock_dir.mkdir()
+    lock_dir.chmod(0o777)
+
+    flight = SingleFlight(str(lock_dir))
+    assert flight.lock_dir is None
+    assert flight.stats()["cross_process"] is False
+
+    lock_dir.chmod(0o700)
+    assert SingleFlight(str(lock_dir)).lock_dir == str(lock_dir)
@@ -0,0 +1,93 @@
+"""The skyline LDL^T solver against the dense direct solve."""
+import numpy as np
+import pytest
+
+import frame_solver
+import stiffness_solvers
+from conftest import portal_frame, released_portal, graph_stiffness, assert_same_results
+from frame_solver import FrameSolver, FrameModelIndex
+from reordering import reverse_cuthill_mckee, dof_permutation, envelope_size
+from stiffness_solvers import SkylineLDLFactor, StructureUnstableError, TripletMatrix, factorize_stiffness
+
+
+def _triplets(K: np.ndarray) -> TripletMatrix:
+    rows, cols = np.nonzero(K)
+    return TripletMatrix(rows, cols, K[rows, cols], K.shape[0])
+
+
+@pytest.mark.parametrize("shuffle", [None, 3])
+def test_skyline_matches_dense_direct(scipy_mode, shuffle):
+    expected = FrameSolver("dense").solve(portal_frame(bays=6, stories=3, shuffle=shuffle, solver="direct"))
+    results = FrameSolver().solve(portal_frame(bays=6, stories=3, shuffle=shuffle, solver="skyline"))
+
+    assert results["solver_report"]["method"] == "skyline"
+    assert_same_results(results, expected)
+
+
+def test_skyline_factor_solves_multiple_rhs_in_original_numbering():
+    rng = np.random.default_rng(0)
+    A = rng.normal(size=(12, 12)) * (rng.random((12, 12)) < 0.3)
+    K = A @ A.T + 12 * np.eye(12)
+    rhs = rng.normal(size=(12, 3))
+    permutation = rng.permutation(12)
+
+    factor = SkylineLDLFactor(_triplets(K), permutation)
+    np.testing.assert_allclose(factor.solve(rhs), np.linalg.solve(K, rhs), rtol=1e-10)
+
+
+def test_skyline_factor_stores_the_renumbered_profile():
+    request = portal_frame(bays=8, stories=4, shuffle=1)
+    index = FrameModelIndex(request)
+    num_nodes = len(request.nodes)
+    K = graph_stiffness(num_nodes, index.member_nodes)
+
+    order = reverse_cuthill_mckee(num_nodes, index.member_nodes)
+    factor = SkylineLDLFactor(_triplets(K), dof_permutation(order, list(range(K.shape[0]))))
+    _, profile = envelope_size(order, index.member_nodes)
+    # start[-1]: stored entries, from each column's first nonzero down to the diagonal
+    assert factor.start[-1] == profile
+    assert SkylineLDLFactor(_triplets(K)).start[-1] > profile
+
+
+def test_auto_picks_skyline_up_to_the_profile_threshold_without_scipy(monkeypatch):
+    monkeypatch.setattr(frame_solver, "sp", None)
+    monkeypatch.setattr(frame_solver, "SKYLINE_MIN_DOF", 0)
+    request = portal_frame(bays=14, stories=4)
+    index = FrameModelIndex(request)
+    num_free = 3 * len(request.nodes) - 3 * 15
+    order = reverse_cuthill_mckee(len(request.nodes), index.member_nodes)
+    total = 3 * len(request.nodes)
+    ratio = envelope_size(order, index.member_nodes)[1] / (total * (total + 1) / 2)
+
+    monkeypatch.setattr(frame_solver, "SKYLINE_MAX_PROFILE_RATIO", ratio)
+    assert FrameSolver()._choose_factorization(index, num_free, "auto")[0] == "skyline"
+    monkeypatch.setattr(frame_solver, "SKYLINE_MAX_PROFILE_RATIO", 0.99 * ratio)
+    assert FrameSolver()._choose_factorization(index, num_free, "auto")[0] == "direct"
+
+
+def test_triplets_are_factorized_in_skyline_storage_without_scipy(monkeypatch):
+    monkeypatch.setattr(stiffness_solvers, "sp", None)
+    K = np.diag(np.full(5, 4.0)) + np.diag(np.ones(4), 1) + np.diag(np.ones(4), -1)
+
+    factor = factorize_stiffness(_triplets(K))
+    assert isinstance(factor, SkylineLDLFactor)
+    np.testing.assert_allclose(factor.solve(np.ones(5)), np.linalg.solve(K, np.ones(5)), rtol=1e-12)
+
+
+def test_large_direct_model_without_scipy_matches_dense(scipy_mode):
+    # Above the sparse assembly threshold: without SciPy K_ff stays in triplets
+    request = portal_frame(bays=14, stories=6, solver="direct")
+    expected = FrameSolver("dense").solve(request)
+    assert_same_results(FrameSolver().solve(request), expected)
+
+
+@pytest.mark.parametrize("assembly", ["dense", "sparse"])
+def test_skyline_mechanism_is_located(scipy_mode, assembly):
+    if assembly == "sparse" and scipy_mode == "numpy":
+        pytest.skip("Sparse assembly requires SciPy")
+    with pytest.raises(StructureUnstableError) as error:
+        FrameSolver(assembly).solve(released_portal(solver="skyline"))
+
+    message = str(error.value)
+    assert "node B (x)" in message and "node C (x)" in message
+    assert "node A (x)" not in message
@@ -0,0 +1,129 @@
+"""Parametric sweeps against one solve per grid point."""
+import numpy as np
+import pytest
+
+import sweep as sweep_module
+from conftest import continuous_beam, portal_frame
+from frame_solver import FrameSolver
+from models import BeamSweepRequest, FrameSweepRequest, SweepAxis
+from solver import SlopeDeflectionSolver
+from stiffness_solvers import StructureUnstableError
+from sweep import axis_values, sweep_chunk, sweep_chunks, sweep_grid, sweep_response
+
+
+def _run(request):
+    """Sweep response computed chunk by chunk, as the endpoint does."""
+    axes, shape = sweep_grid(request)
+    chunks = [sweep_chunk(request, axes, start, stop)
+              for start, stop in sweep_chunks(request, int(np.prod(shape)))]
+    return axes, sweep_response(request, axes, chunks)
+
+
+def test_beam_sweep_matches_one_solve_per_point(monkeypatch):
+    # Several chunks, the last one partial
+    monkeypatch.setattr(sweep_module, "BEAM_SWEEP_CHUNK_POINTS", 4)
+    base = continuous_beam(include_steps=False)
+    request = BeamSweepRequest(base=base, axes=[
+        SweepAxis(parameter="spans[1].length", start=6.0, stop=10.0, num=3),
+        SweepAxis(parameter="spans[s1].loads[1].magnitude", values=[10.0, 30.0, 50.0]),
+        SweepAxis(parameter="spans[0].loads[1].position", values=[1.0, 4.0])
+    ], outputs=["max_moment", "reactions", "moment_reactions"])
+
+    axes, response = _run(request)
+    assert response.success and response.failed_points == []
+    max_moment = np.array(response.outputs["max_moment"].values).reshape(response.outputs["max_moment"].shape)
+    reactions = np.array(response.outputs["reactions"].values).reshape(response.outputs["reactions"].shape)
+    assert max_moment.shape == (3, 3, 2, 3) and reactions.shape == (3, 3, 2, 4)
+
+    for (i, j, k) in np.ndindex(3, 3, 2):
+        model = base.model_copy(deep=True)
+        model.spans[1].length = axes[0][i]
+        model.spans[0].loads[1].magnitude = axes[1][j]
+        model.spans[0].loads[1].position = axes[2][k]
+        result = SlopeDeflectionSolver(model.spans, model.supports).solve(include_steps=False)
+        np.testing.assert_allclose(max_moment[i, j, k], [s["max_moment"] for s in result["span_results"]],
+                                   rtol=1e-9)
+        np.testing.assert_allclose(reactions[i, j, k], [n["reaction"] for n in result["node_results"]],
+                                   rtol=1e-9)
+
+    moment_reactions = np.array(response.outputs["moment_reactions"].values).reshape(3, 3, 2, 4)
+    assert np.isnan(moment_reactions[..., :3]).all() and np.isfinite(moment_reactions[..., 3]).all()
+
+
+def test_frame_sweep_matches_one_solve_per_point():
+    base = portal_frame(bays=2, stories=2, load_cases=[], combinations=[])
+    request = FrameSweepRequest(base=base, axes=[
+        SweepAxis(parameter="members[c1_0].momentOfInertia", start=5e-5, stop=4e-4, num=3, scale="log"),
+        SweepAxis(parameter="pointLoads[0].magnitudeX", start=0.0, stop=30.0, step=10.0)
+    ], outputs=["drift", "displacements"])
+
+    axes, response = _run(request)
+    np.testing.assert_allclose(axes[0], [5e-5, np.sqrt(5e-5 * 4e-4), 4e-4])
+    # A whole number of steps includes the stop value
+    np.testing.assert_allclose(axes[1], [0.0, 10.0, 20.0, 30.0])
+    drift = np.array(response.outputs["drift"].values).reshape(response.outputs["drift"].shape)
+    assert drift.shape == (3, 4)
+
+    for i, j in np.ndindex(3, 4):
+        model = base.model_copy(deep=True)
+        model.members[0].moment_of_inertia = axes[0][i]
+        model.point_loads[0].magnitude_x = axes[1][j]
+        displacements = np.array(FrameSolver().solve(model)["displacements"])
+        assert drift[i, j] == pytest.approx(np.max(np.abs(displacements[0::3])), rel=1e-9)
+
+
+def test_failed_points_are_reported_without_failing_the_sweep(monkeypatch):
+    class FailingSolver(FrameSolver):
+        """Fails at the grid points whose first column has the given stiffness."""
+        def solve(self, request):
+            if request.members[0].moment_of_inertia == 1e-4:
+                raise StructureUnstableError([0])
+            return super().solve(request)
+
+    monkeypatch.setattr(sweep_module, "FrameSolver", FailingSolver)
+    base = portal_frame(bays=1, stories=1, load_cases=[], combinations=[])
+    request = FrameSweepRequest(base=base, axes=[
+        SweepAxis(parameter="members[c1_0].momentOfInertia", values=[5e-5, 1e-4, 2e-4])
+    ], outputs=["drift"])
+
+    response = _run(request)[1]
+    assert response.success and response.failed_points == [1]
+    drift = response.outputs["drift"].values
+    assert np.isnan(drift[1]) and np.isfinite(drift[0]) and np.isfinite(drift[2])
+
+    request.axes[0].values = [1e-4]
+    with pytest.raises(ValueError, match="failed at every point"):
+        _run(request)
+
+
+@pytest.mark.parametrize("parameter, message", [
+    ("spans[7].length", "out of range"),
+    ("spans[s1].color", "unknown field"),
+    ("spans[0].loads", "not a number"),
+    ("supports[0].nodeIndex", "cannot be swept")
+])
+def test_invalid_parameters_are_rejected(parameter, message):
+    request = BeamSweepRequest(base=continuous_beam(), axes=[SweepAxis(parameter=parameter, values=[1.0])])
+    with pytest.raises(ValueError, match=message):
+        sweep_grid(request)
+
+
+def test_values_outside_the_field_constraints_are_rejected():
+    request = BeamSweepRequest(base=continuous_beam(), axes=[
+        SweepAxis(parameter="spans[0].length", start=-1.0, stop=5.0, num=4)
+    ])
+    with pytest.raises(ValueError, match="Invalid value -1.0"):
+        sweep_grid(request)
+
+
+def test_oversized_grid_is_rejected_before_expansion(monkeypatch):
+    monkeypatch.setattr(sweep_module, "SWEEP_MAX_POINTS", 100)
+    expanded = []
+    monkeypatch.setattr(sweep_module, "axis_values", lambda axis: expanded.append(axis) or axis_values(axis))
+    request = BeamSweepRequest(base=continuous_beam(), axes=[
+        SweepAxis(parameter="spans[0].length", start=4.0, stop=6.0, num=20),
+        SweepAxis(parameter="spans[1].length", start=4.0, stop=6.0, num=20)
+    ])
+    with pytest.raises(ValueError, match="at most 100 points"):
+        sweep_grid(request)
+    assert expanded == []
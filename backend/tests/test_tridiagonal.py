@@ -0,0 +1,76 @@
+"""The tridiagonal (Thomas algorithm) solver of the slope-deflection system."""
+import numpy as np
+import pytest
+
+from banded import TridiagonalMatrix, solve_tridiagonal
+from models import Span, Support, LoadConfig
+from solver import SlopeDeflectionSolver
+
+
+def _random_tridiagonal(rng, shape):
+    lower = rng.normal(size=shape[:-1] + (shape[-1] - 1,))
+    upper = rng.normal(size=lower.shape)
+    diag = 4.0 + rng.random(shape)
+    return TridiagonalMatrix(lower, diag, upper)
+
+
+def test_solve_matches_dense():
+    rng = np.random.default_rng(0)
+    K = _random_tridiagonal(rng, (50,))
+    rhs = rng.normal(size=50)
+
+    np.testing.assert_allclose(K.solve(rhs), np.linalg.solve(K.to_dense(), rhs), rtol=1e-12)
+    np.testing.assert_allclose(K.matvec(K.solve(rhs)), rhs, rtol=1e-12)
+
+
+def test_batched_systems_are_solved_independently():
+    rng = np.random.default_rng(1)
+    K = _random_tridiagonal(rng, (4, 12))
+    rhs = rng.normal(size=(4, 12))
+
+    x = solve_tridiagonal(K.lower, K.diag, K.upper, rhs)
+    for i in range(4):
+        dense = TridiagonalMatrix(K.lower[i], K.diag[i], K.upper[i]).to_dense()
+        np.testing.assert_allclose(x[i], np.linalg.solve(dense, rhs[i]), rtol=1e-12)
+
+
+def test_reduce_keeps_the_submatrix():
+    K = _random_tridiagonal(np.random.default_rng(2), (8,))
+    keep = [0, 2, 3, 4, 7]
+    np.testing.assert_array_equal(K.reduce(keep).to_dense(), K.to_dense()[np.ix_(keep, keep)])
+
+
+def test_singular_matrix_raises():
+    K = TridiagonalMatrix(np.ones(2), np.array([1.0, 1.0, 1.0]), np.ones(2))
+    with pytest.raises(np.linalg.LinAlgError):
+        K.solve(np.ones(3))
+
+
+def _beam(lengths, supports, w):
+    spans = [Span(id=f"s{i}", length=L, elastic_modulus=2e8, moment_of_inertia=1e-4,
+                  loads=[LoadConfig(load_type="UDL", magnitude=w)]) for i, L in enumerate(lengths)]
+    return SlopeDeflectionSolver(spans, [Support(node_index=i, support_type=t) for i, t in supports])
+
+
+def test_classic_continuous_beam_moments():
+    # Two equal spans under a UDL: wL^2/8 over the middle support
+    results = _beam([6.0, 6.0], [(0, "PINNED"), (1, "ROLLER"), (2, "ROLLER")], 10.0).solve(include_steps=False)
+    assert results["span_results"][0]["moment_right"] == pytest.approx(10.0 * 36 / 8)
+    assert results["span_results"][1]["moment_left"] == pytest.approx(-10.0 * 36 / 8)
+
+    # Fixed-fixed span: wL^2/12 at both ends
+    results = _beam([6.0], [(0, "FIXED"), (1, "FIXED")], 10.0).solve(include_steps=False)
+    assert results["span_results"][0]["moment_left"] == pytest.approx(-10.0 * 36 / 12)
+    assert results["span_results"][0]["moment_right"] == pytest.approx(10.0 * 36 / 12)
+
+
+def test_long_beam_is_in_equilibrium_at_every_joint():
+    lengths = 3.0 + np.random.default_rng(3).random(300) * 5
+    supports = [(0, "FIXED")] + [(i, "ROLLER") for i in range(1, 300)] + [(300, "PINNED")]
+    span_results = _beam(lengths, supports, 10.0).solve(include_steps=False)["span_results"]
+
+    # The end moments of the two spans at every free joint balance, and the pinned end is moment-free
+    right = np.array([s["moment_right"] for s in span_results])
+    left = np.array([s["moment_left"] for s in span_results])
+    np.testing.assert_allclose(right[:-1] + left[1:], 0.0, atol=1e-9 * np.abs(right).max())
+    assert right[-1] == pytest.approx(0.0, abs=1e-9)